@@ -0,0 +1,189 @@
+# Command-line entry point: python -m pcb_detect <command>
+import argparse
+import json
+import os
+import sys
+
+def _cmd_camera_modes(args):
+    from pcb_detect import camera_probe
+    from pcb_detect.config_manager import ConfigManager
+    report = camera_probe.measure_modes(args.camera, frames=args.frames, buffer_size=args.buffer_size)
+    if not report:
+        print(f"Camera {args.camera}: could not be opened or delivered no frames")
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'requested':<26}{'actual':<26}{'fps':>8}{'mean ms':>10}{'p95 ms':>10}")
+        for r in report:
+            req, act = r['requested'], r['actual']
+            requested = f"{req.get('width')}x{req.get('height')} {req.get('fourcc', '')}"
+            actual = f"{act['width']}x{act['height']}@{act['fps']:g} {act['fourcc']}"
+            print(f"{requested:<26}{actual:<26}{r['measured_fps']:>8.2f}{r['latency_ms_mean']:>10.2f}{r['latency_ms_p95']:>10.2f}")
+    if args.apply:
+        # Store the cheapest mode that reaches the requested FPS
+        chosen = next((r for r in report if r['measured_fps'] >= args.apply), None)
+        if chosen is None:
+            print(f"No mode reached {args.apply} FPS; camera settings unchanged")
+            return 1
+        ConfigManager().set_camera_settings(args.camera, chosen['requested'])
+        print(f"Saved camera {args.camera} settings: {chosen['requested']}")
+    return 0
+
+def _cmd_compare_backends(args):
+    from pcb_detect import benchmark
+    images = benchmark.snapshot_images(args.images, limit=args.limit)
+    if not images:
+        print(f"No images found in '{args.images}'")
+        return 1
+    report = benchmark.compare_backends(args.model, images, backends=args.backends, conf=args.conf, device=args.device)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"{'backend':<10}{'images':>8}{'mean ms':>10}{'p95 ms':>10}{'agreement':>11}")
+    for r in report:
+        if 'error' in r:
+            print(f"{r['backend']:<10}  failed: {r['error']}")
+        elif 'latency_ms_mean' in r:
+            print(f"{r['backend']:<10}{r['images']:>8}{r['latency_ms_mean']:>10.2f}{r['latency_ms_p95']:>10.2f}{r['agreement']:>11.3f}")
+    return 0
+
+def _cmd_quantize(args):
+    from pcb_detect import benchmark, quantization
+    images = benchmark.snapshot_images(args.images)
+    if not images:
+        print(f"No images found in '{args.images}'")
+        return 1
+    output_path, report = quantization.quantize_and_report(args.model, images, calibration_size=args.calibration,
+                                                           eval_size=args.eval, conf=args.conf, imgsz=args.imgsz)
+    print(f"Saved {output_path} ({report['calibration_images']} calibration images)")
+    print(f"FP32 {report['fp32_latency_ms']:.2f} ms, INT8 {report['int8_latency_ms']:.2f} ms, "
+          f"speedup {report['speedup']}x on {report['images']} images")
+    if report['agreement'] is None:
+        print(f"{report['note']}; add images or lower --calibration to measure agreement")
+        return 0
+    print(f"Agreement {report['agreement']} on {report['held_out_images']} held-out images")
+    for label, row in report['per_class'].items():
+        delta = 'n/a' if row['recall_delta'] is None else f"{row['recall_delta']:+.3f}"
+        print(f"  {label:<20} fp32 {row['fp32_detections']:>5}  int8 {row['int8_detections']:>5}  recall delta {delta}")
+    return 0
+
+def _cmd_serve(args):
+    from pcb_detect import server
+    from pcb_detect.board_manager import BoardManager
+    from pcb_detect.detection import Detector
+    detector = Detector(device=args.device, backend=args.backend, imgsz=args.imgsz)
+    detector.load_model(args.model)
+    detector.warmup(2, args.imgsz)
+    service = server.InspectionService(detector, BoardManager(), conf=args.conf, batch_size=args.batch_size,
+                                       max_queue=args.max_queue, snapshot_dir=args.save)
+    httpd = server.create_server(service, host=args.host, port=args.port, verbose=args.verbose)
+    print(f"Serving {args.model} ({args.backend}) on http://{args.host}:{args.port} "
+          f"(POST /inspect?board=<set>, GET /health, GET /metrics)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.stop()
+    return 0
+
+def _cmd_inspect(args):
+    from pcb_detect import benchmark, bulk_inspection
+    from pcb_detect.board_manager import BoardManager
+    board_manager = BoardManager()
+    if args.board not in board_manager.sets:
+        print(f"Unknown board set '{args.board}' (known: {', '.join(sorted(board_manager.sets))})")
+        return 1
+    images = benchmark.snapshot_images(args.directory)
+    if not images:
+        print(f"No images found in '{args.directory}'")
+        return 1
+    output = args.output or os.path.join(args.directory, 'inspection.jsonl')
+    def progress(done, total, record):
+        if not args.quiet:
+            print(f"[{done}/{total}] {record['result']:<5} {record['image']}", flush=True)
+    try:
+        summary = bulk_inspection.inspect_directory(images, args.board, board_manager.sets[args.board], output, args.model,
+                                                    workers=args.workers, conf=args.conf,
+                                                    options=board_manager.get_options(args.board),
+                                                    backend=args.backend, device=args.device, imgsz=args.imgsz,
+                                                    progress=progress)
+    except bulk_inspection.ModelLoadError as e:
+        print(e)
+        return 1
+    if summary['skipped']:
+        print(f"Skipped {summary['skipped']} images already in {output}")
+    print(f"Inspected {summary['inspected']} images in {summary['seconds']:.1f} s "
+          f"({summary['images_per_s'] or 0:.2f} images/s): {summary['pass']} PASS, {summary['fail']} FAIL, "
+          f"{summary['errors']} errors -> {output}")
+    if summary['startup_s'] is not None:
+        print(f"First result after {summary['startup_s']:.1f} s (worker start-up and model loading)")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m pcb_detect', description="PCB component detection tools")
+    sub = parser.add_subparsers(dest='command')
+    p = sub.add_parser('camera-modes', help="Measure the FPS and frame latency each capture mode delivers")
+    p.add_argument('--camera', type=int, default=0, help="Camera index")
+    p.add_argument('--frames', type=int, default=60, help="Frames to time per mode")
+    p.add_argument('--buffer-size', type=int, default=1, help="CAP_PROP_BUFFERSIZE to request (0 = driver default)")
+    p.add_argument('--apply', type=float, metavar='FPS', help="Save the cheapest mode reaching FPS to config")
+    p.add_argument('--json', action='store_true', help="Print the report as JSON")
+    p.set_defaults(func=_cmd_camera_modes)
+    p = sub.add_parser('compare-backends', help="Compare latency and detection agreement of inference backends")
+    p.add_argument('--model', required=True, help="Path to the .pt model")
+    p.add_argument('--images', default='snapshots', help="Folder of images to run on")
+    p.add_argument('--backends', nargs='+', default=['torch', 'onnx', 'openvino'], help="Backends to compare; the first is the reference")
+    p.add_argument('--conf', type=float, default=0.5, help="Confidence threshold")
+    p.add_argument('--device', default=None, help="Inference device, e.g. cpu")
+    p.add_argument('--limit', type=int, default=None, help="Use at most this many images")
+    p.add_argument('--json', action='store_true', help="Print the report as JSON")
+    p.set_defaults(func=_cmd_compare_backends)
+    p = sub.add_parser('quantize', help="Create an INT8 ONNX variant of a model calibrated on snapshots")
+    p.add_argument('--model', required=True, help="Path to the .pt model (the INT8 model is written next to it)")
+    p.add_argument('--images', default='snapshots', help="Folder of calibration/evaluation images")
+    p.add_argument('--calibration', type=int, default=64, help="Number of calibration images (at most two thirds of them when there are fewer than --calibration + --eval)")
+    p.add_argument('--eval', type=int, default=32, help="Number of images for the FP32/INT8 comparison")
+    p.add_argument('--conf', type=float, default=0.5, help="Confidence threshold for the comparison")
+    p.add_argument('--imgsz', type=int, default=640, help="Model input size")
+    p.set_defaults(func=_cmd_quantize)
+    p = sub.add_parser('serve', help="Run a headless inspection service over localhost HTTP")
+    p.add_argument('--model', required=True, help="Path to the model")
+    p.add_argument('--host', default='127.0.0.1', help="Address to bind")
+    p.add_argument('--port', type=int, default=8765, help="Port to listen on")
+    p.add_argument('--conf', type=float, default=0.5, help="Default confidence threshold")
+    p.add_argument('--backend', default='torch', choices=['torch', 'onnx', 'openvino'], help="Inference backend")
+    p.add_argument('--device', default=None, help="Inference device, e.g. cpu")
+    p.add_argument('--imgsz', type=int, default=640, help="Model input size")
+    p.add_argument('--batch-size', type=int, default=8, help="Maximum images per inference batch")
+    p.add_argument('--max-queue', type=int, default=32, help="Queued requests before answering 503")
+    p.add_argument('--save', metavar='DIR', default=None, help="Also save annotated snapshots and records to DIR")
+    p.add_argument('--verbose', action='store_true', help="Log every request")
+    p.set_defaults(func=_cmd_serve)
+    p = sub.add_parser('inspect', help="Inspect a folder of images against a board set")
+    p.add_argument('directory', help="Folder of images")
+    p.add_argument('--board', required=True, help="Board set name")
+    p.add_argument('--model', required=True, help="Path to the model")
+    p.add_argument('--workers', type=int, default=2, help="Worker processes (each loads its own model)")
+    p.add_argument('--output', default=None, help="Results file, .jsonl or .csv (default <directory>/inspection.jsonl); "
+                                                   "images already in it are skipped")
+    p.add_argument('--conf', type=float, default=0.5, help="Confidence threshold")
+    p.add_argument('--backend', default='torch', choices=['torch', 'onnx', 'openvino'], help="Inference backend")
+    p.add_argument('--device', default=None, help="Inference device, e.g. cpu")
+    p.add_argument('--imgsz', type=int, default=640, help="Model input size")
+    p.add_argument('--quiet', action='store_true', help="Only print the summary")
+    p.set_defaults(func=_cmd_inspect)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 0
+    return args.func(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,6 +4,7 @@ from pcb_detect.ui.video_frame import VideoFrame
 from pcb_detect.ui.status_frame import StatusFrame
 from pcb_detect.ui.status_bar import StatusBar
 from pcb_detect.config_manager import ConfigManager
+from pcb_detect.camera_broker import get_broker
 
 class PCBDetectApp:
     def __init__(self):
@@ -17,6 +18,8 @@ class PCBDetectApp:
         # Start camera on launch
         if hasattr(self, 'video_frame') and hasattr(self.video_frame, 'start_camera'):
             self.video_frame.start_camera()
+        # Preload the last used model without blocking the window
+        self.controls.preload_last_model()
 
     def _setup_ui(self):
         # Controls (top)
@@ -37,30 +40,18 @@ class PCBDetectApp:
         # Connect detection results to status frame
         self.video_frame.on_detection = self._on_detection
 
-    def _on_detection(self, results):
-        # Get expected components from selected board
+    def _on_detection(self, evaluation):
+        # evaluation: BoardEvaluation of fresh real-time results against the
+        # selected board set
         board_name = self.controls.board_combo.get()
-        expected = None
-        class_names = None
-        if hasattr(self.controls, 'detector') and getattr(self.controls.detector, 'model', None):
-            class_names = self.controls.detector.model.names if hasattr(self.controls.detector.model, 'names') else None
-        if hasattr(self.controls, 'board_manager') and board_name in self.controls.board_manager.sets:
-            expected = self.controls.board_manager.sets[board_name]
-        self.status_frame.update_results(results, expected)
-        # Log event and add to history (filter to only allowed components)
-        allowed_components = set(expected.keys()) if expected else set()
-        if results and hasattr(results[0], 'boxes'):
-            names = []
-            for box in results[0].boxes:
-                class_id = int(box.cls[0].item())
-                label = class_names[class_id] if class_names and class_id in class_names else str(class_id)
-                if not allowed_components or label in allowed_components:
-                    names.append(label)
-            summary = f"Detected: {', '.join(names)}" if names else "No detections"
-        else:
-            summary = "No detections"
+        self.status_frame.update_results(evaluation)
+        # Log event and add to history (only the set's components, if a set is selected)
+        names = [label for label, n in evaluation.summary().items() for _ in range(n)]
+        summary = f"Detected: {', '.join(names)}" if names else "No detections"
         self.status_frame.log_event(f"Detection run on board '{board_name}': {summary}")
         self.status_frame.add_history(summary)
 
     def run(self):
         self.root.mainloop()
+        # Release every device still held by the broker
+        get_broker().close_all()
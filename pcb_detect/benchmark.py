@@ -0,0 +1,67 @@
+# Backend comparison: latency of each inference backend and how well its
+# detections agree with the torch backend on stored snapshot images
+import glob
+import os
+import time
+import numpy as np
+from pcb_detect.geometry import match_boxes
+from pcb_detect.model_manager import ModelManager
+
+IMAGE_PATTERNS = ('*.png', '*.jpg', '*.jpeg', '*.bmp')
+
+def snapshot_images(directory='snapshots', limit=None):
+    paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(directory, pattern)))
+    return paths[:limit] if limit else paths
+
+def result_arrays(result):
+    # (xyxy float array Nx4, class id int array N) of one DetectionResult
+    if result is None:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int64)
+    return result.xyxy, result.cls
+
+def agreement(reference, other, iou_threshold=0.5):
+    # F1 of other's boxes against reference; two empty results agree fully
+    total = len(reference[1]) + len(other[1])
+    if total == 0:
+        return 1.0
+    return 2.0 * len(match_boxes(reference, other, iou_threshold)) / total
+
+def _load_detector(model_path, backend, device=None):
+    from pcb_detect.detection import Detector
+    detector = Detector(device=device, backend=backend)
+    detector.load_model(model_path)
+    detector.warmup(2, detector.imgsz)
+    return detector
+
+def compare_backends(model_path, images, backends=ModelManager.BACKENDS, conf=0.5, device=None, loader=_load_detector):
+    # One report row per backend; the first backend (torch) is the reference
+    # the others are scored against. Backends that fail to load or export
+    # are reported with their error.
+    import cv2
+    frames = [f for f in (cv2.imread(p) for p in images) if f is not None]
+    report = []
+    reference = None
+    for backend in backends:
+        try:
+            detector = loader(model_path, backend, device)
+        except Exception as e:
+            report.append({'backend': backend, 'error': str(e)})
+            continue
+        latencies = []
+        outputs = []
+        for frame in frames:
+            t0 = time.perf_counter()
+            results = detector.detect(frame, conf=conf)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            outputs.append(result_arrays(results[0]) if results else result_arrays(None))
+        detector.unload_model()
+        if reference is None:
+            reference = outputs
+        row = {'backend': backend, 'images': len(frames)}
+        if latencies:
+            latencies.sort()
+            row['latency_ms_mean'] = round(sum(latencies) / len(latencies), 2)
+            row['latency_ms_p95'] = round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2)
+            row['agreement'] = round(float(np.mean([agreement(r, o) for r, o in zip(reference, outputs)])), 4)
+        report.append(row)
+    return report
@@ -3,9 +3,13 @@ import json
 
 class BoardManager:
     SETS_PATH = os.path.join('config', 'component_sets.json')
+    # Per-board inspection options (tiling, ...) are kept apart from the
+    # component counts so component_sets.json keeps its {component: qty} format
+    SETTINGS_PATH = os.path.join('config', 'board_settings.json')
 
     def __init__(self):
         self.sets = {}
+        self.settings = {}
         self.load()
 
     def load(self):
@@ -14,12 +18,48 @@ class BoardManager:
                 self.sets = json.load(f)
         else:
             self.sets = {}
+        self.settings = {}
+        if os.path.exists(self.SETTINGS_PATH):
+            try:
+                with open(self.SETTINGS_PATH, 'r') as f:
+                    self.settings = json.load(f)
+            except Exception:
+                pass
 
     def save(self):
         os.makedirs(os.path.dirname(self.SETS_PATH), exist_ok=True)
         with open(self.SETS_PATH, 'w') as f:
             json.dump(self.sets, f, indent=2)
 
+    def save_settings(self):
+        os.makedirs(os.path.dirname(self.SETTINGS_PATH), exist_ok=True)
+        with open(self.SETTINGS_PATH, 'w') as f:
+            json.dump(self.settings, f, indent=2)
+
+    def get_options(self, name):
+        return dict(self.settings.get(name, {}))
+
+    def set_option(self, name, key, value):
+        # value None removes the option
+        options = self.settings.setdefault(name, {})
+        if value is None:
+            options.pop(key, None)
+        else:
+            options[key] = value
+        if not options:
+            del self.settings[name]
+        self.save_settings()
+
+    def rename_set(self, old_name, new_name, components=None):
+        # Keeps the board's options when a set is renamed
+        self.sets[new_name] = components if components is not None else self.sets.get(old_name, {})
+        if old_name != new_name:
+            self.sets.pop(old_name, None)
+            if old_name in self.settings:
+                self.settings[new_name] = self.settings.pop(old_name)
+                self.save_settings()
+        self.save()
+
     def add_set(self, name, components):
         self.sets[name] = components
         self.save()
@@ -32,6 +72,9 @@ class BoardManager:
         if name in self.sets:
             del self.sets[name]
             self.save()
+        if name in self.settings:
+            del self.settings[name]
+            self.save_settings()
 
     def import_sets(self, path):
         with open(path, 'r') as f:
@@ -0,0 +1,197 @@
+# Bulk re-inspection of stored images: python -m pcb_detect inspect <dir>.
+# Images are fanned out over a process pool (one model per worker process),
+# evaluated with the same PASS/FAIL logic as a GUI capture and streamed to a
+# JSONL or CSV file as they complete. Images that already have a PASS/FAIL
+# record in the output file are skipped, so an interrupted run can simply be
+# started again; images that ended in ERROR are retried (the newest record
+# of an image is the one that counts).
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from pcb_detect import inspection
+from pcb_detect.detection import Detector
+
+CSV_FIELDS = ['image', 'board', 'result', 'missing', 'detected', 'error']
+RESULTS = ('PASS', 'FAIL', 'ERROR')
+# Results that finish an image; ERROR records are retried on the next run
+FINAL_RESULTS = ('PASS', 'FAIL')
+
+class ModelLoadError(Exception):
+    pass
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+def _init_worker(factory, model_path, backend, device, imgsz, board, expected, options, conf, threads):
+    if threads:
+        import torch
+        torch.set_num_threads(threads)
+    try:
+        detector = factory(device=device, backend=backend, imgsz=imgsz)
+        detector.load_model(model_path)
+    except Exception as e:
+        # Raised from every task instead, so the parent sees the reason
+        _worker['error'] = f"Could not load model '{model_path}' ({backend}): {e}"
+        return
+    options = dict(options or {})
+    if expected and hasattr(detector, 'class_ids'):
+        options['classes'] = detector.class_ids(expected.keys())
+    compiled = inspection.CompiledBoardSet(expected, inspection.class_names_of(detector))
+    _worker.update(detector=detector, board=board, compiled=compiled, options=options, conf=conf)
+
+def _inspect_path(path):
+    import cv2
+    if 'error' in _worker:
+        raise ModelLoadError(_worker['error'])
+    board = _worker['board']
+    frame = cv2.imread(path)
+    if frame is None:
+        return {'image': path, 'board': board, 'result': 'ERROR', 'error': "Could not read image"}
+    detector = _worker['detector']
+    try:
+        results = inspection.run_detection(detector, frame, conf=_worker['conf'], options=_worker['options'])
+        # Only the verdict is written, so the boxes are not drawn
+        evaluation = _worker['compiled'].evaluate(results[0] if results else None)
+    except Exception as e:
+        return {'image': path, 'board': board, 'result': 'ERROR', 'error': str(e)}
+    return {'image': path, 'board': board, 'result': evaluation.pass_fail, 'missing': evaluation.missing, 'detected': evaluation.detected}
+
+def output_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def _complete_text(path):
+    # File contents up to the last newline: a final line cut short by an
+    # interruption is dropped, and that image is inspected again
+    with open(path, newline='') as f:
+        text = f.read()
+    return text[:text.rfind('\n') + 1]
+
+def _valid_record(record):
+    return isinstance(record, dict) and bool(record.get('image')) and record.get('result') in RESULTS
+
+def _mark(done, record):
+    # The newest record of an image decides, so a later ERROR reopens it
+    if record['result'] in FINAL_RESULTS:
+        done.add(record['image'])
+    else:
+        done.discard(record['image'])
+
+def completed_images(path):
+    # Images already finished in an existing output file. Only well-formed
+    # PASS/FAIL records count: every CSV column present and a known result.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    text = _complete_text(path)
+    if output_format(path) == 'csv':
+        try:
+            for row in csv.DictReader(io.StringIO(text)):
+                # Short rows fill missing columns with None, long ones add a None key
+                if None not in row and None not in row.values() and _valid_record(row):
+                    _mark(done, row)
+        except csv.Error:
+            pass
+    else:
+        for line in text.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if _valid_record(record):
+                _mark(done, record)
+    return done
+
+class ResultWriter:
+    # Appends one record per line and flushes it, so results survive a crash
+    def __init__(self, path):
+        self.format = output_format(path)
+        # A partial last line (no newline) would corrupt the next record, and
+        # completed_images() ignored it, so it is cut off
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb+') as f:
+                data = f.read()
+                if not data.endswith(b'\n'):
+                    f.truncate(data.rfind(b'\n') + 1)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            row = dict(record)
+            row['missing'] = '; '.join(record.get('missing') or [])
+            row['detected'] = json.dumps(record.get('detected') or {})
+            # One record per line, so a cut-off record is always the last line
+            row['error'] = ' '.join(str(record.get('error') or '').splitlines())
+            self._csv.writerow({k: row.get(k, '') for k in CSV_FIELDS})
+        else:
+            self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def inspect_directory(images, board, expected, output, model_path, workers=2, conf=0.5, options=None,
+                      backend='torch', device=None, imgsz=640, factory=Detector, progress=None):
+    # Inspects every image path not already in output; returns a summary dict.
+    # progress(done, total, record) is called as results arrive.
+    done = completed_images(output)
+    pending = [p for p in images if p not in done]
+    summary = {'images': len(images), 'skipped': len(images) - len(pending), 'inspected': 0,
+               'pass': 0, 'fail': 0, 'errors': 0, 'seconds': 0.0, 'startup_s': None, 'images_per_s': None}
+    if not pending:
+        return summary
+    workers = max(1, min(int(workers), len(pending)))
+    # Split the cores between the workers instead of letting each one use all of them
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    writer = ResultWriter(output)
+    start = time.perf_counter()
+    # spawn: each worker imports torch/ultralytics fresh instead of forking them
+    ctx = multiprocessing.get_context('spawn')
+    initargs = (factory, model_path, backend, device, imgsz, board, expected, options, conf, threads)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=initargs) as pool:
+            queued = iter(pending)
+            in_flight = set()
+            # A few tasks per worker keep them busy without queueing every path
+            for path in queued:
+                in_flight.add(pool.submit(_inspect_path, path))
+                if len(in_flight) >= workers * 4:
+                    break
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    try:
+                        record = future.result()
+                    except BrokenProcessPool as e:
+                        # A worker died; before any result that means its initializer did
+                        if summary['inspected']:
+                            raise
+                        raise ModelLoadError(f"Could not load model '{model_path}': the inspection workers exited before returning any result") from e
+                    if summary['startup_s'] is None:
+                        # Includes the workers loading their models
+                        summary['startup_s'] = round(time.perf_counter() - start, 2)
+                    writer.write(record)
+                    summary['inspected'] += 1
+                    key = {'PASS': 'pass', 'FAIL': 'fail'}.get(record['result'], 'errors')
+                    summary[key] += 1
+                    if progress:
+                        progress(summary['inspected'], len(pending), record)
+                    path = next(queued, None)
+                    if path is not None:
+                        in_flight.add(pool.submit(_inspect_path, path))
+    finally:
+        writer.close()
+        summary['seconds'] = round(time.perf_counter() - start, 2)
+    if summary['seconds']:
+        summary['images_per_s'] = round(summary['inspected'] / summary['seconds'], 2)
+    return summary
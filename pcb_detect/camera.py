@@ -1,21 +1,167 @@
+import threading
+import time
+from collections import deque
 import cv2
 
-class Camera:
-    def __init__(self, camera_index=0):
-        self.camera_index = camera_index
-        self.cap = None
+class FramePacket:
+    # A captured frame with its sequence number, capture time and the number
+    # of frames the reader skipped to get to it
+    __slots__ = ('frame', 'seq', 'timestamp', 'dropped')
+
+    def __init__(self, frame, seq, timestamp, dropped=0):
+        self.frame = frame
+        self.seq = seq
+        self.timestamp = timestamp
+        self.dropped = dropped
+
+class FrameSource:
+    # Base class for everything that produces frames (live camera, video file,
+    # image folder, synthetic generator). Subclasses implement _open/_read/_close.
+    def __init__(self, grabber=False, buffer_size=2, realtime=True):
+        # Grabber mode: a background thread keeps pulling frames into a small
+        # ring buffer so read() always returns the newest frame without blocking
+        self.grabber = grabber
+        self.buffer_size = max(1, int(buffer_size))
+        # Replay sources sleep between frames to match their fps when realtime
+        # is set; otherwise they deliver frames as fast as they are read
+        self.realtime = realtime
+        self.fps = 0.0
+        self.dropped = 0
+        self._buffer = deque(maxlen=self.buffer_size)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._grabbing = False
+        self._seq = 0
+        self._last_read_seq = 0
+        self._next_due = None
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def is_opened(self):
+        raise NotImplementedError
 
     def open(self):
-        self.cap = cv2.VideoCapture(self.camera_index)
-        return self.cap.isOpened()
+        if not self._open():
+            return False
+        self._next_due = None
+        if self.grabber:
+            self._start_grabber()
+        return True
 
     def read(self):
-        if self.cap:
-            ret, frame = self.cap.read()
-            return ret, frame
-        return False, None
+        if self.grabber:
+            packet = self.read_latest(self._last_read_seq)
+            if packet is None:
+                return False, None
+            self._last_read_seq = packet.seq
+            self.dropped += packet.dropped
+            return True, packet.frame
+        if not self.is_opened():
+            return False, None
+        return self._read_paced()
+
+    def read_latest(self, last_seq=0, timeout=0.0):
+        # Return the newest buffered frame newer than last_seq, or None.
+        # Each consumer passes the seq of the last packet it got, so several
+        # readers can share one grabber and each gets its own dropped count.
+        if not self.grabber:
+            ret, frame = self.read()
+            if not ret:
+                return None
+            self._seq += 1
+            return FramePacket(frame, self._seq, time.time())
+        def has_new():
+            return bool(self._buffer) and self._buffer[-1].seq > last_seq
+        with self._cond:
+            if timeout and not has_new():
+                self._cond.wait_for(lambda: has_new() or not self._grabbing, timeout)
+            if not has_new():
+                return None
+            latest = self._buffer[-1]
+        dropped = latest.seq - last_seq - 1 if last_seq else 0
+        return FramePacket(latest.frame, latest.seq, latest.timestamp, max(0, dropped))
+
+    def _read_paced(self):
+        ret, frame = self._read()
+        if ret and self.realtime and self.fps:
+            now = time.monotonic()
+            if self._next_due is None or self._next_due < now - 1.0:
+                self._next_due = now
+            wait = self._next_due - now
+            if wait > 0:
+                time.sleep(wait)
+            self._next_due += 1.0 / self.fps
+        return ret, frame
+
+    def _start_grabber(self):
+        self._grabbing = True
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self):
+        while self._grabbing and self.is_opened():
+            ret, frame = self._read_paced()
+            if not ret:
+                time.sleep(0.01)
+                continue
+            with self._cond:
+                self._seq += 1
+                self._buffer.append(FramePacket(frame, self._seq, time.time()))
+                self._cond.notify_all()
 
     def release(self):
+        if self._thread:
+            with self._cond:
+                self._grabbing = False
+                self._cond.notify_all()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._close()
+        self._buffer.clear()
+
+class Camera(FrameSource):
+    def __init__(self, camera_index=0, grabber=False, buffer_size=2, settings=None):
+        super().__init__(grabber=grabber, buffer_size=buffer_size, realtime=False)
+        self.camera_index = camera_index
+        # Capture negotiation: width, height, fps, fourcc (e.g. "MJPG") and
+        # buffer_size (CAP_PROP_BUFFERSIZE); missing keys keep driver defaults
+        self.settings = dict(settings or {})
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.camera_index)
+        if not self.cap.isOpened():
+            return False
+        self.apply_settings(self.settings)
+        return True
+
+    def apply_settings(self, settings):
+        # FOURCC has to be set before the resolution for most UVC drivers
+        if settings.get('fourcc'):
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings['fourcc']))
+        if settings.get('width'):
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, int(settings['width']))
+        if settings.get('height'):
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, int(settings['height']))
+        if settings.get('fps'):
+            self.cap.set(cv2.CAP_PROP_FPS, float(settings['fps']))
+        if settings.get('buffer_size'):
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, int(settings['buffer_size']))
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def _read(self):
+        return self.cap.read()
+
+    def _close(self):
         if self.cap:
             self.cap.release()
             self.cap = None
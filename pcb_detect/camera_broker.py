@@ -0,0 +1,112 @@
+# Process-wide owner of frame sources: each device is opened once and its
+# frames are fanned out to any number of subscribers
+import threading
+import time
+import cv2
+from pcb_detect.camera import FramePacket
+from pcb_detect.frame_sources import create_frame_source, parse_source_spec
+
+class Subscription:
+    def __init__(self, broker, key, source, fps=None, size=None):
+        self.broker = broker
+        self.key = key
+        self.source = source
+        # Each subscriber picks its own delivery rate and output resolution
+        self.fps = fps
+        self.size = tuple(size) if size else None
+        self.dropped = 0
+        self.closed = False
+        self._last_seq = 0
+        self._last_delivery = 0.0
+
+    def read_latest(self, timeout=0.0):
+        if self.closed:
+            return None
+        deadline = time.monotonic() + timeout
+        if self.fps:
+            due = self._last_delivery + 1.0 / self.fps
+            now = time.monotonic()
+            if now < due:
+                if now + timeout < due:
+                    if timeout:
+                        time.sleep(timeout)
+                    return None
+                time.sleep(due - now)
+        remaining = max(0.0, deadline - time.monotonic())
+        packet = self.source.read_latest(self._last_seq, timeout=remaining)
+        if packet is None:
+            return None
+        self._last_seq = packet.seq
+        self._last_delivery = time.monotonic()
+        self.dropped += packet.dropped
+        frame = packet.frame
+        if self.size and (frame.shape[1], frame.shape[0]) != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return FramePacket(frame, packet.seq, packet.timestamp, packet.dropped)
+
+    def read(self):
+        packet = self.read_latest()
+        if packet is None:
+            return False, None
+        return True, packet.frame
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker._unsubscribe(self.key)
+
+class CameraBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources = {}
+        self._refcounts = {}
+
+    def subscribe(self, spec, fps=None, size=None):
+        # Returns a Subscription, or None when the source cannot be opened
+        key = parse_source_spec(spec)
+        with self._lock:
+            source = self._sources.get(key)
+            if source is None:
+                source = create_frame_source(spec, grabber=True)
+                if not source.open():
+                    source.release()
+                    return None
+                self._sources[key] = source
+                self._refcounts[key] = 0
+            self._refcounts[key] += 1
+        return Subscription(self, key, source, fps=fps, size=size)
+
+    def _unsubscribe(self, key):
+        source = None
+        with self._lock:
+            if key not in self._refcounts:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] <= 0:
+                # Last subscriber gone: close the device
+                source = self._sources.pop(key)
+                del self._refcounts[key]
+        if source is not None:
+            source.release()
+
+    def subscriber_count(self, spec):
+        with self._lock:
+            return self._refcounts.get(parse_source_spec(spec), 0)
+
+    def close_all(self):
+        with self._lock:
+            sources = list(self._sources.values())
+            self._sources.clear()
+            self._refcounts.clear()
+        for source in sources:
+            source.release()
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = CameraBroker()
+        return _broker
@@ -0,0 +1,192 @@
+# Camera discovery: probes device indices concurrently with a timeout,
+# reports the modes each device accepts and caches the result on disk
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import cv2
+
+CACHE_PATH = os.path.join('config', 'camera_cache.json')
+DEFAULT_INDICES = range(5)
+COMMON_RESOLUTIONS = [(640, 480), (800, 600), (1280, 720), (1920, 1080), (2592, 1944), (3840, 2160)]
+COMMON_FOURCCS = ['MJPG', 'YUYV']
+# Even an unchanged device list is re-probed after a day, so drivers or
+# firmware that changed the supported modes are picked up
+CACHE_TTL = 24 * 3600
+
+def capture_backend():
+    return cv2.CAP_DSHOW if sys.platform.startswith('win') else cv2.CAP_ANY
+
+def decode_fourcc(value):
+    value = int(value)
+    code = ''.join(chr((value >> (8 * i)) & 0xFF) for i in range(4))
+    return code if code.isprintable() and code.strip() else ''
+
+def _current_mode(cap):
+    return {
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': round(cap.get(cv2.CAP_PROP_FPS) or 0.0, 2),
+        'fourcc': decode_fourcc(cap.get(cv2.CAP_PROP_FOURCC)),
+    }
+
+def probe_camera(index, resolutions=COMMON_RESOLUTIONS, fourccs=COMMON_FOURCCS):
+    # Returns a dict describing the device, or None if it cannot be opened.
+    # Modes are found by requesting each format/resolution and keeping the
+    # ones the driver actually accepts.
+    cap = cv2.VideoCapture(index, capture_backend())
+    try:
+        if not cap.isOpened():
+            return None
+        info = {'index': index, 'name': f"Camera {index}", 'default': _current_mode(cap), 'modes': []}
+        seen = set()
+        for fourcc in fourccs:
+            for width, height in resolutions:
+                cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                mode = _current_mode(cap)
+                if (mode['width'], mode['height']) != (width, height):
+                    continue
+                key = (mode['width'], mode['height'], mode['fourcc'])
+                if key not in seen:
+                    seen.add(key)
+                    info['modes'].append(mode)
+        return info
+    finally:
+        cap.release()
+
+def device_present(index):
+    # Open/close without negotiating any mode: much cheaper than probe_camera
+    cap = cv2.VideoCapture(index, capture_backend())
+    try:
+        return cap.isOpened()
+    finally:
+        cap.release()
+
+def device_signature(indices=DEFAULT_INDICES, present=None, busy=(), is_present=device_present):
+    # Fingerprint of the attached devices used as the cache key. Linux
+    # exposes the device nodes; elsewhere it is the list of indices that
+    # open, found by a quick open sweep unless the caller already knows it.
+    # Indices in `busy` are held open by us and count as present.
+    nodes = sorted(glob.glob('/dev/video*'))
+    if nodes:
+        return '|'.join(nodes)
+    if present is None:
+        present = [i for i in indices if i in busy or is_present(i)]
+    return f"{sys.platform}:{','.join(str(i) for i in sorted(present))}"
+
+def load_cache(cache_path=CACHE_PATH):
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+def save_cache(cameras, signature, cache_path=CACHE_PATH):
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump({'signature': signature, 'timestamp': time.time(), 'cameras': cameras}, f, indent=2)
+
+def cached_cameras(indices=DEFAULT_INDICES, cache_path=CACHE_PATH, max_age=CACHE_TTL, verify=True, busy=(), is_present=device_present):
+    # Cached enumeration for the current device list, or None if stale/missing.
+    # verify=False trusts any cache younger than max_age without touching the
+    # devices (the open sweep is too slow for the Tk thread on Windows).
+    cache = load_cache(cache_path)
+    if 'cameras' not in cache or time.time() - cache.get('timestamp', 0) > max_age:
+        return None
+    if verify and cache.get('signature') != device_signature(indices, busy=busy, is_present=is_present):
+        return None
+    return cache['cameras']
+
+def enumerate_cameras(indices=DEFAULT_INDICES, timeout=3.0, use_cache=True, busy=(), cache_path=CACHE_PATH, probe=probe_camera):
+    # Probes all indices concurrently; each probe gets `timeout` seconds.
+    # Indices in `busy` are held open elsewhere (e.g. by the camera broker) and
+    # are reported from the cache instead of being reopened.
+    indices = list(indices)
+    if use_cache:
+        cameras = cached_cameras(indices, cache_path, busy=busy)
+        if cameras is not None:
+            return cameras
+    previous = {c['index']: c for c in load_cache(cache_path).get('cameras', [])}
+    results = {}
+    def run(idx):
+        try:
+            results[idx] = probe(idx)
+        except Exception:
+            results[idx] = None
+    threads = []
+    for idx in indices:
+        if idx in busy:
+            results[idx] = previous.get(idx, {'index': idx, 'name': f"Camera {idx}", 'default': {}, 'modes': []})
+            continue
+        t = threading.Thread(target=run, args=(idx,), daemon=True)
+        t.start()
+        threads.append(t)
+    deadline = time.monotonic() + timeout
+    for t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+    # Probes still running past the deadline are abandoned (daemon threads)
+    complete = all(not t.is_alive() for t in threads)
+    cameras = [results[idx] for idx in indices if results.get(idx)]
+    if complete:
+        save_cache(cameras, device_signature(indices, present=[c['index'] for c in cameras]), cache_path)
+    return cameras
+
+def describe_camera(info):
+    modes = ', '.join(f"{m['width']}x{m['height']}@{m['fps']:g} {m['fourcc']}".strip() for m in info.get('modes', []))
+    return f"{info['name']}: {modes or 'modes unknown'}"
+
+def measure_mode(index, settings, frames=60, warmup=10):
+    # Opens the camera with the given settings and measures what it actually
+    # delivers: negotiated mode, throughput FPS and per-frame read latency
+    from pcb_detect.camera import Camera
+    cam = Camera(index, settings=settings)
+    if not cam.open():
+        return None
+    try:
+        actual = _current_mode(cam.cap)
+        for _ in range(warmup):
+            cam.read()
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(frames):
+            t0 = time.perf_counter()
+            ret, _ = cam.read()
+            if ret:
+                latencies.append((time.perf_counter() - t0) * 1000.0)
+        elapsed = time.perf_counter() - start
+    finally:
+        cam.release()
+    if not latencies:
+        return None
+    latencies.sort()
+    return {
+        'requested': settings,
+        'actual': actual,
+        'measured_fps': round(len(latencies) / elapsed, 2),
+        'latency_ms_mean': round(sum(latencies) / len(latencies), 2),
+        'latency_ms_p95': round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 2),
+    }
+
+def measure_modes(index, modes=None, frames=60, buffer_size=1):
+    # Measures every mode reported by probe_camera (or the given ones),
+    # cheapest (fewest pixels) first
+    if modes is None:
+        info = probe_camera(index)
+        if info is None:
+            return []
+        modes = info['modes'] or [info['default']]
+    report = []
+    for mode in sorted(modes, key=lambda m: m.get('width', 0) * m.get('height', 0)):
+        settings = {k: mode[k] for k in ('width', 'height', 'fps', 'fourcc') if mode.get(k)}
+        if buffer_size:
+            settings['buffer_size'] = buffer_size
+        result = measure_mode(index, settings, frames=frames)
+        if result:
+            report.append(result)
+    return report
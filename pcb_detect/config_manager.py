@@ -9,7 +9,56 @@ class ConfigManager:
         'last_model': '',
         'last_board': '',
         'auto_save_snapshots': True,
-        'batch_processing': False
+        'batch_processing': False,
+        # Memory budget for the shared model cache (least recently used evicted)
+        'model_cache_mb': 1024,
+        # Blank-frame inferences run after loading a model, at the input size
+        'warmup_runs': 2,
+        'input_size': 640,
+        # Inference backend (torch, onnx, openvino); model_backends remembers
+        # the choice per model file name and overrides the default
+        'backend': 'torch',
+        'model_backends': {},
+        # Run the model in a separate worker process (frames passed through
+        # shared memory) so inference does not stall the UI; read at startup
+        'inference_worker': False,
+        # Per-stage latency timers (Stage Latency panel); off by default
+        'profiling': False,
+        # Refresh rate of the video display; frames produced faster than this
+        # are dropped (only the newest is shown)
+        'display_fps': 60,
+        'frame_source': 'Camera 0',
+        'frame_sources': ['dir:snapshots', 'synthetic:1280x720@30'],
+        # Per-camera capture negotiation keyed by camera index, e.g.
+        # {"0": {"width": 1280, "height": 720, "fps": 30, "fourcc": "MJPG", "buffer_size": 1}}
+        'camera_settings': {},
+        # Multi-view inspection: each entry binds a frame source to a board set,
+        # e.g. {"source": "Camera 1", "board": "Junior Board Back THT"}
+        'inspection_views': [],
+        # Real-time change gate (opt-in): inference is skipped while the mean
+        # gray-level difference to the last inferred frame stays below the
+        # threshold, so the last verdict is repeated for a static scene
+        'change_gate': False,
+        'change_threshold': 4.0,
+        # Real-time pacing: 'manual' uses the delay slider, 'adaptive' derives
+        # the delay from measured frame cost, a latency target and a CPU budget
+        # (fraction of wall time the real-time loop may keep busy)
+        'pacing': 'manual',
+        'target_latency_ms': 250,
+        'cpu_budget': 0.5,
+        # Real-time tracking: detect on keyframes only and follow boxes with
+        # optical flow in between; the keyframe interval adapts up to the maximum
+        'tracking': False,
+        'tracking_max_interval': 15,
+        # Auto-trigger: capture once a board has arrived and stayed still for
+        # settle_frames frames; re-arm when the fixture is empty again
+        'auto_trigger': {
+            'settle_frames': 8,
+            'motion_threshold': 3.0,
+            'presence_threshold': 12.0,
+            'empty_frames': 5,
+            'hold_seconds': 1.5
+        }
     }
 
     def __init__(self):
@@ -35,3 +84,11 @@ class ConfigManager:
     def set(self, key, value):
         self.config[key] = value
         self.save()
+
+    def get_camera_settings(self, camera_index):
+        return dict((self.get('camera_settings') or {}).get(str(camera_index), {}))
+
+    def set_camera_settings(self, camera_index, settings):
+        all_settings = dict(self.get('camera_settings') or {})
+        all_settings[str(camera_index)] = settings
+        self.set('camera_settings', all_settings)
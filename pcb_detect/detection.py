@@ -1,22 +1,299 @@
+import threading
 from ultralytics import YOLO
 import torch
+import cv2
+import numpy as np
+from pcb_detect.geometry import box_intersection
+from pcb_detect.model_manager import ModelManager
+
+class DetectionResult:
+    # One frame's detections as contiguous NumPy arrays (row i of xyxy, conf
+    # and cls is one box), converted from the model output once per frame and
+    # passed by reference to every consumer: drawing, counting, tables and
+    # records. ids holds track ids in tracking mode, otherwise None.
+    __slots__ = ('xyxy', 'conf', 'cls', 'ids', 'names', 'speed')
+
+    def __init__(self, xyxy, conf, cls, names=None, ids=None, speed=None):
+        self.xyxy = np.ascontiguousarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.ascontiguousarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.ascontiguousarray(cls, dtype=np.int64).reshape(-1)
+        self.ids = None if ids is None else np.ascontiguousarray(ids, dtype=np.int64).reshape(-1)
+        self.names = names if names is not None else {}
+        # ultralytics preprocess/inference/postprocess timings (ms), if any
+        self.speed = speed or {}
+
+    @classmethod
+    def from_array(cls, data, names=None, speed=None):
+        # N x 6 (x1, y1, x2, y2, conf, cls), or N x 7 with the track id in
+        # column 4 (the ultralytics layout for tracked boxes)
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim == 2 and data.shape[1] == 7:
+            return cls(data[:, :4], data[:, 5], data[:, 6], names, ids=data[:, 4], speed=speed)
+        data = data.reshape(-1, 6)
+        return cls(data[:, :4], data[:, 4], data[:, 5], names, speed=speed)
+
+    @classmethod
+    def from_model(cls, result, names=None):
+        # The single tensor -> NumPy conversion of a model (ultralytics) result
+        boxes = getattr(result, 'boxes', None)
+        names = getattr(result, 'names', None) or names
+        speed = getattr(result, 'speed', None)
+        if boxes is None or len(boxes) == 0:
+            return cls.from_array(np.zeros((0, 6), dtype=np.float32), names, speed)
+        data = boxes.data
+        return cls.from_array(data.cpu().numpy() if hasattr(data, 'cpu') else data, names, speed)
+
+    def __len__(self):
+        return len(self.cls)
+
+    @property
+    def data(self):
+        # N x 6 (x1, y1, x2, y2, conf, cls) copy
+        return np.column_stack((self.xyxy, self.conf, self.cls.astype(np.float32))).reshape(-1, 6)
+
+    def label(self, class_id):
+        names = self.names
+        return names[class_id] if class_id in names else str(class_id)
+
+    def labels(self):
+        return [self.label(c) for c in self.cls.tolist()]
+
+    def counts(self):
+        # {label: number of boxes}
+        ids, n = np.unique(self.cls, return_counts=True)
+        return {self.label(c): int(k) for c, k in zip(ids.tolist(), n.tolist())}
+
+    def select(self, mask):
+        # Subset of the boxes (boolean mask or index array)
+        return DetectionResult(self.xyxy[mask], self.conf[mask], self.cls[mask], self.names,
+                               ids=None if self.ids is None else self.ids[mask], speed=self.speed)
+
+    def shifted(self, dx, dy):
+        # Same boxes moved by (dx, dy), e.g. from an ROI crop to frame coordinates
+        return DetectionResult(self.xyxy + np.array([dx, dy, dx, dy], dtype=np.float32), self.conf, self.cls,
+                               self.names, ids=self.ids, speed=self.speed)
 
 class Detector:
-    def __init__(self):
+    def __init__(self, device=None, backend='torch', imgsz=640):
         self.model = None
         self.model_path = None
+        # Inference device ("cpu", "cuda:0", ...); None lets ultralytics choose
+        self.device = device
+        # torch runs the .pt directly; onnx/openvino run a cached CPU export of
+        # it. ultralytics wraps every backend in the same YOLO/Results API and
+        # the exports embed the class names, so detect() and names are unchanged.
+        self.backend = backend or 'torch'
+        self.imgsz = imgsz
+        # One Detector can be shared (see model_cache), so calls are serialized
+        self._lock = threading.Lock()
+        # Set once the model has been warmed up (see warmup)
+        self.ready = False
+        # name -> class id map and compiled class-id lists, per loaded model
+        self._compiled_classes = {}
 
     def load_model(self, path):
-        self.model = YOLO(path)
+        self.ready = False
+        self._compiled_classes = {}
+        weights = ModelManager.export_model(path, self.backend, imgsz=self.imgsz)
+        self.model = YOLO(weights, task='detect')
+        # model_path stays the .pt so callers can reload/evict by it
         self.model_path = path
 
     def unload_model(self):
+        self.ready = False
+        self._compiled_classes = {}
         self.model = None
         self.model_path = None
         torch.cuda.empty_cache()
 
-    def detect(self, image, conf=0.5):
+    def warmup(self, runs=2, size=640):
+        # The first inferences pay for lazy setup (layer fusing, device
+        # transfer, CUDA context/cuDNN autotuning); run them on blank frames
+        if not self.model:
+            return False
+        dummy = np.zeros((size, size, 3), dtype=np.uint8)
+        for _ in range(max(0, int(runs))):
+            with self._lock:
+                self.model(dummy, imgsz=size, verbose=False, device=self.device)
+        self.ready = True
+        return True
+
+    def class_ids(self, names):
+        # Model class ids for a collection of class names, for the classes=
+        # argument of detect() (see class_ids_for). Cached per model.
+        if not self.model:
+            return None
+        return class_ids_for(self.model.names, names, self._compiled_classes)
+
+    def detect(self, image, conf=0.5, classes=None):
+        # [DetectionResult]; classes: model class ids to keep (filtered inside NMS)
         if not self.model:
             return []
-        results = self.model(image, conf=conf)
-        return results
+        if no_classes(classes):
+            return [self._empty()]
+        with self._lock:
+            results = self.model(image, conf=conf, device=self.device, classes=classes)
+        return [DetectionResult.from_model(r, self.model.names) for r in results]
+
+    def detect_batch(self, frames, conf=0.5, batch_size=8, classes=None):
+        # One result per frame, in input order, using batched forward passes
+        return list(self.iter_detect(frames, conf=conf, batch_size=batch_size, classes=classes))
+
+    def iter_detect(self, frames, conf=0.5, batch_size=8, classes=None):
+        # Streaming variant: consumes any iterable of frames (arrays or image
+        # paths) and yields results in order while holding at most batch_size
+        # frames in memory. Unreadable image paths yield None.
+        if not self.model:
+            return
+        batch_size = max(1, int(batch_size))
+        batch = []
+        for frame in frames:
+            batch.append(frame)
+            if len(batch) == batch_size:
+                yield from self._infer_batch(batch, conf, classes)
+                batch = []
+        if batch:
+            yield from self._infer_batch(batch, conf, classes)
+
+    def detect_tiled(self, image, conf=0.5, tile_size=640, overlap=0.2, full_frame=True, iou=0.5, batch_size=8, classes=None):
+        # Sliced inference for frames much larger than the model input: the
+        # frame is cut into overlapping tile_size tiles that are run batched,
+        # boxes are shifted back to frame coordinates and duplicates across
+        # seams are merged with per-class NMS. A part cut by a seam is seen
+        # truncated by the tiles on either side; those pieces are joined back
+        # into one box (see merge_seam_boxes). full_frame adds one pass on the
+        # whole frame for parts larger than a tile. Returns [DetectionResult] like detect().
+        if not self.model:
+            return []
+        if no_classes(classes):
+            return [self._empty()]
+        h, w = image.shape[:2]
+        tiles = tile_grid(w, h, tile_size, overlap)
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        merged, pieces, piece_tiles = [], [], []
+        for (x1, y1, x2, y2), result in zip(tiles, self.iter_detect(crops, conf=conf, batch_size=batch_size, classes=classes)):
+            if result is None or not len(result):
+                continue
+            data = result.data
+            data[:, [0, 2]] += x1
+            data[:, [1, 3]] += y1
+            cut = _touches_seam(data, (x1, y1, x2, y2), w, h)
+            merged.append(data[~cut])
+            pieces.append(data[cut])
+            piece_tiles.extend([(x1, y1, x2, y2)] * int(cut.sum()))
+        whole = np.concatenate(merged) if merged else np.zeros((0, 6), dtype=np.float32)
+        if pieces:
+            merged.append(merge_seam_boxes(np.concatenate(pieces), np.array(piece_tiles, dtype=np.float32).reshape(-1, 4), whole))
+        if full_frame and len(tiles) > 1:
+            merged.extend(r.data for r in self.iter_detect([image], conf=conf, classes=classes))
+        data = np.concatenate(merged) if merged else np.zeros((0, 6), dtype=np.float32)
+        return [DetectionResult.from_array(nms_per_class(data, iou), self.model.names)]
+
+    def _empty(self):
+        return DetectionResult.from_array(np.zeros((0, 6), dtype=np.float32), self.model.names)
+
+    def _infer_batch(self, batch, conf, classes=None):
+        images = [cv2.imread(f) if isinstance(f, str) else f for f in batch]
+        valid = [i for i, img in enumerate(images) if img is not None]
+        if no_classes(classes):
+            for img in images:
+                yield self._empty() if img is not None else None
+            return
+        # A list input is stacked into a single (N, 3, H, W) forward pass
+        results = []
+        if valid:
+            with self._lock:
+                results = self.model([images[i] for i in valid], conf=conf, verbose=False, device=self.device, classes=classes)
+        by_index = dict(zip(valid, (DetectionResult.from_model(r, self.model.names) for r in results)))
+        for i in range(len(images)):
+            yield by_index.get(i)
+
+def class_ids_for(model_names, names, cache):
+    # Sorted ids of the model classes ({id: name}) named in names. Names the
+    # model does not know are ignored; [] if none match, which detects
+    # nothing (never a fallback to no filtering). cache is a dict the
+    # caller keeps per model.
+    key = frozenset(names)
+    if key not in cache:
+        name_to_id = {name: int(i) for i, name in dict(model_names).items()}
+        cache[key] = sorted(name_to_id[n] for n in key if n in name_to_id)
+    return cache[key]
+
+def no_classes(classes):
+    # An empty class filter: nothing of interest can be detected, so the
+    # model is not run (ultralytics would treat a falsy filter as "all")
+    return classes is not None and len(classes) == 0
+
+def tile_grid(width, height, tile_size=640, overlap=0.2):
+    # (x1, y1, x2, y2) tiles covering the frame; the last tile in each row and
+    # column is aligned to the frame edge instead of running past it
+    tile_size = max(32, int(tile_size))
+    step = max(1, int(tile_size * (1.0 - overlap)))
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        return sorted(set(list(range(0, length - tile_size, step)) + [length - tile_size]))
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in starts(height) for x in starts(width)]
+
+def _touches_seam(data, tile, width, height, margin=2):
+    x1, y1, x2, y2 = tile
+    return (((data[:, 0] <= x1 + margin) & (x1 > 0)) |
+            ((data[:, 1] <= y1 + margin) & (y1 > 0)) |
+            ((data[:, 2] >= x2 - margin) & (x2 < width)) |
+            ((data[:, 3] >= y2 - margin) & (y2 < height)))
+
+def merge_seam_boxes(pieces, tiles, whole, min_cover=0.5, min_iou=0.5):
+    # pieces: boxes touching an inner tile seam (truncated parts), tiles: the
+    # tile (x1, y1, x2, y2) each piece came from; whole: the other tile
+    # boxes. A piece mostly inside a same-class whole box is a part some
+    # tile saw entirely and is dropped. The rest are joined: two same-class
+    # pieces from different tiles are the same part when they match inside
+    # the strip the two tiles share (IoU of the pieces clipped to it), and
+    # are unioned into one box with their highest confidence, so a part
+    # wider than the overlap comes back whole instead of vanishing. Pieces
+    # of one tile are never joined, so touching parts stay separate.
+    if len(pieces) and len(whole):
+        area = np.maximum((pieces[:, 2] - pieces[:, 0]) * (pieces[:, 3] - pieces[:, 1]), 1e-6)
+        same = pieces[:, None, 5] == whole[None, :, 5]
+        cover = np.where(same, box_intersection(pieces, whole), 0).max(axis=1) / area
+        pieces, tiles = pieces[cover < min_cover], tiles[cover < min_cover]
+    if len(pieces) < 2:
+        return pieces
+    # strip[i, j]: overlap of the tiles of pieces i and j
+    lo = np.maximum(tiles[:, None, :2], tiles[None, :, :2])
+    hi = np.minimum(tiles[:, None, 2:], tiles[None, :, 2:])
+    a1, a2 = np.clip(pieces[:, None, :2], lo, hi), np.clip(pieces[:, None, 2:4], lo, hi)
+    b1, b2 = np.clip(pieces[None, :, :2], lo, hi), np.clip(pieces[None, :, 2:4], lo, hi)
+    inter = np.prod(np.clip(np.minimum(a2, b2) - np.maximum(a1, b1), 0, None), axis=2)
+    union = np.prod(a2 - a1, axis=2) + np.prod(b2 - b1, axis=2) - inter
+    iou = inter / np.maximum(union, 1e-9)
+    other_tile = (tiles[:, None, :] != tiles[None, :, :]).any(axis=2)
+    joined = other_tile & (hi > lo).all(axis=2) & (iou >= min_iou) & (pieces[:, None, 5] == pieces[None, :, 5])
+    parent = list(range(len(pieces)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for i, j in zip(*np.nonzero(np.triu(joined, 1))):
+        parent[find(i)] = find(j)
+    groups = {}
+    for i in range(len(pieces)):
+        groups.setdefault(find(i), []).append(i)
+    out = np.empty((len(groups), pieces.shape[1]), dtype=pieces.dtype)
+    for k, members in enumerate(groups.values()):
+        group = pieces[members]
+        out[k] = group[np.argmax(group[:, 4])]
+        out[k, :2] = group[:, :2].min(axis=0)
+        out[k, 2:4] = group[:, 2:4].max(axis=0)
+    return out
+
+def nms_per_class(data, iou=0.5):
+    # Class-aware NMS over an N x 6 array, highest confidence first
+    if len(data) == 0:
+        return data
+    from torchvision.ops import batched_nms
+    t = torch.as_tensor(data)
+    keep = batched_nms(t[:, :4], t[:, 4], t[:, 5].long(), iou)
+    return data[keep.numpy()]
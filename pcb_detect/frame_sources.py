@@ -0,0 +1,175 @@
+# Replay and synthetic frame sources sharing the Camera API
+import glob
+import os
+import cv2
+import numpy as np
+from pcb_detect.camera import Camera, FrameSource
+
+IMAGE_PATTERNS = ('*.png', '*.jpg', '*.jpeg', '*.bmp')
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, grabber=False, buffer_size=2, realtime=True, loop=False):
+        super().__init__(grabber=grabber, buffer_size=buffer_size, realtime=realtime)
+        self.path = path
+        self.loop = loop
+        self.cap = None
+
+    def _open(self):
+        if not os.path.isfile(self.path):
+            return False
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def _read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def _close(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path, fps=5.0, grabber=False, buffer_size=2, realtime=True, loop=True):
+        super().__init__(grabber=grabber, buffer_size=buffer_size, realtime=realtime)
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.files = []
+        self._index = 0
+        self._opened = False
+
+    def _open(self):
+        files = []
+        for pattern in IMAGE_PATTERNS:
+            files.extend(glob.glob(os.path.join(self.path, pattern)))
+        self.files = sorted(files)
+        self._index = 0
+        self._opened = bool(self.files)
+        return self._opened
+
+    def is_opened(self):
+        return self._opened
+
+    def _read(self):
+        while self.files:
+            if self._index >= len(self.files):
+                if not self.loop:
+                    return False, None
+                self._index = 0
+            path = self.files[self._index]
+            self._index += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def _close(self):
+        self._opened = False
+
+class SyntheticSource(FrameSource):
+    # Generates frames without any hardware: a board-like rectangle drifting
+    # over a noisy background plus a frame counter, at a configurable size/fps
+    def __init__(self, width=1280, height=720, fps=30.0, grabber=False, buffer_size=2, realtime=True):
+        super().__init__(grabber=grabber, buffer_size=buffer_size, realtime=realtime)
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = float(fps)
+        self._count = 0
+        self._opened = False
+        self._background = None
+
+    def _open(self):
+        rng = np.random.default_rng(0)
+        self._background = rng.integers(30, 60, (self.height, self.width, 3), dtype=np.uint8)
+        self._count = 0
+        self._opened = True
+        return True
+
+    def is_opened(self):
+        return self._opened
+
+    def _read(self):
+        frame = self._background.copy()
+        w, h = self.width // 3, self.height // 3
+        x = int((self.width - w) * (0.5 + 0.4 * np.sin(self._count / 60.0)))
+        y = (self.height - h) // 2
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (40, 120, 40), -1)
+        cv2.putText(frame, str(self._count), (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        self._count += 1
+        return True, frame
+
+    def _close(self):
+        self._opened = False
+
+def parse_source_spec(spec):
+    # Returns (kind, argument) for a source spec string such as "Camera 1",
+    # "2", "file:shift.mp4", "dir:snapshots" or "synthetic:1280x720@30"
+    if isinstance(spec, int):
+        return 'camera', spec
+    spec = (spec or '').strip()
+    if not spec:
+        return 'camera', 0
+    if spec.startswith('Camera '):
+        try:
+            return 'camera', int(spec.split(' ')[-1])
+        except ValueError:
+            return 'camera', 0
+    if spec.isdigit():
+        return 'camera', int(spec)
+    kind, sep, arg = spec.partition(':')
+    if sep and kind in ('file', 'dir', 'synthetic'):
+        return kind, arg
+    if spec == 'synthetic':
+        return 'synthetic', ''
+    if os.path.isdir(spec):
+        return 'dir', spec
+    return 'file', spec
+
+def synthetic_params(arg):
+    # 'WxH@fps' (either part optional) -> (width, height, fps); a malformed
+    # value raises ValueError naming the expected format
+    width, height, fps = 1280, 720, 30.0
+    size, _, rate = (arg or '').partition('@')
+    try:
+        if size:
+            w, sep, h = size.lower().partition('x')
+            if not sep:
+                raise ValueError(size)
+            width, height = int(w), int(h)
+        if rate:
+            fps = float(rate)
+    except ValueError:
+        raise ValueError(f"Invalid synthetic source 'synthetic:{arg}': expected synthetic:WIDTHxHEIGHT[@FPS], e.g. synthetic:1280x720@30") from None
+    if width <= 0 or height <= 0 or not fps > 0:
+        raise ValueError(f"Invalid synthetic source 'synthetic:{arg}': width, height and fps must be positive")
+    return width, height, fps
+
+def check_source_spec(spec):
+    # Raises ValueError for a spec that can never be opened (bad synthetic size)
+    kind, arg = parse_source_spec(spec)
+    if kind == 'synthetic':
+        synthetic_params(arg)
+
+def create_frame_source(spec, grabber=False, buffer_size=2, realtime=True, camera_settings=None):
+    kind, arg = parse_source_spec(spec)
+    if kind == 'camera':
+        if camera_settings is None:
+            from pcb_detect.config_manager import ConfigManager
+            camera_settings = ConfigManager().get_camera_settings(arg)
+        return Camera(arg, grabber=grabber, buffer_size=buffer_size, settings=camera_settings)
+    if kind == 'dir':
+        return ImageDirectorySource(arg, grabber=grabber, buffer_size=buffer_size, realtime=realtime)
+    if kind == 'synthetic':
+        width, height, fps = synthetic_params(arg)
+        return SyntheticSource(width, height, fps, grabber=grabber, buffer_size=buffer_size, realtime=realtime)
+    return VideoFileSource(arg, grabber=grabber, buffer_size=buffer_size, realtime=realtime)
@@ -0,0 +1,34 @@
+# Box geometry shared by tiled detection, tracking and backend comparison
+import numpy as np
+
+def box_intersection(a, b):
+    # Pairwise intersection areas of two N x 4+ / M x 4+ xyxy arrays
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    return np.prod(np.clip(br - tl, 0, None), axis=2)
+
+def box_iou(a, b):
+    # Pairwise IoU matrix of two Nx4 / Mx4 xyxy arrays
+    inter = box_intersection(a, b)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+def match_boxes(reference, other, iou_threshold=0.5):
+    # Greedy best-first matching of same-class boxes with IoU >= threshold;
+    # returns (reference index, other index) pairs
+    ref_xyxy, ref_cls = reference
+    oth_xyxy, oth_cls = other
+    if len(ref_cls) == 0 or len(oth_cls) == 0:
+        return []
+    iou = box_iou(ref_xyxy, oth_xyxy)
+    iou[ref_cls[:, None] != oth_cls[None, :]] = 0.0
+    pairs = []
+    while True:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[i, j] < iou_threshold:
+            break
+        pairs.append((int(i), int(j)))
+        iou[i, :] = 0.0
+        iou[:, j] = 0.0
+    return pairs
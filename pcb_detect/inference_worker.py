@@ -0,0 +1,380 @@
+# Out-of-process inference: RemoteDetector is a drop-in for Detector whose
+# model lives in a separate worker process, so inference does not compete
+# with the Tk thread for the GIL. Frames are handed over through a ring of
+# shared-memory slots (one memcpy, no pickling of pixel data) and results
+# come back as N x 6 (x1, y1, x2, y2, conf, cls) float32 arrays. A batch of
+# frames is sent as one request and run as one batched forward pass. A worker
+# that dies is restarted and its model reloaded on the next request.
+import itertools
+import multiprocessing
+import queue
+import threading
+from multiprocessing import shared_memory
+import numpy as np
+from pcb_detect.detection import DetectionResult, Detector, class_ids_for
+
+RING_SLOTS = 3
+SLOT_BYTES = 1920 * 1080 * 3
+REQUEST_TIMEOUT = 30.0
+LOAD_TIMEOUT = 300.0
+
+class WorkerError(RuntimeError):
+    # The worker process died, hung or could not be started
+    pass
+
+def _attach(name):
+    # The worker shares the parent's resource tracker (spawn), so the segment
+    # stays registered once and is unlinked by the parent only
+    return shared_memory.SharedMemory(name=name)
+
+def _worker_main(conn, factory, model_path, device, backend, imgsz):
+    # Runs in the worker process. Requests are (id, method, slot, segment
+    # name, shape, kwargs); replies are (id, data, error message). For
+    # 'detect_batch' slot/name/shape are lists (one entry per frame) and data
+    # is a list of arrays, None for a frame without a result.
+    try:
+        detector = factory(device=device, backend=backend, imgsz=imgsz)
+        detector.load_model(model_path)
+        conn.send(('ready', dict(detector.model.names), None))
+    except Exception as e:
+        conn.send(('ready', None, str(e)))
+        return
+    segments = {}  # slot -> attached SharedMemory
+    def view(slot, name, shape):
+        shm = segments.get(slot)
+        if shm is None or shm.name != name:
+            # The parent grew this slot; drop the old segment
+            if shm is not None:
+                shm.close()
+            shm = segments[slot] = _attach(name)
+        return np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        request_id, method, slot, name, shape, kwargs = message
+        try:
+            if method == 'warmup':
+                detector.warmup(**kwargs)
+                data = None
+            elif method == 'detect_batch':
+                frames = [view(*entry) for entry in zip(slot, name, shape)]
+                results = detector.detect_batch(frames, batch_size=len(frames), **kwargs)
+                data = [r.data if r is not None else None for r in results]
+                del results, frames
+            else:
+                frame = view(slot, name, shape)
+                results = getattr(detector, method)(frame, **kwargs)
+                data = results[0].data if results else np.zeros((0, 6), dtype=np.float32)
+                del results, frame
+            conn.send((request_id, data, None))
+        except Exception as e:
+            conn.send((request_id, None, str(e)))
+    for shm in segments.values():
+        shm.close()
+
+class FrameRing:
+    # Shared-memory slots; a slot is held from the moment a frame is written
+    # until its result has arrived. A frame larger than its slot replaces that
+    # slot with a bigger segment. Segments are created on first write, so
+    # reserve() can add slots for a whole batch cheaply.
+    def __init__(self, slots=RING_SLOTS, slot_bytes=SLOT_BYTES):
+        self.slot_bytes = slot_bytes
+        self._segments = []
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+        self.reserve(slots)
+
+    def reserve(self, slots):
+        # Grows the ring to at least slots slots
+        with self._lock:
+            for i in range(len(self._segments), slots):
+                self._segments.append(None)
+                self._free.put(i)
+
+    def acquire(self, timeout=None):
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def acquire_many(self, count, timeout=None):
+        # count slots for one batch, or None (nothing held) on timeout
+        held = []
+        with self._lock:
+            for _ in range(count):
+                slot = self.acquire(timeout)
+                if slot is None:
+                    for index in held:
+                        self.release(index)
+                    return None
+                held.append(slot)
+        return held
+
+    def release(self, index):
+        self._free.put(index)
+
+    def write(self, index, frame):
+        # Copies frame into slot index; returns the segment name
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        shm = self._segments[index]
+        if shm is None or shm.size < frame.nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = shared_memory.SharedMemory(create=True, size=max(self.slot_bytes, frame.nbytes))
+            self._segments[index] = shm
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=shm.buf)[...] = frame
+        return shm.name
+
+    def close(self):
+        for i, shm in enumerate(self._segments):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+                self._segments[i] = None
+
+class _ModelInfo:
+    # Stands in for detector.model: callers only use .names
+    def __init__(self, names):
+        self.names = names
+
+class RemoteDetector:
+    # Same interface as Detector (load/unload/warmup/class_ids/detect/
+    # detect_batch/iter_detect/detect_tiled). Returned DetectionResults are
+    # rebuilt from the worker's arrays.
+    # factory builds the detector inside the worker (must be picklable).
+    def __init__(self, device=None, backend='torch', imgsz=640, slots=RING_SLOTS, factory=Detector):
+        self.factory = factory
+        self.model = None
+        self.model_path = None
+        self.device = device
+        self.backend = backend or 'torch'
+        self.imgsz = imgsz
+        self.ready = False
+        self.restarts = 0
+        self._slots = slots
+        self._ring = None
+        self._process = None
+        self._conn = None
+        self._reader = None
+        self._send_lock = threading.Lock()
+        self._start_lock = threading.RLock()
+        self._pending = {}  # request id -> [Event, data, error, conn]
+        self._ids = itertools.count(1)
+        self._warmup = None
+        self._compiled_classes = {}
+
+    def load_model(self, path):
+        self.unload_model()
+        self.model_path = path
+        self._ring = FrameRing(self._slots)
+        self._start_worker()
+
+    def unload_model(self):
+        self.ready = False
+        self._stop_worker()
+        if self._ring is not None:
+            self._ring.close()
+            self._ring = None
+        self.model = None
+        self.model_path = None
+        self._warmup = None
+        self._compiled_classes = {}
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def _start_worker(self):
+        # spawn: the worker must not inherit the Tk process's threads/locks
+        ctx = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(target=_worker_main, name='pcb-inference',
+                              args=(child_conn, self.factory, self.model_path, self.device, self.backend, self.imgsz),
+                              daemon=True)
+        process.start()
+        child_conn.close()
+        try:
+            if not parent_conn.poll(LOAD_TIMEOUT):
+                raise EOFError
+            _, names, error = parent_conn.recv()
+        except (EOFError, OSError):
+            process.kill()
+            parent_conn.close()
+            raise WorkerError("Inference worker did not start")
+        if error is not None:
+            parent_conn.close()
+            process.join(5)
+            raise WorkerError(error)
+        self._process, self._conn = process, parent_conn
+        if self.model is None:
+            self.model = _ModelInfo(names)
+        self._reader = threading.Thread(target=self._read_replies, args=(parent_conn,), daemon=True)
+        self._reader.start()
+        if self._warmup:
+            self._call('warmup', None, self._warmup)
+
+    def _stop_worker(self):
+        process, conn = self._process, self._conn
+        self._process = self._conn = None
+        if conn is not None:
+            try:
+                conn.send(None)
+            except Exception:
+                pass
+        if process is not None:
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+        if conn is not None:
+            conn.close()
+        self._fail_pending(conn, "Inference worker stopped")
+
+    def _restart(self, conn):
+        # Only the first caller to notice a dead worker restarts it
+        with self._start_lock:
+            if self._conn is not conn or self.model_path is None:
+                return
+            self._stop_worker()
+            self.restarts += 1
+            self._start_worker()
+
+    def _ensure_worker(self):
+        conn = self._conn
+        if conn is None or not self.is_alive():
+            self._restart(conn)
+
+    def _read_replies(self, conn):
+        while True:
+            try:
+                request_id, data, error = conn.recv()
+            except (EOFError, OSError):
+                break
+            waiter = self._pending.pop(request_id, None)
+            if waiter is not None:
+                waiter[1], waiter[2] = data, error
+                waiter[0].set()
+        self._fail_pending(conn, "Inference worker exited")
+
+    def _fail_pending(self, conn, message):
+        # Wakes the requests sent to one (dead) worker connection
+        for request_id, waiter in list(self._pending.items()):
+            if waiter[3] is conn and self._pending.pop(request_id, None) is not None:
+                waiter[2] = WorkerError(message)
+                waiter[0].set()
+
+    def _submit(self, method, frame, kwargs):
+        # Writes frame (or, for detect_batch, each frame of a list) into free
+        # slots and sends the request; returns (waiter, slot, conn) for _wait
+        conn = self._conn
+        slot = name = shape = None
+        if method == 'detect_batch':
+            slot = self._ring.acquire_many(len(frame), timeout=REQUEST_TIMEOUT)
+            if slot is None:
+                raise WorkerError("No free frame slot")
+            name = [self._ring.write(s, f) for s, f in zip(slot, frame)]
+            shape = [f.shape for f in frame]
+        elif frame is not None:
+            slot = self._ring.acquire(timeout=REQUEST_TIMEOUT)
+            if slot is None:
+                raise WorkerError("No free frame slot")
+            name, shape = self._ring.write(slot, frame), frame.shape
+        request_id = next(self._ids)
+        waiter = [threading.Event(), None, None, conn]
+        self._pending[request_id] = waiter
+        try:
+            with self._send_lock:
+                conn.send((request_id, method, slot, name, shape, kwargs))
+        except Exception as e:
+            self._pending.pop(request_id, None)
+            waiter[2] = WorkerError(str(e))
+            waiter[0].set()
+        return waiter, slot, conn
+
+    def _wait(self, waiter, slot, conn):
+        finished = waiter[0].wait(REQUEST_TIMEOUT)
+        for index in (slot if isinstance(slot, list) else [] if slot is None else [slot]):
+            self._ring.release(index)
+        if not finished:
+            waiter[2] = WorkerError("Inference worker timed out")
+        if isinstance(waiter[2], WorkerError):
+            # Worker crashed or hung: replace it so the next request succeeds
+            self._restart(conn)
+            raise waiter[2]
+        if waiter[2] is not None:
+            # The model itself raised; the worker is fine
+            raise RuntimeError(waiter[2])
+        return waiter[1]
+
+    def _call(self, method, frame, kwargs):
+        return self._wait(*self._submit(method, frame, kwargs))
+
+    def _call_retry(self, method, image, kwargs):
+        self._ensure_worker()
+        try:
+            return self._call(method, image, kwargs)
+        except WorkerError:
+            # Retry once on the restarted worker
+            self._ensure_worker()
+            return self._call(method, image, kwargs)
+
+    def _run(self, method, image, **kwargs):
+        if not self.model:
+            return []
+        return [DetectionResult.from_array(self._call_retry(method, image, kwargs), self.model.names)]
+
+    def warmup(self, runs=2, size=640):
+        if not self.model:
+            return False
+        self._warmup = {'runs': runs, 'size': size}
+        self._call('warmup', None, self._warmup)
+        self.ready = True
+        return True
+
+    def class_ids(self, names):
+        if not self.model:
+            return None
+        return class_ids_for(self.model.names, names, self._compiled_classes)
+
+    def detect(self, image, conf=0.5, classes=None):
+        return self._run('detect', image, conf=conf, classes=classes)
+
+    def detect_tiled(self, image, conf=0.5, tile_size=640, overlap=0.2, full_frame=True, iou=0.5, batch_size=8, classes=None):
+        return self._run('detect_tiled', image, conf=conf, tile_size=tile_size, overlap=overlap,
+                         full_frame=full_frame, iou=iou, batch_size=batch_size, classes=classes)
+
+    def detect_batch(self, frames, conf=0.5, batch_size=8, classes=None):
+        return list(self.iter_detect(frames, conf=conf, batch_size=batch_size, classes=classes))
+
+    def iter_detect(self, frames, conf=0.5, batch_size=8, classes=None):
+        # Up to batch_size frames go to the worker as one 'detect_batch'
+        # request and are run as one batched forward pass there (the ring
+        # grows to hold a whole batch). Unreadable image paths yield None.
+        if not self.model:
+            return
+        batch_size = max(1, int(batch_size))
+        self._ring.reserve(batch_size)
+        batch = []
+        for frame in frames:
+            batch.append(frame)
+            if len(batch) == batch_size:
+                yield from self._run_batch(batch, conf, classes)
+                batch = []
+        if batch:
+            yield from self._run_batch(batch, conf, classes)
+
+    def _run_batch(self, batch, conf, classes):
+        import cv2
+        images = [cv2.imread(f) if isinstance(f, str) else f for f in batch]
+        valid = [i for i, img in enumerate(images) if img is not None]
+        data = []
+        if valid:
+            data = self._call_retry('detect_batch', [images[i] for i in valid], {'conf': conf, 'classes': classes})
+        by_index = dict(zip(valid, data))
+        for i in range(len(images)):
+            d = by_index.get(i)
+            yield DetectionResult.from_array(d, self.model.names) if d is not None else None
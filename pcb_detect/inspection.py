@@ -0,0 +1,302 @@
+# Board-set inspection logic shared by single capture and multi-view capture:
+# counting detections, PASS/FAIL evaluation and snapshot/record saving
+import datetime
+import json
+import random
+import cv2
+import numpy as np
+
+SNAPSHOT_DIR = 'snapshots'
+
+DEFAULT_TILING = {'enabled': False, 'tile_size': 640, 'overlap': 0.2, 'full_frame': True}
+
+def board_options(board_manager, board_name):
+    # Per-board inference options stored by BoardManager (empty if none)
+    if board_manager is None or not board_name or not hasattr(board_manager, 'get_options'):
+        return {}
+    return board_manager.get_options(board_name)
+
+def detection_options(detector, board_manager, board_name):
+    # Board options plus the board's components compiled to model class ids
+    # ('classes'), so the model only reports parts of this set. Recompute when
+    # the board or the model changes; the id lists are cached per model.
+    options = board_options(board_manager, board_name)
+    expected = getattr(board_manager, 'sets', {}).get(board_name) if board_name else None
+    if expected and hasattr(detector, 'class_ids'):
+        options['classes'] = detector.class_ids(expected.keys())
+    return options
+
+def tiling_options(options):
+    tiling = dict(DEFAULT_TILING)
+    tiling.update((options or {}).get('tiling') or {})
+    return tiling
+
+def roi_pixels(roi, shape, min_size=8):
+    # Normalized [x1, y1, x2, y2] ROI -> clipped pixel box, or None if unset/degenerate
+    if not roi or len(roi) != 4:
+        return None
+    h, w = shape[:2]
+    x1, x2 = sorted(min(max(float(v), 0.0), 1.0) * w for v in (roi[0], roi[2]))
+    y1, y2 = sorted(min(max(float(v), 0.0), 1.0) * h for v in (roi[1], roi[3]))
+    x1, y1, x2, y2 = int(x1), int(y1), int(round(x2)), int(round(y2))
+    if x2 - x1 < min_size or y2 - y1 < min_size:
+        return None
+    return x1, y1, x2, y2
+
+def normalize_roi(x1, y1, x2, y2, width, height):
+    # Pixel rectangle (any corner order) -> normalized [x1, y1, x2, y2]
+    xs = sorted(min(max(v / float(width), 0.0), 1.0) for v in (x1, x2))
+    ys = sorted(min(max(v / float(height), 0.0), 1.0) for v in (y1, y2))
+    return [round(xs[0], 4), round(ys[0], 4), round(xs[1], 4), round(ys[1], 4)]
+
+def draw_roi(frame, roi, color=(0, 255, 255)):
+    box = roi_pixels(roi, frame.shape)
+    if box:
+        cv2.rectangle(frame, box[:2], box[2:], color, 1)
+    return frame
+
+def needs_single_frame(options):
+    # Options that rule out plain batched inference for a frame
+    return bool(tiling_options(options)['enabled'] or (options or {}).get('roi'))
+
+def run_detection(detector, frame, conf=0.5, options=None):
+    # Single entry point for inference on one frame with a board's options,
+    # used by capture, real-time, setup and multi-view detection. With an ROI
+    # only the fixture area is inferred and the boxes are mapped back to
+    # full-frame coordinates.
+    options = options or {}
+    roi = roi_pixels(options.get('roi'), frame.shape)
+    image = frame[roi[1]:roi[3], roi[0]:roi[2]] if roi else frame
+    tiling = tiling_options(options)
+    classes = options.get('classes')
+    if tiling['enabled']:
+        results = detector.detect_tiled(image, conf=conf, tile_size=tiling['tile_size'], overlap=tiling['overlap'],
+                                        full_frame=tiling['full_frame'], classes=classes)
+    else:
+        results = detector.detect(image, conf=conf, classes=classes)
+    if roi and results:
+        results = [results[0].shifted(roi[0], roi[1])]
+    return results
+
+def class_names_of(detector):
+    if detector is not None and getattr(detector, 'model', None) is not None:
+        return getattr(detector.model, 'names', None)
+    return None
+
+class BoardEvaluation:
+    # One frame evaluated against a CompiledBoardSet. found[k] is the count of
+    # board.components[k]; counts is indexed by class id (all classes);
+    # result holds only the boxes of the set's components.
+    __slots__ = ('board', 'pass_fail', 'missing', 'extra', 'found', 'counts', 'result')
+
+    def __init__(self, board, pass_fail, missing, extra, found, counts, result):
+        self.board = board
+        self.pass_fail = pass_fail
+        self.missing = missing
+        self.extra = extra
+        self.found = found
+        self.counts = counts
+        self.result = result
+
+    @property
+    def detected(self):
+        # {component: count} of the set's components present in the frame
+        return {c: n for c, n in zip(self.board.components, self.found.tolist()) if n}
+
+    def summary(self):
+        # Per-component counts for a board set, every detected class otherwise
+        if self.board.components:
+            return dict(zip(self.board.components, self.found.tolist()))
+        return {self.board.labels[i]: int(self.counts[i]) for i in np.flatnonzero(self.counts[:self.board.size])}
+
+class CompiledBoardSet:
+    # A board set compiled against the model's class names when the board is
+    # selected or edited (or the model changes): expected counts, the
+    # allowed-class mask and box colors become class-id-indexed tables, so a
+    # frame is evaluated with one bincount and a compare however many parts
+    # the board has. Components the model does not know point at an extra,
+    # always-empty slot after the last class and are always missing.
+    def __init__(self, expected, class_names, colors=None):
+        # colors: optional {component: BGR} overrides of the per-class colors
+        self.expected_set = expected
+        self.class_names = class_names
+        names = dict(class_names or {})
+        self.size = max((int(i) for i in names), default=-1) + 1
+        self.labels = [names[i] if i in names else str(i) for i in range(self.size)]
+        ids = {label: i for i, label in enumerate(self.labels)}
+        self.components = list((expected or {}).keys())
+        self.quantities = np.array([int(q) for q in (expected or {}).values()], dtype=np.int64)
+        self.component_ids = np.array([ids.get(c, self.size) for c in self.components], dtype=np.int64)
+        known = self.component_ids[self.component_ids < self.size]
+        self.allowed = np.zeros(self.size + 1, dtype=bool)
+        self.allowed[known] = True
+        # Stable per-class colors, seeded by class id
+        self.colors = [(0,255,0)] * (self.size + 1)
+        for i in known.tolist():
+            color = (colors or {}).get(self.labels[i])
+            if color is None:
+                random.seed(i)
+                color = tuple([random.randint(0,255) for _ in range(3)])
+            self.colors[i] = tuple(int(v) for v in color)
+
+    def evaluate(self, result):
+        # PASS when every component is present in at least its quantity;
+        # missing/extra list the components found fewer/more times than expected
+        cls = result.cls if result is not None else np.zeros(0, dtype=np.int64)
+        # Class ids the compiled names do not cover fall into the spare slot
+        index = np.where((cls >= 0) & (cls < self.size), cls, self.size)
+        counts = np.bincount(index, minlength=self.size + 1)
+        counts[self.size] = 0
+        found = counts[self.component_ids]
+        short = np.flatnonzero(found < self.quantities).tolist()
+        over = np.flatnonzero(found > self.quantities).tolist()
+        quantities, found_list = self.quantities.tolist(), found.tolist()
+        missing = [f"{self.components[k]} (expected {quantities[k]}, found {found_list[k]})" for k in short]
+        extra = [f"{self.components[k]} (expected {quantities[k]}, found {found_list[k]})" for k in over]
+        kept = result.select(self.allowed[index]) if result is not None else None
+        return BoardEvaluation(self, "FAIL" if short else "PASS", missing, extra, found, counts, kept)
+
+    def draw(self, frame, result):
+        # Draws boxes (normally BoardEvaluation.result) in the board's colors;
+        # tracked boxes are labelled with their id
+        if result is None:
+            return frame
+        ids = result.ids.tolist() if result.ids is not None else [None] * len(result)
+        for (x1, y1, x2, y2), class_id, track_id in zip(result.xyxy.astype(int).tolist(), result.cls.tolist(), ids):
+            if class_id >= self.size:
+                continue
+            color = self.colors[class_id]
+            label = self.labels[class_id] if track_id is None else f"{self.labels[class_id]} #{track_id}"
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        return frame
+
+def build_record(timestamp, board_name, board_number, batch_name, pass_fail, missing, detected, expected):
+    return {
+        'timestamp': timestamp,
+        'board': board_name,
+        'board_number': board_number,
+        'batch': batch_name,
+        'result': pass_fail,
+        'missing': missing,
+        'detected': detected,
+        'expected': expected
+    }
+
+def snapshot_path(board_name, board_number, batch_name, pass_fail, ts_file=None, snapshot_dir=SNAPSHOT_DIR):
+    if ts_file is None:
+        ts_file = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f"{snapshot_dir}/{board_name}_board{board_number}_batch{batch_name or 'NA'}_{ts_file}_{pass_fail}.png"
+
+def save_record(record, image_path):
+    # Writes the JSON record next to its snapshot image; returns the JSON path
+    results_fname = image_path.replace('.png', '.json')
+    with open(results_fname, 'w') as f:
+        json.dump(record, f, indent=2)
+    return results_fname
+
+def inspect_frame(frame, results, class_names, expected, board=None):
+    # Full single-view evaluation: draws onto frame, returns
+    # (pass_fail, missing, detected_components, filtered DetectionResult or None).
+    # board: the CompiledBoardSet of expected, if the caller keeps one
+    if board is None:
+        board = CompiledBoardSet(expected, class_names)
+    evaluation = board.evaluate(results[0] if results else None)
+    board.draw(frame, evaluation.result)
+    return evaluation.pass_fail, evaluation.missing, evaluation.detected, evaluation.result
+
+def mosaic(frames, height=480):
+    # Side-by-side preview of several views scaled to a common height
+    scaled = []
+    for frame in frames:
+        h, w = frame.shape[:2]
+        scaled.append(cv2.resize(frame, (max(1, int(w * height / h)), height)))
+    return np.hstack(scaled) if scaled else None
+
+class MultiViewInspector:
+    # Binds each frame source to a board set (e.g. front camera -> "Senior
+    # Board Front SMD", back camera -> "Junior Board Back THT") and inspects
+    # all views of one physical board with a single batched inference call.
+    def __init__(self, views, board_manager, broker=None):
+        from pcb_detect.camera_broker import get_broker
+        self.views = [dict(v) for v in views]
+        self.board_manager = board_manager
+        self.broker = broker or get_broker()
+        self.subscriptions = []
+
+    def open(self):
+        # Returns the sources that could not be opened
+        failed = []
+        self.close()
+        for view in self.views:
+            sub = self.broker.subscribe(view['source'])
+            if sub is None:
+                failed.append(view['source'])
+            self.subscriptions.append(sub)
+        return failed
+
+    def close(self):
+        for sub in self.subscriptions:
+            if sub is not None:
+                sub.close()
+        self.subscriptions = []
+
+    def capture(self, timeout=1.0):
+        # Newest frame from every view, or None for views without a frame
+        frames = []
+        for sub in self.subscriptions:
+            packet = sub.read_latest(timeout=timeout) if sub is not None else None
+            if packet is None and sub is not None:
+                packet = sub.source.read_latest(0)
+            frames.append(packet.frame.copy() if packet is not None else None)
+        return frames
+
+    def inspect(self, detector, frames, conf=0.5):
+        # Returns (combined_pass_fail, view_reports); each report holds the
+        # annotated frame plus the per-view evaluation
+        options = [detection_options(detector, self.board_manager, view['board']) for view in self.views]
+        # Plain views share one batched call; views with special options
+        # (tiling, ROI) are run on their own
+        valid = [i for i, f in enumerate(frames) if f is not None]
+        plain = [i for i in valid if not needs_single_frame(options[i])]
+        # The batch keeps the classes of all its views' boards (or all classes
+        # if any of them is unfiltered); each view is then counted per board
+        class_lists = [options[i].get('classes') for i in plain]
+        classes = sorted(set().union(*class_lists)) if class_lists and all(c is not None for c in class_lists) else None
+        batch_results = detector.detect_batch([frames[i] for i in plain], conf=conf, classes=classes) if plain else []
+        per_view = dict(zip(plain, batch_results))
+        for i in valid:
+            if i not in per_view:
+                results = run_detection(detector, frames[i], conf=conf, options=options[i])
+                per_view[i] = results[0] if results else None
+        class_names = class_names_of(detector)
+        boards = {}
+        reports = []
+        for i, view in enumerate(self.views):
+            board_name = view['board']
+            expected = self.board_manager.sets.get(board_name)
+            frame = frames[i]
+            if frame is None:
+                reports.append({'view': view, 'board': board_name, 'frame': None, 'result': 'FAIL',
+                                'missing': [f"no frame from {view['source']}"], 'detected': {}, 'expected': expected})
+                continue
+            result = per_view.get(i)
+            if board_name not in boards:
+                boards[board_name] = CompiledBoardSet(expected, class_names)
+            pass_fail, missing, detected, _ = inspect_frame(frame, [result] if result is not None else [], class_names,
+                                                            expected, board=boards[board_name])
+            reports.append({'view': view, 'board': board_name, 'frame': frame, 'result': pass_fail,
+                            'missing': missing, 'detected': detected, 'expected': expected})
+        combined = "PASS" if reports and all(r['result'] == "PASS" for r in reports) else "FAIL"
+        return combined, reports
+
+    def combined_record(self, timestamp, board_number, batch_name, combined, reports):
+        # One record per physical board; per-view details are kept under 'views'
+        station = ' + '.join(r['board'] for r in reports)
+        missing = [f"[{r['board']}] {m}" for r in reports for m in r['missing']]
+        record = build_record(timestamp, station, board_number, batch_name, combined, missing,
+                              {r['board']: r['detected'] for r in reports},
+                              {r['board']: r['expected'] for r in reports})
+        record['views'] = [{'source': r['view']['source'], 'board': r['board'], 'result': r['result'],
+                            'missing': r['missing'], 'snapshot': r.get('snapshot')} for r in reports]
+        return record
@@ -0,0 +1,199 @@
+# Process-wide cache of loaded detectors so every part of the UI shares one
+# copy of each model instead of reloading the weights from disk
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pcb_detect.detection import Detector
+
+DEFAULT_BUDGET_MB = 1024
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def model_size_mb(detector):
+    # Parameter/buffer memory of the loaded network; falls back to the file size
+    module = getattr(getattr(detector, 'model', None), 'model', None)
+    try:
+        total = sum(t.numel() * t.element_size() for t in list(module.parameters()) + list(module.buffers()))
+        if total:
+            return total / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        return os.path.getsize(detector.model_path) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+class ModelCache:
+    # LRU cache keyed by (absolute path, mtime, size, content hash, device, backend).
+    # A changed file on disk gets a new key, so stale weights are never served.
+    # Entries are evicted least-recently-used first once the budget is exceeded;
+    # the entry just requested is never evicted even if it alone is too big.
+    # Every get() is a lease that the holder hands back with release(); an
+    # evicted detector that is still leased leaves the cache at once but is
+    # only unloaded when its last holder releases it.
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, factory=Detector, warmup_runs=0, input_size=640):
+        self.budget_mb = budget_mb
+        self.factory = factory
+        # New entries are warmed up before they are handed out
+        self.warmup_runs = warmup_runs
+        self.input_size = input_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (detector, size_mb)
+        self._digests = {}  # (path, mtime, size) -> sha1
+        self._leases = {}  # id(detector) -> [detector, holders, evicted]
+        self._loading = {}  # key -> Event set when its in-flight load ends
+        self._lock = threading.RLock()
+
+    def model_key(self, path, device=None, backend='torch'):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (path, st.st_mtime_ns, st.st_size)
+        digest = self._digests.get(stamp)
+        if digest is None:
+            # Hashed outside the lock; two threads may both hash a new file
+            digest = file_digest(path)
+            with self._lock:
+                self._digests[stamp] = digest
+        return (path, st.st_mtime_ns, st.st_size, digest, device or '', backend or 'torch')
+
+    def get(self, path, device=None, backend='torch'):
+        # Returns a loaded Detector for path, loading it on a miss. The lock
+        # only guards lookup and insert: a load runs outside it, and other
+        # callers asking for the same key wait for that load instead of
+        # starting their own.
+        key = self.model_key(path, device, backend)
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._lease(self._entries[key][0])
+                loading = self._loading.get(key)
+                if loading is None:
+                    self.misses += 1
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # If that load fails, the next pass retries it (and reports its error)
+            loading.wait()
+        try:
+            options = {'device': device} if device else {}
+            if backend and backend != 'torch':
+                options.update(backend=backend, imgsz=self.input_size)
+            detector = self.factory(**options)
+            detector.load_model(path)
+            detector.warmup(self.warmup_runs, self.input_size)
+            size = model_size_mb(detector)
+            with self._lock:
+                # Drop older versions of the same file on the same device/backend
+                for old in [k for k in self._entries if k[0] == key[0] and k[4:] == key[4:]]:
+                    self._evict(old)
+                self._entries[key] = (detector, size)
+                self._enforce_budget()
+                return self._lease(detector)
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+
+    def release(self, detector):
+        # Hands back a detector obtained from get(); unknown detectors are ignored
+        with self._lock:
+            lease = self._leases.get(id(detector))
+            if lease is None or lease[0] is not detector:
+                return
+            lease[1] -= 1
+            if lease[1] > 0:
+                return
+            del self._leases[id(detector)]
+            if lease[2]:
+                detector.unload_model()
+
+    def holders(self, detector):
+        with self._lock:
+            lease = self._leases.get(id(detector))
+            return lease[1] if lease is not None and lease[0] is detector else 0
+
+    def _lease(self, detector):
+        lease = self._leases.setdefault(id(detector), [detector, 0, False])
+        lease[1] += 1
+        return detector
+
+    def load_async(self, path, callback, device=None, backend='torch'):
+        # Loads (and warms up) on a daemon thread, then calls
+        # callback(detector, error) from that thread; UI callers marshal
+        # back to the Tk thread themselves. The callback owns the lease.
+        def worker():
+            try:
+                detector = self.get(path, device, backend)
+            except Exception as e:
+                callback(None, e)
+                return
+            callback(detector, None)
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+    def _enforce_budget(self):
+        while len(self._entries) > 1 and self.used_mb() > self.budget_mb:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        detector, _ = self._entries.pop(key)
+        lease = self._leases.get(id(detector))
+        if lease is not None and lease[0] is detector:
+            lease[2] = True  # unloaded by the last release()
+        else:
+            detector.unload_model()
+
+    def evict(self, path, device=None):
+        # Drops every cached version of path (on one device, or all devices);
+        # versions that are still leased are unloaded on their last release
+        path = os.path.abspath(path)
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == path and (device is None or k[4] == (device or ''))]
+            for key in keys:
+                self._evict(key)
+            return len(keys)
+
+    def set_budget(self, budget_mb):
+        with self._lock:
+            self.budget_mb = budget_mb
+            self._enforce_budget()
+
+    def used_mb(self):
+        return sum(size for _, size in self._entries.values())
+
+    def cached_paths(self):
+        with self._lock:
+            return [k[0] for k in self._entries]
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._evict(key)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_model_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            from pcb_detect.config_manager import ConfigManager
+            config = ConfigManager()
+            factory = Detector
+            if config.get('inference_worker'):
+                from pcb_detect.inference_worker import RemoteDetector
+                factory = RemoteDetector
+            _cache = ModelCache(budget_mb=config.get('model_cache_mb') or DEFAULT_BUDGET_MB,
+                                factory=factory,
+                                warmup_runs=config.get('warmup_runs'),
+                                input_size=config.get('input_size'))
+        return _cache
@@ -1,15 +1,35 @@
 # Handles model upload/load/delete logic
+import json
 import os
 import shutil
 
 class ModelManager:
     MODELS_DIR = 'models'
+    # Inference backends; anything but torch runs an export of the .pt that is
+    # cached next to it in MODELS_DIR
+    BACKENDS = ['torch', 'onnx', 'openvino']
+    EXPORT_SUFFIXES = {'onnx': '.onnx', 'openvino': '_openvino_model'}
+    # Quantized variants (see quantization.py) are listed next to the .pt
+    # models; each has a <name>.json report with its speedup and recall delta
+    INT8_SUFFIX = '_int8.onnx'
 
     @staticmethod
     def list_models():
         if not os.path.exists(ModelManager.MODELS_DIR):
             os.makedirs(ModelManager.MODELS_DIR)
-        return [f for f in os.listdir(ModelManager.MODELS_DIR) if f.endswith('.pt')]
+        return sorted(f for f in os.listdir(ModelManager.MODELS_DIR) if f.endswith('.pt') or f.endswith(ModelManager.INT8_SUFFIX))
+
+    @staticmethod
+    def model_report(model_name):
+        # Quantization report of an INT8 model, or None
+        path = os.path.splitext(os.path.join(ModelManager.MODELS_DIR, model_name))[0] + '.json'
+        if model_name.endswith(ModelManager.INT8_SUFFIX) and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except Exception:
+                pass
+        return None
 
     @staticmethod
     def upload_model(src_path):
@@ -22,6 +42,43 @@ class ModelManager:
     def delete_model(model_name):
         path = os.path.join(ModelManager.MODELS_DIR, model_name)
         if os.path.exists(path):
+            if path.endswith('.pt'):
+                for backend in ModelManager.EXPORT_SUFFIXES:
+                    ModelManager.delete_export(path, backend)
+            elif path.endswith(ModelManager.INT8_SUFFIX):
+                report = os.path.splitext(path)[0] + '.json'
+                if os.path.exists(report):
+                    os.remove(report)
             os.remove(path)
             return True
         return False
+
+    @staticmethod
+    def export_path(pt_path, backend):
+        # Where ultralytics writes the export of pt_path (next to the weights)
+        return os.path.splitext(pt_path)[0] + ModelManager.EXPORT_SUFFIXES[backend]
+
+    @staticmethod
+    def export_model(pt_path, backend, imgsz=640):
+        # Exports once and reuses the result until the .pt is replaced;
+        # models that are already exported (e.g. INT8 .onnx) run as they are
+        if backend == 'torch' or not pt_path.endswith('.pt'):
+            return pt_path
+        if backend not in ModelManager.EXPORT_SUFFIXES:
+            raise ValueError(f"Unknown backend '{backend}'")
+        target = ModelManager.export_path(pt_path, backend)
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(pt_path):
+            return target
+        ModelManager.delete_export(pt_path, backend)
+        from ultralytics import YOLO
+        # Dynamic input shapes so batched inference works on the export too
+        exported = YOLO(pt_path).export(format=backend, imgsz=imgsz, dynamic=True, verbose=False)
+        return str(exported)
+
+    @staticmethod
+    def delete_export(pt_path, backend):
+        target = ModelManager.export_path(pt_path, backend)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target):
+            os.remove(target)
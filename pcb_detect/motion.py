@@ -0,0 +1,106 @@
+# Cheap scene-change measures on downscaled frames, used to skip inference
+# when nothing in front of the camera has changed
+import cv2
+import numpy as np
+
+THUMB_SIZE = (64, 48)
+
+def thumbnail(frame, size=THUMB_SIZE):
+    # Small blurred grayscale copy; INTER_AREA averages away sensor noise
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return cv2.GaussianBlur(small, (3, 3), 0).astype(np.float32)
+
+def frame_difference(a, b):
+    # Mean absolute difference of two thumbnails, in gray levels (0-255)
+    return float(np.mean(np.abs(a - b)))
+
+class ChangeDetector:
+    # Compares each frame with the last frame that was actually inferred.
+    # Because the reference only moves on inference, slow drift still adds up
+    # and eventually triggers a new inference.
+    def __init__(self, threshold=4.0, size=THUMB_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self.reference = None
+        self.last_difference = 0.0
+
+    def has_changed(self, frame):
+        if self.reference is None:
+            return True
+        thumb = thumbnail(frame, self.size)
+        if thumb.shape != self.reference.shape:
+            return True
+        self.last_difference = frame_difference(thumb, self.reference)
+        return self.last_difference > self.threshold
+
+    def mark_inferred(self, frame):
+        self.reference = thumbnail(frame, self.size)
+
+    def reset(self):
+        self.reference = None
+
+class SettleTrigger:
+    # Fires once per board: the fixture goes from empty to occupied, the board
+    # then stays still for settle_frames frames, and the trigger re-arms only
+    # after the fixture has been seen empty again for empty_frames frames.
+    # The first frame seen (or set_background) is taken as the empty fixture.
+    EMPTY, ARRIVING, FIRED = 'empty', 'arriving', 'fired'
+
+    def __init__(self, settle_frames=8, motion_threshold=3.0, presence_threshold=12.0, empty_frames=5, size=THUMB_SIZE):
+        self.settle_frames = settle_frames
+        self.motion_threshold = motion_threshold
+        self.presence_threshold = presence_threshold
+        self.empty_frames = empty_frames
+        self.size = size
+        self.background = None
+        self.state = self.EMPTY
+        self._previous = None
+        self._still = 0
+        self._empty = 0
+
+    def set_background(self, frame):
+        self.background = thumbnail(frame, self.size)
+        self.state = self.EMPTY
+        self._previous = None
+
+    def rearm(self):
+        # After a capture that did not happen: fire again for the board
+        # still in the fixture once it has been still for settle_frames
+        if self.state == self.FIRED:
+            self._still = 0
+            self.state = self.ARRIVING
+
+    def update(self, frame):
+        # Returns True exactly once when a newly arrived board has settled
+        thumb = thumbnail(frame, self.size)
+        if self.background is None or thumb.shape != self.background.shape:
+            self.background = thumb
+            self._previous = thumb
+            return False
+        present = frame_difference(thumb, self.background) > self.presence_threshold
+        still = self._previous is not None and frame_difference(thumb, self._previous) < self.motion_threshold
+        self._previous = thumb
+        if self.state == self.EMPTY:
+            if present:
+                self.state = self.ARRIVING
+                self._still = 0
+            elif still:
+                # Follow slow lighting changes of the empty fixture
+                self.background = 0.95 * self.background + 0.05 * thumb
+        elif self.state == self.ARRIVING:
+            if not present:
+                self.state = self.EMPTY
+            elif still:
+                self._still += 1
+                if self._still >= self.settle_frames:
+                    self.state = self.FIRED
+                    self._empty = 0
+                    return True
+            else:
+                self._still = 0
+        elif self.state == self.FIRED:
+            self._empty = self._empty + 1 if not present else 0
+            if self._empty >= self.empty_frames:
+                self.state = self.EMPTY
+        return False
@@ -0,0 +1,117 @@
+# Per-stage latency timers for capture and real-time detection. Each stage
+# keeps a rolling window of durations summarized as p50/p95/p99. When the
+# profiler is disabled, stage() returns a shared no-op context manager so
+# instrumented code pays only an attribute check.
+import csv
+import json
+import threading
+import time
+from collections import deque
+import numpy as np
+
+WINDOW = 500
+
+class _NoOp:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoOp()
+
+class _Stage:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, (time.perf_counter() - self.start) * 1000.0)
+        return False
+
+class Profiler:
+    def __init__(self, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self._samples = {}  # stage -> deque of durations in ms
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        # with profiler.stage('realtime.inference'): ...
+        if not self.enabled:
+            return _NOOP
+        return _Stage(self, name)
+
+    def record(self, name, ms):
+        if not self.enabled:
+            return
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(ms)
+
+    def record_speed(self, prefix, results):
+        # ultralytics reports its own preprocess/inference/postprocess split
+        # per result (ms); recorded as <prefix>.preprocess etc.
+        if not self.enabled or not results:
+            return
+        speed = getattr(results[0], 'speed', None) or {}
+        for key, ms in speed.items():
+            if ms is not None:
+                self.record(f"{prefix}.{key}", float(ms))
+
+    def summary(self):
+        # {stage: {count, mean, p50, p95, p99, max}} over the rolling window
+        with self._lock:
+            stages = {name: list(samples) for name, samples in self._samples.items()}
+        report = {}
+        for name in sorted(stages):
+            values = np.asarray(stages[name])
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            report[name] = {'count': int(len(values)), 'mean': round(float(values.mean()), 3),
+                            'p50': round(float(p50), 3), 'p95': round(float(p95), 3),
+                            'p99': round(float(p99), 3), 'max': round(float(values.max()), 3)}
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'window': self.window, 'unit': 'ms', 'stages': self.summary()}, f, indent=2)
+
+    def export_csv(self, path):
+        fields = ['stage', 'count', 'mean', 'p50', 'p95', 'p99', 'max']
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for name, row in self.summary().items():
+                writer.writerow(dict(row, stage=name))
+
+    def export(self, path):
+        # Format chosen by extension (.csv, otherwise JSON)
+        if path.lower().endswith('.csv'):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_profiler():
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            from pcb_detect.config_manager import ConfigManager
+            _profiler = Profiler(enabled=bool(ConfigManager().get('profiling')))
+        return _profiler
@@ -0,0 +1,185 @@
+# Post-training INT8 quantization of a .pt model for CPU stations: the model
+# is exported to ONNX, statically quantized with ONNX Runtime using our own
+# snapshots as calibration data, and then compared against the FP32 export
+import json
+import os
+import random
+import time
+import cv2
+import numpy as np
+from pcb_detect import benchmark
+from pcb_detect.geometry import match_boxes
+from pcb_detect.model_manager import ModelManager
+
+def letterbox(image, size=640, pad_value=114):
+    # Same preprocessing as ultralytics: keep aspect ratio, pad to size x size
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    resized = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), pad_value, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    canvas[top:top + nh, left:left + nw] = resized
+    return canvas
+
+def preprocess(image, size=640):
+    # BGR uint8 HxWx3 -> RGB float32 1x3xSxS in [0, 1]
+    rgb = cv2.cvtColor(letterbox(image, size), cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+def split_images(images, calibration_size=64, eval_size=32, seed=0):
+    # Random sample for calibration; evaluation images are only ever taken
+    # from the rest, so the model is never scored on its own calibration
+    # data. With fewer images than both sizes ask for, calibration gets at
+    # most two thirds of them and the rest is held out.
+    images = list(images)
+    random.Random(seed).shuffle(images)
+    if len(images) < calibration_size + eval_size:
+        calibration_size = min(calibration_size, max(1, -(-2 * len(images) // 3)))
+    calibration = images[:calibration_size]
+    evaluation = images[calibration_size:calibration_size + eval_size]
+    return calibration, evaluation
+
+class SnapshotCalibrationReader:
+    # onnxruntime.quantization CalibrationDataReader over image files
+    def __init__(self, images, input_name, size=640):
+        self.images = list(images)
+        self.input_name = input_name
+        self.size = size
+        self._iter = None
+
+    def get_next(self):
+        if self._iter is None:
+            self._iter = self._batches()
+        return next(self._iter, None)
+
+    def rewind(self):
+        self._iter = None
+
+    def _batches(self):
+        for path in self.images:
+            image = cv2.imread(path)
+            if image is not None:
+                yield {self.input_name: preprocess(image, self.size)}
+
+def int8_path(pt_path):
+    return os.path.splitext(pt_path)[0] + ModelManager.INT8_SUFFIX
+
+def report_path(model_path):
+    return os.path.splitext(model_path)[0] + '.json'
+
+def quantize_model(pt_path, calibration_images, imgsz=640, per_channel=True):
+    # Writes models/<stem>_int8.onnx and returns its path. The ultralytics
+    # metadata (class names, stride, imgsz) is copied from the FP32 export so
+    # the INT8 model loads through YOLO() with the same names mapping.
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    fp32_path = ModelManager.export_model(pt_path, 'onnx', imgsz=imgsz)
+    fp32 = onnx.load(fp32_path)
+    input_name = fp32.graph.input[0].name
+    output_path = int8_path(pt_path)
+    # ONNX shape inference and graph optimization first, as ONNX Runtime recommends
+    prepared_path = os.path.splitext(output_path)[0] + '_prep.onnx'
+    # (symbolic shape inference cannot resolve the dynamic input axes)
+    quant_pre_process(fp32_path, prepared_path, skip_symbolic_shape=True)
+    reader = SnapshotCalibrationReader(calibration_images, input_name, size=imgsz)
+    try:
+        quantize_static(prepared_path, output_path, reader,
+                        quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8,
+                        per_channel=per_channel,
+                        calibrate_method=CalibrationMethod.MinMax)
+    finally:
+        if os.path.exists(prepared_path):
+            os.remove(prepared_path)
+    quantized = onnx.load(output_path)
+    del quantized.metadata_props[:]
+    for prop in fp32.metadata_props:
+        entry = quantized.metadata_props.add()
+        entry.key, entry.value = prop.key, prop.value
+    onnx.save(quantized, output_path)
+    return output_path
+
+def _run(model_path, frames, conf, imgsz):
+    from pcb_detect.detection import Detector
+    detector = Detector(backend='torch', imgsz=imgsz)
+    detector.load_model(model_path)
+    detector.warmup(2, imgsz)
+    outputs, latencies = [], []
+    for frame in frames:
+        t0 = time.perf_counter()
+        results = detector.detect(frame, conf=conf)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        outputs.append(benchmark.result_arrays(results[0] if results else None))
+    names = dict(detector.model.names)
+    detector.unload_model()
+    return outputs, latencies, names
+
+def compare_precision(fp32_path, int8_model_path, images, conf=0.5, imgsz=640, accuracy=True):
+    # Latency of both models on the same images, plus per-class recall of the
+    # FP32 detections by the INT8 model (FP32 output taken as reference).
+    # accuracy=False times only: for images the INT8 model was calibrated on
+    frames = [f for f in (cv2.imread(p) for p in images) if f is not None]
+    ref, ref_ms, names = _run(fp32_path, frames, conf, imgsz)
+    out, out_ms, _ = _run(int8_model_path, frames, conf, imgsz)
+    fp32_ms = float(np.median(ref_ms)) if ref_ms else 0.0
+    int8_ms = float(np.median(out_ms)) if out_ms else 0.0
+    report = {
+        'images': len(frames),
+        'fp32_latency_ms': round(fp32_ms, 2),
+        'int8_latency_ms': round(int8_ms, 2),
+        'speedup': round(fp32_ms / int8_ms, 3) if int8_ms else None,
+        'agreement': None,
+        'per_class': {},
+    }
+    if not accuracy:
+        return report
+    found, matched, predicted = {}, {}, {}
+    for r, o in zip(ref, out):
+        for i, j in match_boxes(r, o):
+            cls = int(r[1][i])
+            matched[cls] = matched.get(cls, 0) + 1
+        for cls in r[1]:
+            found[int(cls)] = found.get(int(cls), 0) + 1
+        for cls in o[1]:
+            predicted[int(cls)] = predicted.get(int(cls), 0) + 1
+    per_class = {}
+    for cls in sorted(set(found) | set(predicted)):
+        label = names.get(cls, str(cls))
+        recall = matched.get(cls, 0) / found[cls] if found.get(cls) else None
+        per_class[label] = {
+            'fp32_detections': found.get(cls, 0),
+            'int8_detections': predicted.get(cls, 0),
+            # FP32 recall is 1.0 by definition, so the delta is recall - 1
+            'recall_delta': round(recall - 1.0, 4) if recall is not None else None,
+        }
+    report['agreement'] = round(float(np.mean([benchmark.agreement(r, o) for r, o in zip(ref, out)])), 4) if frames else None
+    report['per_class'] = per_class
+    return report
+
+def quantize_and_report(pt_path, images, calibration_size=64, eval_size=32, conf=0.5, imgsz=640):
+    # Full workflow; the report is stored next to the INT8 model
+    calibration, evaluation = split_images(images, calibration_size, eval_size)
+    if not calibration:
+        raise ValueError("No calibration images")
+    output_path = quantize_model(pt_path, calibration, imgsz=imgsz)
+    report = {
+        'source_model': os.path.basename(pt_path),
+        'int8_model': os.path.basename(output_path),
+        'calibration_images': len(calibration),
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    fp32_path = ModelManager.export_path(pt_path, 'onnx')
+    report['held_out_images'] = len(evaluation)
+    if evaluation:
+        report.update(compare_precision(fp32_path, output_path, evaluation, conf=conf, imgsz=imgsz))
+    else:
+        # Timing does not need held-out images, but scoring on calibration
+        # images would overstate the agreement
+        report.update(compare_precision(fp32_path, output_path, calibration, conf=conf, imgsz=imgsz, accuracy=False))
+        report['note'] = "No held-out evaluation: every image was used for calibration"
+    with open(report_path(output_path), 'w') as f:
+        json.dump(report, f, indent=2)
+    return output_path, report
@@ -0,0 +1,74 @@
+# Adaptive pacing of real-time inference: instead of a hand-tuned delay, the
+# pause between inferences is derived from the measured cost of each frame,
+# a target latency and a CPU budget, and backs off while the machine is busy
+import statistics
+from collections import deque
+
+def system_load():
+    # System-wide CPU use (0-1) since the previous call, or None without psutil
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.cpu_percent(interval=None) / 100.0
+
+class AdaptivePacer:
+    # busy: time the loop spends on one frame (inference, drawing, display).
+    # - cpu_budget caps the loop's duty cycle busy / (busy + delay)
+    # - target_latency_ms bounds the age of the shown result, busy + delay
+    # - under load (high system CPU, or inference slower than its best time)
+    #   the delay is stretched step by step; when idle it relaxes back to
+    #   the smallest delay the budget allows
+    def __init__(self, target_latency_ms=250.0, cpu_budget=0.5, min_delay=0.0, max_delay=2.0,
+                 window=15, high_load=0.85, low_load=0.6, load=system_load):
+        self.target_latency = target_latency_ms / 1000.0
+        self.cpu_budget = min(max(cpu_budget, 0.05), 1.0)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.high_load = high_load
+        self.low_load = low_load
+        self.load = load
+        self.backoff = 1.0
+        self.delay = min_delay
+        self.last_load = None
+        self._busy = deque(maxlen=window)
+        self._inference = deque(maxlen=window)
+        self._best_inference = None
+
+    def record(self, busy_ms, inference_ms=None):
+        self._busy.append(busy_ms / 1000.0)
+        if inference_ms is not None:
+            self._inference.append(inference_ms / 1000.0)
+            # The best time slowly decays so a permanently slower scene or
+            # model does not read as load forever
+            best = self._best_inference
+            self._best_inference = inference_ms / 1000.0 if best is None else min(best * 1.01, inference_ms / 1000.0)
+
+    def _loaded(self):
+        self.last_load = self.load() if self.load else None
+        inflation = 1.0
+        if self._inference and self._best_inference:
+            inflation = statistics.median(self._inference) / self._best_inference
+        if (self.last_load is not None and self.last_load > self.high_load) or inflation > 1.5:
+            return True
+        if (self.last_load is None or self.last_load < self.low_load) and inflation < 1.2:
+            return False
+        return None
+
+    def next_delay(self):
+        # Seconds to wait before the next inference
+        if not self._busy:
+            return self.delay
+        busy = statistics.median(self._busy)
+        floor = max(self.min_delay, busy * (1.0 - self.cpu_budget) / self.cpu_budget)
+        loaded = self._loaded()
+        if loaded:
+            self.backoff = min(self.backoff * 1.25, 8.0)
+        elif loaded is False:
+            self.backoff = max(1.0, self.backoff * 0.8)
+        # Backing off stretches the whole cycle, but only up to the latency
+        # target; the CPU budget floor always holds
+        ceiling = max(floor, self.target_latency - busy)
+        delay = max(floor, min((busy + floor) * self.backoff - busy, ceiling, self.max_delay))
+        self.delay = delay if len(self._busy) == 1 else 0.7 * self.delay + 0.3 * delay
+        return self.delay
@@ -0,0 +1,310 @@
+# Headless inspection service: python -m pcb_detect serve loads a model once
+# and answers PASS/FAIL requests over localhost HTTP, so line-control
+# software and test scripts can inspect images without the Tk window.
+#
+#   POST /inspect?board=<set>[&board_number=N&batch=B&conf=C]
+#        body: encoded image (PNG/JPEG/BMP), or JSON {"board": ..., "image": <base64>, ...}
+#        -> the snapshot JSON record (timestamp, board, result, missing, detected, expected)
+#   GET  /health  -> model/queue state
+#   GET  /metrics -> counters and per-stage latency percentiles
+#
+# Requests are queued (bounded; 503 when full) and a single inference thread
+# drains the queue in batches of up to batch_size images.
+import base64
+import binascii
+import datetime
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import cv2
+import numpy as np
+from pcb_detect import inspection
+from pcb_detect.profiling import Profiler
+
+DEFAULT_PORT = 8765
+
+class QueueFull(Exception):
+    pass
+
+class InspectionJob:
+    def __init__(self, image, board, conf, board_number=None, batch=None):
+        self.image = image
+        self.board = board
+        self.conf = conf
+        self.board_number = board_number
+        self.batch = batch
+        self.submitted = time.perf_counter()
+        self.record = None
+        self.error = None
+        self.done = threading.Event()
+
+    def wait(self, timeout=None):
+        # Returns the record; raises the job's error or TimeoutError
+        if not self.done.wait(timeout):
+            raise TimeoutError("Inspection timed out")
+        if self.error is not None:
+            raise self.error
+        return self.record
+
+class InspectionService:
+    def __init__(self, detector, board_manager, conf=0.5, batch_size=8, max_queue=32, batch_wait=0.005, snapshot_dir=None):
+        self.detector = detector
+        self.board_manager = board_manager
+        self.conf = conf
+        self.batch_size = max(1, int(batch_size))
+        # After the first job of a batch, wait this long for more to arrive
+        self.batch_wait = batch_wait
+        # When set, annotated snapshots and JSON records are saved like the GUI does
+        self.snapshot_dir = snapshot_dir
+        self.started = time.time()
+        self.profiler = Profiler(enabled=True)
+        self.counters = {'requests': 0, 'completed': 0, 'rejected': 0, 'errors': 0, 'batches': 0, 'pass': 0, 'fail': 0}
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._board_number = 0
+        # Board sets compiled on first use (sets do not change while serving)
+        self._boards = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(2)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def submit(self, image, board, conf=None, board_number=None, batch=None):
+        # Queues one image; raises KeyError for an unknown board set and
+        # QueueFull when the queue is at capacity (the caller answers 503)
+        if board not in self.board_manager.sets:
+            raise KeyError(board)
+        job = InspectionJob(image, board, self.conf if conf is None else conf, board_number, batch)
+        self._count('requests')
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count('rejected')
+            raise QueueFull()
+        return job
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+        jobs = [first]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(jobs) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                jobs.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+
+    def _run(self):
+        while self._running:
+            jobs = self._next_batch()
+            if not jobs:
+                continue
+            try:
+                self.process(jobs)
+            except Exception as e:
+                for job in jobs:
+                    if not job.done.is_set():
+                        self._fail(job, e)
+
+    def process(self, jobs):
+        # Plain jobs with the same confidence share one batched call (with the
+        # union of their boards' classes, as in multi-view inspection); jobs
+        # whose board needs tiling or an ROI run on their own
+        started = time.perf_counter()
+        for job in jobs:
+            self.profiler.record('service.queue_wait', (started - job.submitted) * 1000.0)
+        options = [inspection.detection_options(self.detector, self.board_manager, job.board) for job in jobs]
+        results = {}
+        groups = {}
+        failed = set()
+        for i, job in enumerate(jobs):
+            if inspection.needs_single_frame(options[i]):
+                # A failing tiled/ROI job fails only that request
+                try:
+                    results[i] = inspection.run_detection(self.detector, job.image, conf=job.conf, options=options[i])
+                except Exception as e:
+                    self._fail(job, e)
+                    failed.add(i)
+            else:
+                groups.setdefault(job.conf, []).append(i)
+        for conf, indices in groups.items():
+            class_lists = [options[i].get('classes') for i in indices]
+            classes = sorted(set().union(*class_lists)) if all(c is not None for c in class_lists) else None
+            batch = self.detector.detect_batch([jobs[i].image for i in indices], conf=conf, batch_size=self.batch_size, classes=classes)
+            for i, result in zip(indices, batch):
+                results[i] = [result] if result is not None else []
+        self.profiler.record('service.inference', (time.perf_counter() - started) * 1000.0)
+        self._count('batches')
+        class_names = inspection.class_names_of(self.detector)
+        for i, job in enumerate(jobs):
+            if i in failed:
+                continue
+            # One job failing to evaluate or save fails only that request
+            try:
+                job.record = self._evaluate(job, results.get(i) or [], class_names, options[i])
+            except Exception as e:
+                self._fail(job, e)
+                continue
+            self._count('completed')
+            self._count('pass' if job.record['result'] == 'PASS' else 'fail')
+            self.profiler.record('service.total', (time.perf_counter() - job.submitted) * 1000.0)
+            job.done.set()
+
+    def _fail(self, job, error):
+        job.error = error
+        self._count('errors')
+        job.done.set()
+
+    def _evaluate(self, job, results, class_names, options):
+        # Same PASS/FAIL evaluation and record as a GUI capture
+        expected = self.board_manager.sets.get(job.board)
+        board = self._boards.get(job.board)
+        if board is None or board.expected_set is not expected:
+            board = self._boards[job.board] = inspection.CompiledBoardSet(expected, class_names)
+        frame = job.image.copy() if self.snapshot_dir else job.image
+        pass_fail, missing, detected, _ = inspection.inspect_frame(frame, results, class_names, expected, board=board)
+        board_number = job.board_number
+        if board_number is None:
+            with self._lock:
+                self._board_number += 1
+                board_number = self._board_number
+        ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        record = inspection.build_record(ts, job.board, board_number, job.batch, pass_fail, missing, detected, expected)
+        if self.snapshot_dir:
+            inspection.draw_roi(frame, options.get('roi'))
+            fname = inspection.snapshot_path(job.board, board_number, job.batch, pass_fail, snapshot_dir=self.snapshot_dir)
+            cv2.imwrite(fname, frame)
+            inspection.save_record(record, fname)
+            record['snapshot'] = fname
+        return record
+
+    def health(self):
+        model = getattr(self.detector, 'model', None)
+        return {
+            'status': 'ok' if model is not None and self._running else 'unavailable',
+            'model': getattr(self.detector, 'model_path', None),
+            'backend': getattr(self.detector, 'backend', None),
+            'boards': sorted(self.board_manager.sets),
+            'queue': self._queue.qsize(),
+            'max_queue': self._queue.maxsize,
+        }
+
+    def metrics(self):
+        with self._lock:
+            counters = dict(self.counters)
+        uptime = time.time() - self.started
+        return {
+            'uptime_s': round(uptime, 1),
+            'counters': counters,
+            'queue': self._queue.qsize(),
+            'mean_batch_size': round(counters['completed'] / counters['batches'], 2) if counters['batches'] else None,
+            'images_per_s': round(counters['completed'] / uptime, 2) if uptime else None,
+            'latency_ms': self.profiler.summary(),
+        }
+
+def decode_image(data):
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) if data else None
+    if image is None:
+        raise ValueError("Body is not a decodable image")
+    return image
+
+class InspectionHandler(BaseHTTPRequestHandler):
+    # self.server.service is the InspectionService; self.server.timeout_s
+    # bounds how long a request waits for its result
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if getattr(self.server, 'verbose', False):
+            super().log_message(format, *args)
+
+    def _reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/health':
+            health = self.server.service.health()
+            self._reply(200 if health['status'] == 'ok' else 503, health)
+        elif path == '/metrics':
+            self._reply(200, self.server.service.metrics())
+        else:
+            self._reply(404, {'error': f"Unknown path {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if url.path != '/inspect':
+            self._reply(404, {'error': f"Unknown path {url.path}"})
+            return
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            if (self.headers.get('Content-Type') or '').startswith('application/json'):
+                payload = json.loads(body or b'{}')
+                if not isinstance(payload, dict):
+                    raise ValueError("JSON body must be an object")
+                params.update({k: v for k, v in payload.items() if k != 'image'})
+                image = decode_image(base64.b64decode(payload.get('image') or ''))
+            else:
+                image = decode_image(body)
+            board = params.get('board')
+            if not board:
+                raise ValueError("Missing board")
+            conf = float(params['conf']) if params.get('conf') is not None else None
+            board_number = int(params['board_number']) if params.get('board_number') is not None else None
+        except (ValueError, TypeError, json.JSONDecodeError, binascii.Error) as e:
+            self._reply(400, {'error': str(e)})
+            return
+        try:
+            job = self.server.service.submit(image, board, conf=conf, board_number=board_number, batch=params.get('batch'))
+        except KeyError:
+            self._reply(400, {'error': f"Unknown board set '{board}'"})
+            return
+        except QueueFull:
+            self._reply(503, {'error': "Inspection queue is full"}, headers={'Retry-After': '1'})
+            return
+        try:
+            record = job.wait(self.server.timeout_s)
+        except TimeoutError as e:
+            self._reply(504, {'error': str(e)})
+            return
+        except Exception as e:
+            self._reply(500, {'error': str(e)})
+            return
+        self._reply(200, record)
+
+def create_server(service, host='127.0.0.1', port=DEFAULT_PORT, timeout_s=30.0, verbose=False):
+    # Starts the service's inference thread; call serve_forever() on the result
+    server = ThreadingHTTPServer((host, port), InspectionHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.timeout_s = timeout_s
+    server.verbose = verbose
+    service.start()
+    return server
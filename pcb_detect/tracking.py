@@ -0,0 +1,168 @@
+# Keyframe tracking for real-time mode: the detector runs on keyframes only
+# and boxes are carried between keyframes by sparse optical flow. Each box
+# keeps an id across frames (detections are associated to tracks by IoU), so
+# component counts do not flicker between inferences. The keyframe interval
+# grows while the tracker agrees with the detector and the scene is calm, and
+# shrinks when the tracked boxes drift or the board moves.
+import cv2
+import numpy as np
+from pcb_detect.detection import DetectionResult
+from pcb_detect.geometry import box_iou, match_boxes
+
+class Track:
+    __slots__ = ('id', 'box', 'cls', 'conf', 'missed')
+
+    def __init__(self, track_id, box, cls, conf):
+        self.id = track_id
+        self.box = np.asarray(box, dtype=np.float32)
+        self.cls = int(cls)
+        self.conf = float(conf)
+        self.missed = 0
+
+class BoxTracker:
+    def __init__(self, iou_threshold=0.3, max_missed=1, min_interval=2, max_interval=15,
+                 drift_low=0.1, drift_high=0.3, motion_threshold=6.0, max_width=640, grid=4):
+        self.iou_threshold = iou_threshold
+        # A track survives this many keyframes without a matching detection
+        self.max_missed = max_missed
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        # Drift = 1 - IoU of tracked vs. detected boxes at a keyframe (unmatched count as 1)
+        self.drift_low = drift_low
+        self.drift_high = drift_high
+        # Median box motion (pixels/frame, full resolution) that forces a keyframe
+        self.motion_threshold = motion_threshold
+        # Flow is computed on a grayscale copy at most max_width wide
+        self.max_width = max_width
+        self.grid = grid
+        self.tracks = []
+        self.interval = min_interval
+        self.since_keyframe = 0
+        self.last_drift = 0.0
+        self.last_motion = 0.0
+        self._motion_peak = 0.0
+        self._prev_gray = None
+        self._scale = 1.0
+        self._next_id = 1
+
+    def reset(self):
+        self.tracks = []
+        self.interval = self.min_interval
+        self.since_keyframe = 0
+        self._motion_peak = 0.0
+        self._prev_gray = None
+
+    def needs_keyframe(self):
+        return self._prev_gray is None or self.since_keyframe >= self.interval
+
+    def _gray(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        h, w = gray.shape[:2]
+        self._scale = min(1.0, self.max_width / float(w))
+        if self._scale < 1.0:
+            gray = cv2.resize(gray, (int(w * self._scale), int(h * self._scale)), interpolation=cv2.INTER_AREA)
+        return gray
+
+    def update(self, frame, data):
+        # Keyframe: data is the detector's N x 6 (x1, y1, x2, y2, conf, cls)
+        # array or DetectionResult
+        gray = self._gray(frame)
+        if isinstance(data, DetectionResult):
+            data = data.data
+        data = np.asarray(data, dtype=np.float32).reshape(-1, 6)
+        det = (data[:, :4], data[:, 5].astype(np.int64))
+        tracked = (np.array([t.box for t in self.tracks], dtype=np.float32).reshape(-1, 4),
+                   np.array([t.cls for t in self.tracks], dtype=np.int64))
+        pairs = match_boxes(tracked, det, self.iou_threshold)
+        if self.since_keyframe and (self.tracks or len(data)):
+            self._adapt_interval(tracked[0], det[0], pairs)
+        matched_tracks = {i for i, _ in pairs}
+        matched_dets = {j for _, j in pairs}
+        for i, j in pairs:
+            track = self.tracks[i]
+            track.box = data[j, :4].copy()
+            track.conf = float(data[j, 4])
+            track.missed = 0
+        kept = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            kept.append(track)
+        for j in range(len(data)):
+            if j not in matched_dets:
+                kept.append(Track(self._next_id, data[j, :4], data[j, 5], data[j, 4]))
+                self._next_id += 1
+        self.tracks = kept
+        self._prev_gray = gray
+        self.since_keyframe = 0
+        self._motion_peak = 0.0
+
+    def _adapt_interval(self, tracked, detected, pairs):
+        unmatched = (len(tracked) - len(pairs)) + (len(detected) - len(pairs))
+        total = len(pairs) + unmatched
+        drift = float(unmatched)
+        if pairs:
+            iou = box_iou(tracked[[i for i, _ in pairs]], detected[[j for _, j in pairs]])
+            drift += float(np.sum(1.0 - np.diag(iou)))
+        self.last_drift = drift / total if total else 0.0
+        if self.last_drift > self.drift_high or self._motion_peak > self.motion_threshold:
+            self.interval = max(self.min_interval, self.interval // 2)
+        elif self.last_drift < self.drift_low and self._motion_peak < self.motion_threshold / 2:
+            self.interval = min(self.max_interval, self.interval + 1)
+
+    def propagate(self, frame):
+        # Between keyframes: shift every box by the median flow of a grid of
+        # points inside it (one pyramidal Lucas-Kanade call for all boxes)
+        gray = self._gray(frame)
+        self.since_keyframe += 1
+        if self._prev_gray is None or gray.shape != self._prev_gray.shape:
+            self._prev_gray = None
+            return
+        if self.tracks:
+            points, owners = self._grid_points()
+            moved, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, points, None,
+                                                        winSize=(15, 15), maxLevel=2)
+            ok = status.reshape(-1) == 1
+            shift = (moved - points).reshape(-1, 2) / self._scale
+            motions = []
+            for k, track in enumerate(self.tracks):
+                sel = ok & (owners == k)
+                if not np.any(sel):
+                    continue
+                dx, dy = np.median(shift[sel], axis=0)
+                track.box += np.array([dx, dy, dx, dy], dtype=np.float32)
+                motions.append(float(np.hypot(dx, dy)))
+            h, w = frame.shape[:2]
+            for track in self.tracks:
+                np.clip(track.box, 0, [w, h, w, h], out=track.box)
+            self.last_motion = float(np.median(motions)) if motions else 0.0
+            self._motion_peak = max(self._motion_peak, self.last_motion)
+            if self.last_motion > self.motion_threshold:
+                # The board is moving: re-detect on the next frame
+                self.since_keyframe = self.interval
+        self._prev_gray = gray
+
+    def _grid_points(self):
+        # grid x grid points over the central 80% of each box, in flow coordinates
+        steps = np.linspace(0.1, 0.9, self.grid, dtype=np.float32)
+        fx, fy = np.meshgrid(steps, steps)
+        fx, fy = fx.reshape(-1), fy.reshape(-1)
+        boxes = np.array([t.box for t in self.tracks], dtype=np.float32) * self._scale
+        xs = boxes[:, 0:1] + fx[None, :] * (boxes[:, 2:3] - boxes[:, 0:1])
+        ys = boxes[:, 1:2] + fy[None, :] * (boxes[:, 3:4] - boxes[:, 1:2])
+        points = np.stack([xs, ys], axis=2).reshape(-1, 1, 2).astype(np.float32)
+        owners = np.repeat(np.arange(len(boxes)), len(fx))
+        return points, owners
+
+    def data(self):
+        # N x 7 (x1, y1, x2, y2, track id, conf, cls), the ultralytics layout
+        # for tracked boxes
+        if not self.tracks:
+            return np.zeros((0, 7), dtype=np.float32)
+        return np.array([[*t.box, t.id, t.conf, t.cls] for t in self.tracks], dtype=np.float32)
+
+    def result(self, names=None):
+        # Current tracks as a DetectionResult with ids
+        return DetectionResult.from_array(self.data(), names)
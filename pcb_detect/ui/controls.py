@@ -4,10 +4,14 @@ from tkinter import filedialog, messagebox
 from tkinter import ttk
 from pcb_detect.model_manager import ModelManager
 from pcb_detect.detection import Detector
+from pcb_detect.model_cache import get_model_cache
 from pcb_detect.board_manager import BoardManager
 from pcb_detect.batch_manager import BatchManager
 from pcb_detect.ui.dialogs import Dialogs
 from pcb_detect.ui.tooltips import add_tooltip
+from pcb_detect import camera_probe, frame_sources, inspection
+from pcb_detect.camera_broker import get_broker
+from pcb_detect.profiling import get_profiler
 import cv2
 import json
 import threading
@@ -55,12 +59,19 @@ class ControlsFrame(ttk.LabelFrame):
         self.delete_set_btn.grid(row=0, column=10, padx=2)
         self.setup_btn.grid(row=0, column=11, padx=2)
         add_tooltip(self.board_combo, "Select a board type or configure a new one.")
+        self.board_combo.bind("<<ComboboxSelected>>", self._on_board_selected)
         # Camera Controls
         self.camera_label = ttk.Label(self, text="Camera:")
         self.camera_label.grid(row=0, column=12, padx=10, pady=2, sticky='w')
         self.camera_combo = ttk.Combobox(self, values=self._get_camera_list(), width=10)
         self.camera_combo.grid(row=0, column=13, padx=5, pady=2)
+        self.camera_combo.set(self.app.config_manager.get('frame_source') if hasattr(self.app, 'config_manager') else 'Camera 0')
         self.camera_combo.bind("<<ComboboxSelected>>", self._on_camera_selected)
+        self.camera_combo.bind("<Return>", self._on_camera_selected)
+        add_tooltip(self.camera_combo, "Select a camera, or type a source: file:<video>, dir:<folder>, synthetic:1280x720@30")
+        self.rescan_btn = ttk.Button(self, text="Rescan", command=self._on_rescan_cameras)
+        self.rescan_btn.grid(row=0, column=14, padx=2)
+        add_tooltip(self.rescan_btn, "Search for connected cameras in the background.")
         # Action Buttons (Row 1)
         self.capture_btn = ttk.Button(self, text="Capture Image")
         self.start_btn = ttk.Button(self, text="Start Real-time")
@@ -68,12 +79,18 @@ class ControlsFrame(ttk.LabelFrame):
         self.stop_btn = ttk.Button(self, text="Stop")
         self.export_btn = ttk.Button(self, text="Export Snapshot")
         self.continue_btn = ttk.Button(self, text="Continue")
+        self.multi_capture_btn = ttk.Button(self, text="Multi-View Capture")
+        self.views_btn = ttk.Button(self, text="Views")
         self.capture_btn.grid(row=1, column=0, padx=2, pady=4)
         self.start_btn.grid(row=1, column=1, padx=2)
         self.pause_btn.grid(row=1, column=2, padx=2)
         self.stop_btn.grid(row=1, column=3, padx=2)
         self.export_btn.grid(row=1, column=4, padx=2)
         self.continue_btn.grid(row=1, column=5, padx=2)
+        self.multi_capture_btn.grid(row=1, column=6, padx=2)
+        self.views_btn.grid(row=1, column=7, padx=2)
+        add_tooltip(self.multi_capture_btn, "Capture and inspect all configured camera views of one board.")
+        add_tooltip(self.views_btn, "Bind cameras to board sets for multi-view inspection.")
         add_tooltip(self.capture_btn, "Capture a single image for detection.")
         add_tooltip(self.start_btn, "Start real-time detection mode.")
         # Settings (Row 2)
@@ -85,6 +102,8 @@ class ControlsFrame(ttk.LabelFrame):
         self.batch_proc_var = tk.BooleanVar(value=False)
         self.auto_save_chk = ttk.Checkbutton(self, text="Auto-save Snapshots", variable=self.auto_save_var)
         self.batch_proc_chk = ttk.Checkbutton(self, text="Batch Processing", variable=self.batch_proc_var)
+        self.auto_trigger_var = tk.BooleanVar(value=False)
+        self.auto_trigger_chk = ttk.Checkbutton(self, text="Auto Trigger", variable=self.auto_trigger_var, command=self._on_auto_trigger_toggle)
         self.zoom_in_btn.grid(row=2, column=0, padx=2, pady=2)
         self.zoom_out_btn.grid(row=2, column=1, padx=2)
         self.colors_btn.grid(row=2, column=2, padx=2)
@@ -96,6 +115,12 @@ class ControlsFrame(ttk.LabelFrame):
         self.close_batch_btn = ttk.Button(self, text="Close Batch", command=self._on_close_batch)
         self.start_batch_btn.grid(row=2, column=6, padx=2)
         self.close_batch_btn.grid(row=2, column=7, padx=2)
+        self.auto_trigger_chk.grid(row=2, column=8, padx=2)
+        add_tooltip(self.auto_trigger_chk, "Capture automatically when a board settles in the fixture.\nEnable with the fixture empty.")
+        self.tracking_var = tk.BooleanVar(value=bool(self.app.config_manager.get('tracking')) if hasattr(self.app, 'config_manager') else False)
+        self.tracking_chk = ttk.Checkbutton(self, text="Tracking", variable=self.tracking_var, command=self._on_tracking_toggle)
+        self.tracking_chk.grid(row=2, column=9, padx=2)
+        add_tooltip(self.tracking_chk, "Real-time: run the model on keyframes only and follow the boxes in between.\nThe delay slider is not used while tracking.")
         # Sliders (Row 3)
         self.confidence_label = ttk.Label(self, text="Confidence:")
         self.confidence_slider = ttk.Scale(self, from_=0.1, to=1.0, orient=tk.HORIZONTAL)
@@ -111,9 +136,23 @@ class ControlsFrame(ttk.LabelFrame):
         self.delay_label.grid(row=3, column=3, padx=2, pady=2)
         self.delay_slider.grid(row=3, column=4, padx=2, pady=2)
         self.delay_value_label.grid(row=3, column=5, padx=2, pady=2, sticky='w')
+        # Inference backend for the selected model (Row 3)
+        self.backend_label = ttk.Label(self, text="Backend:")
+        self.backend_combo = ttk.Combobox(self, values=ModelManager.BACKENDS, width=10, state='readonly')
+        self.backend_combo.set(self.app.config_manager.get('backend') if hasattr(self.app, 'config_manager') else 'torch')
+        self.backend_label.grid(row=3, column=6, padx=2, pady=2)
+        self.backend_combo.grid(row=3, column=7, padx=2, pady=2)
+        add_tooltip(self.backend_combo, "torch runs the .pt model; onnx/openvino run a CPU-optimized export\n(created on first load and kept in the models folder).")
+        # Adaptive pacing replaces the delay slider (Row 3)
+        self.adaptive_delay_var = tk.BooleanVar(value=(self.app.config_manager.get('pacing') == 'adaptive') if hasattr(self.app, 'config_manager') else False)
+        self.adaptive_delay_chk = ttk.Checkbutton(self, text="Auto Delay", variable=self.adaptive_delay_var, command=self._on_pacing_toggle)
+        self.adaptive_delay_chk.grid(row=3, column=8, padx=2, pady=2)
+        add_tooltip(self.adaptive_delay_chk, "Pick the delay between inferences automatically from the measured\ninference time, the target latency and the CPU budget in the config.")
+        self.model_combo.bind("<<ComboboxSelected>>", self._on_model_selected)
         # Update value labels when sliders move
         self.confidence_slider.configure(command=lambda v: self.confidence_value_label.config(text=f"{float(v):.2f}"))
-        self.delay_slider.configure(command=lambda v: self.delay_value_label.config(text=f"{float(v):.2f}"))
+        self.delay_slider.configure(command=self._on_delay_changed)
+        self._on_pacing_toggle(save=False)
         self._refresh_models()
         self.load_btn.config(command=self._on_load_model)
         self.upload_btn.config(command=self._on_upload_model)
@@ -132,49 +171,158 @@ class ControlsFrame(ttk.LabelFrame):
         self.stop_btn.config(command=self._on_stop)
         self.export_btn.config(command=self._on_export_snapshot)
         self.continue_btn.config(command=self._on_continue)
+        self.multi_capture_btn.config(command=self._on_multi_capture)
+        self.views_btn.config(command=self._on_views)
         self.colors_btn.config(command=self._on_colors)
 
     def _get_camera_list(self):
-        # Try to find available cameras (0-4)
-        available = []
-        for idx in range(5):
-            cap = cv2.VideoCapture(idx, cv2.CAP_DSHOW)
-            if cap.isOpened():
-                available.append(f"Camera {idx}")
-                cap.release()
-        return available if available else ["Camera 0"]
+        # Use the cached enumeration so startup never waits on device probes;
+        # without a valid cache a background rescan fills the list in.
+        # Otherwise the device list is re-checked off the Tk thread and a
+        # changed list (a camera plugged in or removed) triggers the rescan.
+        cameras = camera_probe.cached_cameras(verify=False)
+        if cameras is None:
+            cameras = []
+            self.after(100, self._on_rescan_cameras)
+        else:
+            threading.Thread(target=self._verify_camera_cache, daemon=True).start()
+        self._camera_info = {c['name']: c for c in cameras}
+        return self._camera_values(cameras)
+
+    def _verify_camera_cache(self):
+        busy = [idx for idx in camera_probe.DEFAULT_INDICES if get_broker().subscriber_count(f"Camera {idx}")]
+        try:
+            stale = camera_probe.cached_cameras(busy=busy) is None
+        except Exception:
+            stale = True
+        if stale:
+            self.after(0, self._on_rescan_cameras)
+
+    def _camera_values(self, cameras):
+        available = [c['name'] for c in cameras] or ["Camera 0"]
+        # Replay/synthetic sources from config are offered alongside the cameras
+        if hasattr(self.app, 'config_manager'):
+            available.extend(self.app.config_manager.get('frame_sources') or [])
+        return available
+
+    def _on_rescan_cameras(self):
+        if getattr(self, '_rescanning', False):
+            return
+        self._rescanning = True
+        self.rescan_btn.config(state=tk.DISABLED)
+        # Devices the broker holds open are reported from cache, not reopened
+        busy = [idx for idx in camera_probe.DEFAULT_INDICES if get_broker().subscriber_count(f"Camera {idx}")]
+        def worker():
+            try:
+                cameras = camera_probe.enumerate_cameras(use_cache=False, busy=busy)
+            except Exception as e:
+                cameras = None
+                error = e
+            def done():
+                self._rescanning = False
+                self.rescan_btn.config(state=tk.NORMAL)
+                if cameras is None:
+                    if hasattr(self.app, 'status_frame'):
+                        self.app.status_frame.log_event(f"[ERROR] Camera scan failed: {error}")
+                    return
+                self._camera_info = {c['name']: c for c in cameras}
+                self.camera_combo['values'] = self._camera_values(cameras)
+                if hasattr(self.app, 'status_frame'):
+                    self.app.status_frame.log_event(f"[INFO] Found {len(cameras)} camera(s)")
+                    for info in cameras:
+                        self.app.status_frame.log_event(f"[INFO] {camera_probe.describe_camera(info)}")
+            self.after(0, done)
+        threading.Thread(target=worker, daemon=True).start()
 
     def _refresh_models(self):
         models = ModelManager.list_models()
         self.model_combo['values'] = models
         if models:
             self.model_combo.current(0)
+            self._on_model_selected()
+
+    def _model_backend(self, model_name):
+        if not hasattr(self.app, 'config_manager'):
+            return 'torch'
+        backends = self.app.config_manager.get('model_backends') or {}
+        return backends.get(model_name, self.app.config_manager.get('backend'))
+
+    def _on_model_selected(self, event=None):
+        self.backend_combo.set(self._model_backend(self.model_combo.get()))
 
     def _on_load_model(self):
         model_name = self.model_combo.get()
         if not model_name:
             Dialogs.error("No Model Selected", "Please select a model to load.")
             return
+        self._load_model_async(model_name)
+
+    def preload_last_model(self):
+        # Startup: load the model used last time in the background
+        last_model = self.app.config_manager.get('last_model') if hasattr(self.app, 'config_manager') else ''
+        if last_model and last_model in self.model_combo['values']:
+            self.model_combo.set(last_model)
+            self._on_model_selected()
+            self._load_model_async(last_model, quiet=True)
+
+    def _load_model_async(self, model_name, quiet=False):
+        # Weights are deserialized and warmed up off the Tk thread; the
+        # detector is only swapped in once it is ready
+        if getattr(self, '_model_loading', False):
+            return
+        self._model_loading = True
         model_path = os.path.join(ModelManager.MODELS_DIR, model_name)
-        if not hasattr(self, 'detector'):
-            self.detector = Detector()
-        try:
-            self.detector.load_model(model_path)
-            Dialogs.info("Model Loaded", f"Model '{model_name}' loaded successfully.")
-            if hasattr(self.app, 'status_frame') and self.detector.model:
-                self.app.status_frame.log_event(f"[INFO] Model '{model_name}' loaded from '{model_path}'")
-                try:
-                    class_names = self.detector.model.names if hasattr(self.detector.model, 'names') else None
-                    if class_names:
-                        self.app.status_frame.log_event(f"[INFO] Model classes: {', '.join([f'{i}: {c}' for i, c in class_names.items()])}")
-                    else:
-                        self.app.status_frame.log_event("[WARN] Model loaded, but class names could not be determined.")
-                except Exception as e:
-                    self.app.status_frame.log_event(f"[ERROR] Error reading model classes: {e}")
-        except Exception as e:
-            Dialogs.error("Model Load Error", str(e))
+        backend = self.backend_combo.get() or 'torch'
+        self.load_btn.config(state=tk.DISABLED)
+        if hasattr(self.app, 'status_frame'):
+            self.app.status_frame.show_progress()
+            self.app.status_frame.log_event(f"[INFO] Loading model '{model_name}' ({backend})...")
+        def on_loaded(detector, error):
+            self.after(0, lambda: self._on_model_loaded(model_name, model_path, detector, error, quiet))
+        # Switching back to a previously used model is served from memory; a
+        # non-torch backend exports the model on its first load
+        get_model_cache().load_async(model_path, on_loaded, backend=backend)
+
+    def _on_model_loaded(self, model_name, model_path, detector, error, quiet):
+        self._model_loading = False
+        self.load_btn.config(state=tk.NORMAL)
+        if hasattr(self.app, 'status_frame'):
+            self.app.status_frame.hide_progress()
+        if error is not None:
+            if not quiet:
+                Dialogs.error("Model Load Error", str(error))
             if hasattr(self.app, 'status_frame'):
-                self.app.status_frame.log_event(f"[ERROR] Model load failed: {e}")
+                self.app.status_frame.log_event(f"[ERROR] Model load failed: {error}")
+            return
+        previous = getattr(self, 'detector', None)
+        self.detector = detector
+        if hasattr(self.app, 'video_frame'):
+            self.app.video_frame.detector = detector
+        if previous is not None:
+            get_model_cache().release(previous)
+        self._on_board_selected()
+        if hasattr(self.app, 'config_manager'):
+            backends = dict(self.app.config_manager.get('model_backends') or {})
+            backends[model_name] = detector.backend
+            self.app.config_manager.config['model_backends'] = backends
+            self.app.config_manager.set('last_model', model_name)
+        if not quiet:
+            Dialogs.info("Model Loaded", f"Model '{model_name}' loaded successfully.")
+        if hasattr(self.app, 'status_frame') and self.detector.model:
+            self.app.status_frame.log_event(f"[INFO] Model '{model_name}' loaded from '{model_path}' ({detector.backend}) and warmed up")
+            report = ModelManager.model_report(model_name)
+            if report and report.get('agreement') is None:
+                self.app.status_frame.log_event(f"[WARN] INT8 model: {report.get('speedup')}x faster than FP32; {report.get('note') or 'no held-out evaluation'}")
+            elif report:
+                self.app.status_frame.log_event(f"[INFO] INT8 model: {report.get('speedup')}x faster than FP32, detection agreement {report.get('agreement')}")
+            try:
+                class_names = self.detector.model.names if hasattr(self.detector.model, 'names') else None
+                if class_names:
+                    self.app.status_frame.log_event(f"[INFO] Model classes: {', '.join([f'{i}: {c}' for i, c in class_names.items()])}")
+                else:
+                    self.app.status_frame.log_event("[WARN] Model loaded, but class names could not be determined.")
+            except Exception as e:
+                self.app.status_frame.log_event(f"[ERROR] Error reading model classes: {e}")
 
     def _on_upload_model(self):
         file_path = filedialog.askopenfilename(title="Select Model", filetypes=[("PyTorch Model", "*.pt")])
@@ -188,7 +336,14 @@ class ControlsFrame(ttk.LabelFrame):
 
     def _on_unload_model(self):
         if hasattr(self, 'detector') and self.detector.model:
-            self.detector.unload_model()
+            cache = get_model_cache()
+            previous = self.detector
+            cache.evict(previous.model_path)
+            self.detector = Detector()
+            if hasattr(self.app, 'video_frame'):
+                self.app.video_frame.detector = self.detector
+            # Unloads now unless the setup dialog or the server still holds it
+            cache.release(previous)
             Dialogs.info("Model Unloaded", "Model unloaded from memory.")
         else:
             Dialogs.info("No Model Loaded", "No model is currently loaded.")
@@ -199,6 +354,7 @@ class ControlsFrame(ttk.LabelFrame):
             Dialogs.error("No Model Selected", "Please select a model to delete.")
             return
         if Dialogs.confirm("Delete Model", f"Are you sure you want to delete '{model_name}'?"):
+            get_model_cache().evict(os.path.join(ModelManager.MODELS_DIR, model_name))
             if ModelManager.delete_model(model_name):
                 self._refresh_models()
                 Dialogs.info("Model Deleted", f"Model '{model_name}' deleted.")
@@ -211,6 +367,27 @@ class ControlsFrame(ttk.LabelFrame):
         self.board_combo['values'] = boards
         if boards:
             self.board_combo.current(0)
+        self._on_board_selected()
+
+    def _compile_board(self, expected):
+        # The set compiled against the current model, in the user's colors
+        colors = {c: self._get_color_for_class(c) for c in (expected or {}) if c in getattr(self, '_component_colors', {})}
+        return inspection.CompiledBoardSet(expected, inspection.class_names_of(getattr(self, 'detector', None)), colors=colors)
+
+    def _on_board_selected(self, event=None):
+        # Hand the selected board's inference options (incl. its compiled
+        # class ids) to the live view; a new dict makes the real-time loop
+        # re-infer with them. The set is also compiled for evaluation here.
+        # Called when the board, its components, the model or colors change.
+        detector = getattr(self, 'detector', None)
+        board_name = self.board_combo.get()
+        expected = self.board_manager.sets.get(board_name) if board_name else None
+        self.compiled_board = self._compile_board(expected)
+        options = inspection.detection_options(detector, self.board_manager, board_name)
+        if options.get('classes') == [] and hasattr(self.app, 'status_frame'):
+            self.app.status_frame.log_event(f"[WARN] None of the components of '{board_name}' are classes of the loaded model; nothing will be detected")
+        if hasattr(self.app, 'video_frame'):
+            self.app.video_frame.detection_options = options
 
     def _on_new_set(self):
         # Open a single dialog for set name and component editing
@@ -296,7 +473,7 @@ class ControlsFrame(ttk.LabelFrame):
         components_orig = self.board_manager.sets.get(name, {})
         editor = tk.Toplevel(self)
         editor.title(f"Edit Board Set: {name}")
-        editor.geometry("420x400")
+        editor.geometry("420x440")
         # Set name
         tk.Label(editor, text="Set Name:").pack(anchor='w', padx=10, pady=(10,2))
         set_name_var = tk.StringVar(value=name)
@@ -403,6 +580,19 @@ class ControlsFrame(ttk.LabelFrame):
                 refresh_table()
         del_btn = tk.Button(editor, text="Delete Selected Component", command=del_comp)
         del_btn.pack(pady=2)
+        # Tiled detection for small parts on high-resolution frames
+        tiling = inspection.tiling_options(self.board_manager.get_options(name))
+        tiling_frame = tk.Frame(editor)
+        tiling_frame.pack(fill=tk.X, padx=10, pady=2)
+        tiling_var = tk.BooleanVar(value=tiling['enabled'])
+        tk.Checkbutton(tiling_frame, text="Tiled detection", variable=tiling_var).pack(side=tk.LEFT)
+        tk.Label(tiling_frame, text="Tile:").pack(side=tk.LEFT)
+        tile_size_var = tk.StringVar(value=str(tiling['tile_size']))
+        tk.Entry(tiling_frame, textvariable=tile_size_var, width=5).pack(side=tk.LEFT, padx=2)
+        tk.Label(tiling_frame, text="Overlap:").pack(side=tk.LEFT)
+        overlap_var = tk.StringVar(value=str(tiling['overlap']))
+        tk.Entry(tiling_frame, textvariable=overlap_var, width=5).pack(side=tk.LEFT, padx=2)
+        add_tooltip(tiling_frame, "Cut the frame into overlapping tiles (pixels, overlap as a fraction)\nso small parts are not lost when the frame is scaled down.")
         # Save button
         def save_set():
             set_name = set_name_var.get().strip()
@@ -416,10 +606,18 @@ class ControlsFrame(ttk.LabelFrame):
             if set_name != name and set_name in self.board_manager.sets:
                 Dialogs.error("Exists", "A set with this name already exists.")
                 return
-            # Remove old set if renamed
-            if set_name != name:
-                self.board_manager.delete_set(name)
-            self.board_manager.add_set(set_name, components)
+            try:
+                tile_size = int(tile_size_var.get())
+                overlap = float(overlap_var.get())
+                if tile_size < 32 or not 0 <= overlap < 1:
+                    raise ValueError
+            except ValueError:
+                Dialogs.error("Invalid Tiling", "Tile size must be an integer >= 32 and overlap a fraction between 0 and 1.")
+                return
+            # Rename keeps the board's options
+            self.board_manager.rename_set(name, set_name, components)
+            self.board_manager.set_option(set_name, 'tiling', {'enabled': tiling_var.get(), 'tile_size': tile_size,
+                                                               'overlap': overlap, 'full_frame': tiling['full_frame']})
             self._refresh_boards()
             Dialogs.info("Set Edited", f"Board set '{set_name}' updated.")
             editor.destroy()
@@ -442,9 +640,6 @@ class ControlsFrame(ttk.LabelFrame):
         import tkinter as tk
         from tkinter import simpledialog, filedialog
         print("[DEBUG] _on_setup_set called")
-        if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'stop_camera'):
-            print("[DEBUG] Stopping main video feed for setup dialog")
-            self.app.video_frame.stop_camera()
         name = self.board_combo.get()
         if not name:
             print("[ERROR] No board set selected for setup dialog")
@@ -480,157 +675,286 @@ class ControlsFrame(ttk.LabelFrame):
         random.seed(label)
         return tuple(random.randint(0,255) for _ in range(3))
 
-    def _draw_bounding_boxes(self, frame, boxes, class_names, allowed_components, color_map):
-        import cv2
-        detected_components = {}
-        filtered_boxes = []
-        for box in boxes:
-            x1, y1, x2, y2 = [int(float(v)) for v in box.xyxy[0]]
-            class_id = int(box.cls[0].item())
-            label = class_names[class_id] if class_names and class_id in class_names else str(class_id)
-            if label not in allowed_components:
-                continue
-            color = color_map[class_id] if class_id in color_map else (0,255,0)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            detected_components[label] = detected_components.get(label, 0) + 1
-            filtered_boxes.append(box)
-        return detected_components, filtered_boxes
-
-    def _on_capture(self):
-        # PCB QA: Freeze, detect, overlay, auto-save, log, update UI, robust error handling
+    def _on_capture(self, auto=False):
+        # PCB QA: Freeze, detect, overlay, auto-save, log, update UI, robust error handling.
+        # Returns True if a board was inspected; auto (the settle trigger)
+        # only logs problems instead of opening dialogs.
         import datetime
-        import random
         import cv2
-        from pcb_detect.utils import cv2_to_tk
         # 1. Check camera and capture frame
         if not (hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'capture_image')):
-            Dialogs.error("Camera Error", "Camera is not initialized.")
+            if not auto:
+                Dialogs.error("Camera Error", "Camera is not initialized.")
             if hasattr(self.app, 'status_frame'):
                 self.app.status_frame.log_event("[ERROR] Camera is not initialized for capture.")
-            return
-        # Stop the video feed for a stable image
-        if hasattr(self.app.video_frame, 'stop_camera'):
-            self.app.video_frame.stop_camera()
-        frame = self.app.video_frame.capture_image()
+            return False
+        # Freeze the video feed for a stable image (the device stays open)
+        if hasattr(self.app.video_frame, 'freeze_preview'):
+            self.app.video_frame.freeze_preview()
+        profiler = get_profiler()
+        capture_start = time.perf_counter()
+        with profiler.stage('capture.read'):
+            frame = self.app.video_frame.capture_image()
         if frame is None:
-            Dialogs.error("Camera Error", "No frame available from camera.")
+            if not auto:
+                Dialogs.error("Camera Error", "No frame available from camera.")
             if hasattr(self.app, 'status_frame'):
                 self.app.status_frame.log_event("[ERROR] No frame available from camera during capture.")
-            return
+            return False
         # 2. Run detection
         if not (hasattr(self, 'detector') and getattr(self.detector, 'model', None)):
-            Dialogs.error("No Model Loaded", "Please load a detection model before capturing.")
+            if not auto:
+                Dialogs.error("No Model Loaded", "Please load a detection model before capturing.")
             if hasattr(self.app, 'status_frame'):
                 self.app.status_frame.log_event("[ERROR] No model loaded for detection during capture.")
-            return
-        class_names = self.detector.model.names if hasattr(self.detector.model, 'names') else None
+            return False
         conf = self.confidence_slider.get() if hasattr(self, 'confidence_slider') else 0.5
-        results = self.detector.detect(frame, conf=conf)
-        # 3. Only keep detections for components in the current set
         board_name = self.board_combo.get()
+        options = inspection.detection_options(self.detector, self.board_manager, board_name)
+        with profiler.stage('capture.detect'):
+            results = inspection.run_detection(self.detector, frame, conf=conf, options=options)
+        profiler.record_speed('capture.model', results)
+        # 3. Only keep detections for components in the current set, draw them
+        # and evaluate PASS/FAIL: all expected components present in correct quantity
         expected = None
         if hasattr(self, 'board_manager') and board_name in self.board_manager.sets:
             expected = self.board_manager.sets[board_name]
-        allowed_components = set(expected.keys()) if expected else set()
-        color_map = {}
-        if class_names:
-            for i in class_names:
-                label = class_names[i] if i in class_names else str(i)
-                if label in allowed_components:
-                    random.seed(i)
-                    color_map[i] = tuple([random.randint(0,255) for _ in range(3)])
-        detected_components = {}
-        filtered_boxes = []
-        if results and hasattr(results[0], 'boxes'):
-            detected_components, filtered_boxes = self._draw_bounding_boxes(
-                frame, results[0].boxes, class_names, allowed_components, color_map
-            )
-        # 4. Update video frame with overlay
-        img = cv2_to_tk(frame)
-        self.app.video_frame.video_label.config(image=img)
-        self.app.video_frame.video_label.image = img
+        board = getattr(self, 'compiled_board', None)
+        if board is None or board.expected_set is not expected:
+            board = self.compiled_board = self._compile_board(expected)
+        with profiler.stage('capture.draw'):
+            evaluation = board.evaluate(results[0] if results else None)
+            board.draw(frame, evaluation.result)
+            inspection.draw_roi(frame, options.get('roi'))
+        pass_fail, missing = evaluation.pass_fail, evaluation.missing
+        # 4. Update video frame with overlay (frame is not drawn on after this)
+        self.app.video_frame.show(frame)
         # 5. Assign/increment board number for each capture
-        if not hasattr(self, '_board_number'):
-            self._board_number = 1
-        else:
-            self._board_number += 1
-        board_number = self._board_number
-        if hasattr(self.app, 'status_frame') and hasattr(self.app.status_frame, 'board_label'):
-            self.app.status_frame.board_label.config(text=f"Board Number: {board_number}")
+        board_number = self._next_board_number()
         # 6. Update detection results table and status
-        batch_name = None
-        if hasattr(self, 'batch_proc_var') and self.batch_proc_var.get():
-            batch_name = getattr(self, 'current_batch', None)
-        # Pass/fail logic: all expected components present in correct quantity
-        pass_fail = "PASS"
-        missing = []
-        if expected:
-            for comp, qty in expected.items():
-                if detected_components.get(comp, 0) < qty:
-                    pass_fail = "FAIL"
-                    missing.append(f"{comp} (expected {qty}, found {detected_components.get(comp,0)})")
+        batch_name = self._active_batch_name()
         ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_msg = f"[QA] {ts} | Board: {board_name} | Board# {board_number} | Batch: {batch_name or '-'} | Result: {pass_fail}"
         if missing:
             log_msg += f" | Missing: {', '.join(missing)}"
+        if evaluation.extra:
+            log_msg += f" | Extra: {', '.join(evaluation.extra)}"
         if hasattr(self.app, 'status_frame'):
             self.app.status_frame.log_event(log_msg)
         if hasattr(self.app, 'status_frame') and hasattr(self.app.status_frame, 'update_results'):
-            # Patch results to only include filtered boxes
-            class DummyResult:
-                def __init__(self, boxes):
-                    self.boxes = boxes
-            filtered_results = [DummyResult(filtered_boxes)]
-            self.app.status_frame.update_results(filtered_results, expected)
+            self.app.status_frame.update_results(evaluation)
         # 7. Save image and results for traceability
-        ts_file = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        fname = f"snapshots/{board_name}_board{board_number}_batch{batch_name or 'NA'}_{ts_file}_{pass_fail}.png"
+        fname = inspection.snapshot_path(board_name, board_number, batch_name, pass_fail)
         try:
-            cv2.imwrite(fname, frame)
+            with profiler.stage('capture.snapshot_write'):
+                cv2.imwrite(fname, frame)
             self._last_snapshot_path = fname  # Store for export
         except Exception as e:
             if hasattr(self.app, 'status_frame'):
                 self.app.status_frame.log_event(f"[ERROR] Failed to save image: {e}")
-            return
+            return True
         # Save detection results as JSON for traceability
-        import json
-        results_fname = fname.replace('.png', '.json')
+        record = inspection.build_record(ts, board_name, board_number, batch_name, pass_fail, missing, evaluation.detected, expected)
+        with profiler.stage('capture.record_write'):
+            self._save_record(record, fname, batch_name)
+        profiler.record('capture.total', (time.perf_counter() - capture_start) * 1000.0)
+        # 8. No pass/fail dialog popups, only table and status update
+        # 9. Require user to press Continue to resume camera preview
+        self._capture_paused = True
+        self.capture_btn.config(state=tk.DISABLED)
+        self.continue_btn.config(state=tk.NORMAL)
+        return True
+
+    def _next_board_number(self):
+        if not hasattr(self, '_board_number'):
+            self._board_number = 1
+        else:
+            self._board_number += 1
+        if hasattr(self.app, 'status_frame') and hasattr(self.app.status_frame, 'board_label'):
+            self.app.status_frame.board_label.config(text=f"Board Number: {self._board_number}")
+        return self._board_number
+
+    def _active_batch_name(self):
+        if hasattr(self, 'batch_proc_var') and self.batch_proc_var.get():
+            return getattr(self, 'current_batch', None)
+        return None
+
+    def _save_record(self, record, image_path, batch_name):
         try:
-            with open(results_fname, 'w') as f:
-                json.dump({
-                    'timestamp': ts,
-                    'board': board_name,
-                    'board_number': board_number,
-                    'batch': batch_name,
-                    'result': pass_fail,
-                    'missing': missing,
-                    'detected': detected_components,
-                    'expected': expected
-                }, f, indent=2)
-            self._last_json_path = results_fname  # Store for export
+            self._last_json_path = inspection.save_record(record, image_path)  # Store for export
             # --- BatchManager Excel export logic ---
             if hasattr(self, 'batch_manager') and batch_name:
                 self.batch_manager.current_batch = batch_name
-                self.batch_manager.add_result({
-                    'timestamp': ts,
-                    'board': board_name,
-                    'board_number': board_number,
-                    'batch': batch_name,
-                    'result': pass_fail,
-                    'missing': missing,
-                    'detected': detected_components,
-                    'expected': expected
-                })
+                self.batch_manager.add_result(record)
         except Exception as e:
             if hasattr(self.app, 'status_frame'):
                 self.app.status_frame.log_event(f"[ERROR] Failed to save detection results: {e}")
-        # 8. No pass/fail dialog popups, only table and status update
-        # 9. Require user to press Continue to resume camera preview
+
+    def _on_multi_capture(self):
+        # Capture every configured view of one physical board, run one batched
+        # inference across the views and record a combined PASS/FAIL
+        views = self.app.config_manager.get('inspection_views') if hasattr(self.app, 'config_manager') else []
+        if not views:
+            Dialogs.error("No Views", "Use 'Views' to bind cameras to board sets first.")
+            return
+        if not (hasattr(self, 'detector') and getattr(self.detector, 'model', None)):
+            Dialogs.error("No Model Loaded", "Please load a detection model before capturing.")
+            return
+        inspector = getattr(self, '_multi_inspector', None)
+        if inspector is None or inspector.views != views:
+            if inspector is not None:
+                inspector.close()
+            inspector = inspection.MultiViewInspector(views, self.board_manager)
+            self._multi_inspector = inspector
+            failed = inspector.open()
+            for source in failed:
+                if hasattr(self.app, 'status_frame'):
+                    self.app.status_frame.log_event(f"[ERROR] Could not open view source '{source}'")
+        conf = self.confidence_slider.get() if hasattr(self, 'confidence_slider') else 0.5
+        if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'freeze_preview'):
+            self.app.video_frame.freeze_preview()
+        frames = inspector.capture()
+        combined, reports = inspector.inspect(self.detector, frames, conf=conf)
+        board_number = self._next_board_number()
+        batch_name = self._active_batch_name()
+        ts = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        ts_file = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        for report in reports:
+            if report['frame'] is None:
+                continue
+            path = inspection.snapshot_path(report['board'], board_number, batch_name, report['result'], ts_file)
+            try:
+                cv2.imwrite(path, report['frame'])
+                report['snapshot'] = path
+            except Exception as e:
+                if hasattr(self.app, 'status_frame'):
+                    self.app.status_frame.log_event(f"[ERROR] Failed to save image: {e}")
+        record = inspector.combined_record(ts, board_number, batch_name, combined, reports)
+        preview = inspection.mosaic([r['frame'] for r in reports if r['frame'] is not None])
+        fname = inspection.snapshot_path('MultiView', board_number, batch_name, combined, ts_file)
+        if preview is not None:
+            cv2.imwrite(fname, preview)
+            self._last_snapshot_path = fname
+            self.app.video_frame.show(preview)
+        self._save_record(record, fname, batch_name)
+        if hasattr(self.app, 'status_frame'):
+            self.app.status_frame.log_event(f"[QA] {ts} | Board# {board_number} | Batch: {batch_name or '-'} | Multi-view result: {combined}")
+            for report in reports:
+                msg = f"[QA]   {report['view']['source']} -> {report['board']}: {report['result']}"
+                if report['missing']:
+                    msg += f" | Missing: {', '.join(report['missing'])}"
+                self.app.status_frame.log_event(msg)
         self._capture_paused = True
         self.capture_btn.config(state=tk.DISABLED)
         self.continue_btn.config(state=tk.NORMAL)
 
+    def _on_views(self):
+        # Edit the camera -> board set bindings used by multi-view capture
+        views = list(self.app.config_manager.get('inspection_views') or [])
+        dlg = tk.Toplevel(self)
+        dlg.title("Multi-View Inspection")
+        dlg.geometry("460x340")
+        columns = ("Source", "Board Set")
+        tree = ttk.Treeview(dlg, columns=columns, show="headings", height=8)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=200, anchor='w')
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        def refresh_table():
+            tree.delete(*tree.get_children())
+            for v in views:
+                tree.insert('', tk.END, values=(v['source'], v['board']))
+        refresh_table()
+        entry_frame = tk.Frame(dlg)
+        entry_frame.pack(fill=tk.X, padx=10, pady=2)
+        source_combo = ttk.Combobox(entry_frame, values=list(self.camera_combo['values']), width=18)
+        source_combo.pack(side=tk.LEFT, padx=2)
+        board_combo = ttk.Combobox(entry_frame, values=list(self.board_manager.sets.keys()), width=24, state='readonly')
+        board_combo.pack(side=tk.LEFT, padx=2)
+        def add_view():
+            source = source_combo.get().strip()
+            board = board_combo.get()
+            if not source or not board:
+                Dialogs.error("Invalid Input", "Select a source and a board set.")
+                return
+            views.append({'source': source, 'board': board})
+            refresh_table()
+        def remove_view():
+            sel = tree.selection()
+            if not sel:
+                return
+            del views[tree.index(sel[0])]
+            refresh_table()
+        def save():
+            self.app.config_manager.set('inspection_views', views)
+            Dialogs.info("Views Saved", f"{len(views)} view(s) configured for multi-view capture.")
+            dlg.destroy()
+        tk.Button(entry_frame, text="Add", command=add_view).pack(side=tk.LEFT, padx=2)
+        btn_frame = ttk.Frame(dlg)
+        btn_frame.pack(fill=tk.X, pady=8, side=tk.BOTTOM)
+        ttk.Button(btn_frame, text="Remove Selected", command=remove_view).pack(side=tk.LEFT, padx=8)
+        ttk.Button(btn_frame, text="Save", command=save).pack(side=tk.RIGHT, padx=8)
+        ttk.Button(btn_frame, text="Cancel", command=dlg.destroy).pack(side=tk.RIGHT)
+        dlg.transient(self)
+        dlg.grab_set()
+
+    def _on_auto_trigger_toggle(self):
+        video_frame = getattr(self.app, 'video_frame', None)
+        if video_frame is None:
+            return
+        if not self.auto_trigger_var.get():
+            video_frame.trigger = None
+            video_frame.on_trigger = None
+            if hasattr(self.app, 'status_frame'):
+                self.app.status_frame.log_event("[INFO] Auto trigger disabled.")
+            return
+        if not (hasattr(self, 'detector') and getattr(self.detector, 'model', None)):
+            self.auto_trigger_var.set(False)
+            Dialogs.error("No Model Loaded", "Please load a detection model before enabling auto trigger.")
+            return
+        from pcb_detect.motion import SettleTrigger
+        settings = self.app.config_manager.get('auto_trigger') if hasattr(self.app, 'config_manager') else {}
+        trigger = SettleTrigger(
+            settle_frames=settings.get('settle_frames', 8),
+            motion_threshold=settings.get('motion_threshold', 3.0),
+            presence_threshold=settings.get('presence_threshold', 12.0),
+            empty_frames=settings.get('empty_frames', 5),
+        )
+        # The fixture is expected to be empty when the trigger is armed
+        frame = video_frame.capture_image()
+        if frame is not None:
+            trigger.set_background(frame)
+        video_frame.on_trigger = self._on_auto_capture
+        video_frame.trigger = trigger
+        if hasattr(self.app, 'status_frame'):
+            self.app.status_frame.log_event("[INFO] Auto trigger armed: waiting for a board to settle.")
+
+    def _on_auto_capture(self):
+        # Runs the full capture pipeline once per settled board, then resumes
+        # the preview so the trigger can see the fixture empty out again
+        if not self.auto_trigger_var.get() or getattr(self, '_capture_paused', False):
+            return
+        if getattr(self.app.video_frame, 'detecting', False):
+            return
+        retrying = getattr(self, '_auto_failed', False)
+        if hasattr(self.app, 'status_frame') and not retrying:
+            self.app.status_frame.log_event("[INFO] Auto trigger: board settled, capturing.")
+        captured = self._on_capture(auto=True)
+        settings = self.app.config_manager.get('auto_trigger') if hasattr(self.app, 'config_manager') else {}
+        hold_ms = int(float(settings.get('hold_seconds', 1.5)) * 1000)
+        self._auto_failed = not captured
+        if captured:
+            self.after(hold_ms, self._on_continue)
+            return
+        # Nothing was captured (no frame, no model): keep the preview live and
+        # the board pending, so it is captured once the problem is fixed
+        if hasattr(self.app, 'status_frame') and not retrying:
+            self.app.status_frame.log_event("[WARN] Auto trigger: capture failed; retrying while the board stays in the fixture.")
+        self.app.video_frame.start_camera()
+        trigger = getattr(self.app.video_frame, 'trigger', None)
+        if trigger is not None:
+            self.after(hold_ms, trigger.rearm)
+
     def _on_continue(self):
         # Resume camera preview after capture/detection
         if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'start_camera'):
@@ -648,6 +972,7 @@ class ControlsFrame(ttk.LabelFrame):
         delay = self.delay_slider.get() if hasattr(self, 'delay_slider') else 0.5
         if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'run_realtime_detection'):
             self.app.video_frame.detector = self.detector  # Ensure detector is set
+            self._on_board_selected()
             started = self.app.video_frame.run_realtime_detection(conf=conf, delay=delay)
             if started:
                 if hasattr(self.app, 'status_frame'):
@@ -657,6 +982,25 @@ class ControlsFrame(ttk.LabelFrame):
         else:
             Dialogs.error("Camera Error", "Camera is not initialized.")
 
+    def _on_delay_changed(self, value):
+        self.delay_value_label.config(text=f"{float(value):.2f}")
+        # Let a running real-time wait pick up the new delay right away
+        if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'wake'):
+            self.app.video_frame.wake()
+
+    def _on_pacing_toggle(self, save=True):
+        adaptive = self.adaptive_delay_var.get()
+        self.delay_slider.state(['disabled'] if adaptive else ['!disabled'])
+        if save and hasattr(self.app, 'config_manager'):
+            self.app.config_manager.set('pacing', 'adaptive' if adaptive else 'manual')
+
+    def _on_tracking_toggle(self):
+        # Read by the real-time loop on every frame, so it applies immediately
+        if hasattr(self.app, 'config_manager'):
+            self.app.config_manager.set('tracking', self.tracking_var.get())
+        if hasattr(self.app, 'status_frame'):
+            self.app.status_frame.log_event(f"[INFO] Tracking {'enabled' if self.tracking_var.get() else 'disabled'}.")
+
     def _on_pause(self):
         # Pause real-time detection
         if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'pause_detection'):
@@ -705,29 +1049,28 @@ class ControlsFrame(ttk.LabelFrame):
                 self.app.status_frame.log_event(f"[ERROR] Failed to export snapshot/results: {e}")
 
     def _on_camera_selected(self, event=None):
-        # Switch the camera feed to the selected camera
-        selected = self.camera_combo.get()
+        # Switch the video feed to the selected camera or frame source
+        selected = self.camera_combo.get().strip()
+        if not selected:
+            return
+        print(f"[DEBUG] (main window) Frame source selected: {selected}")
         try:
-            if selected.startswith("Camera "):
-                cam_idx = int(selected.split(" ")[-1])
-            else:
-                cam_idx = 0
-        except Exception:
-            cam_idx = 0
-        print(f"[DEBUG] (main window) Camera selected: {selected}, index: {cam_idx}")
-        # Set camera_index on video_frame for consistency
-        if hasattr(self.app, 'video_frame'):
-            self.app.video_frame.camera_index = cam_idx
-            print(f"[DEBUG] (main window) Set video_frame.camera_index = {cam_idx}")
-        # Stop current camera if running
-        if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'stop_camera'):
-            self.app.video_frame.stop_camera()
-        # Start new camera
-        if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'start_camera'):
-            started = self.app.video_frame.start_camera()
-            print(f"[DEBUG] (main window) start_camera() returned: {started}")
+            frame_sources.check_source_spec(selected)
+        except ValueError as e:
+            if hasattr(self.app, 'status_frame'):
+                self.app.status_frame.log_event(f"[ERROR] {e}")
+            return
+        started = False
+        if hasattr(self.app, 'video_frame') and hasattr(self.app.video_frame, 'switch_camera'):
+            started = self.app.video_frame.switch_camera(selected)
+            print(f"[DEBUG] (main window) switch_camera() returned: {started}")
+        if hasattr(self.app, 'config_manager'):
+            self.app.config_manager.set('frame_source', selected)
         if hasattr(self.app, 'status_frame'):
-            self.app.status_frame.log_event(f"[INFO] Switched to camera index {cam_idx}")
+            if started:
+                self.app.status_frame.log_event(f"[INFO] Switched to frame source '{selected}'")
+            else:
+                self.app.status_frame.log_event(f"[ERROR] Could not open frame source '{selected}'")
 
     def _on_colors(self):
         # Show only components in the selected board set for color assignment
@@ -795,6 +1138,8 @@ class ControlsFrame(ttk.LabelFrame):
                     json.dump(self._component_colors, f, indent=2)
                 Dialogs.info("Colors Updated", "Component colors updated.")
                 self._load_component_colors()
+                # Recompile the board's color table
+                self._on_board_selected()
                 dlg.destroy()
             except Exception as e:
                 Dialogs.error("Save Error", f"Failed to save colors: {e}")
@@ -945,23 +1290,6 @@ class ControlsFrame(ttk.LabelFrame):
         if hasattr(self.app, 'status_frame'):
             self.app.status_frame.log_event(f"[INFO] Batch processing {'enabled' if state else 'disabled'}.")
 
-    def draw_boxes_on_frame(frame, boxes, class_names, allowed_components, color_map):
-        import cv2
-        detected_components = {}
-        filtered_boxes = []
-        for box in boxes:
-            x1, y1, x2, y2 = [int(float(v)) for v in box.xyxy[0]]
-            class_id = int(box.cls[0].item())
-            label = class_names[class_id] if class_names and class_id in class_names else str(class_id)
-            if label not in allowed_components:
-                continue
-            color = color_map[class_id] if class_id in color_map else (0,255,0)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            detected_components[label] = detected_components.get(label, 0) + 1
-            filtered_boxes.append(box)
-        return detected_components, filtered_boxes
-
     def _load_component_colors(self):
         self._component_colors_path = os.path.join('config', 'component_colors.json')
         if not os.path.exists(self._component_colors_path):
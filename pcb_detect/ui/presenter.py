@@ -0,0 +1,102 @@
+# Thread-safe display for the video label. Background threads (preview,
+# real-time loop) hand frames to submit(); only the newest frame is kept and
+# a Tk after() tick on the main thread shows it at the display rate, so when
+# Tk falls behind superseded frames are dropped instead of piling up. call()
+# marshals any other widget update (status labels, tables) onto the same tick.
+import threading
+import time
+from collections import deque
+from pcb_detect.profiling import get_profiler
+from pcb_detect.utils import cv2_to_tk
+
+class FramePresenter:
+    def __init__(self, label, fps=60, convert=cv2_to_tk, on_error=None):
+        self.label = label
+        self.interval_ms = max(1, int(round(1000.0 / max(1, fps))))
+        # BGR frame -> PhotoImage; runs on the Tk thread for shown frames only
+        self.convert = convert
+        # on_error(exc) reports a failed call(); without it the exception
+        # propagates to Tk's report_callback_exception
+        self.on_error = on_error
+        self.shown = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._pending = None
+        self._calls = deque()
+        self._after_id = None
+        self._running = False
+        self._rate_mark = (time.monotonic(), 0, 0)
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._after_id = self.label.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            try:
+                self.label.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def submit(self, frame):
+        # Any thread. The caller must not modify frame afterwards; a frame
+        # still waiting to be shown is replaced and counted as dropped.
+        with self._lock:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = frame
+
+    def discard(self):
+        # Forget a frame that has not been shown yet (e.g. the camera stopped)
+        with self._lock:
+            self._pending = None
+
+    def call(self, fn, *args, **kwargs):
+        # Any thread: runs fn(*args, **kwargs) on the Tk thread at the next tick
+        self._calls.append((fn, args, kwargs))
+
+    def rates(self):
+        # (shown, dropped) frames per second since the previous call
+        now = time.monotonic()
+        with self._lock:
+            shown, dropped = self.shown, self.dropped
+        then, shown_before, dropped_before = self._rate_mark
+        self._rate_mark = (now, shown, dropped)
+        elapsed = now - then
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (shown - shown_before) / elapsed, (dropped - dropped_before) / elapsed
+
+    def _tick(self):
+        self._after_id = None
+        if not self._running:
+            return
+        try:
+            self.flush()
+        finally:
+            if self._running:
+                self._after_id = self.label.after(self.interval_ms, self._tick)
+
+    def flush(self):
+        # Tk thread: runs the queued calls, then shows the newest frame
+        while self._calls:
+            fn, args, kwargs = self._calls.popleft()
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                if self.on_error is None:
+                    raise  # the remaining calls run on the next tick
+                self.on_error(e)
+        with self._lock:
+            frame, self._pending = self._pending, None
+        if frame is None:
+            return
+        with get_profiler().stage('display.show'):
+            img = self.convert(frame)
+            self.label.config(image=img)
+            self.label.image = img
+        with self._lock:
+            self.shown += 1
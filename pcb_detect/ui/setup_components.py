@@ -2,6 +2,7 @@ import tkinter as tk
 from tkinter import simpledialog, filedialog
 import threading, time, os, json, datetime, cv2
 from pcb_detect.utils import cv2_to_tk
+from pcb_detect import inspection
 
 def setup_component_dialog(parent, app, model_name, board_name, camera_name, board_manager, detector, video_frame, add_tooltip, Dialogs):
     print("[DEBUG] setup_component_dialog called")
@@ -139,6 +140,10 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
     resume_btn = tk.Button(btn_section, text="Continue", width=14, state=tk.DISABLED)
     capture_btn.grid(row=0, column=0, padx=(0,8), pady=4)
     resume_btn.grid(row=0, column=1, padx=(0,8), pady=4)
+    roi_btn = tk.Button(btn_section, text="Draw ROI", width=14)
+    clear_roi_btn = tk.Button(btn_section, text="Clear ROI", width=14)
+    roi_btn.grid(row=1, column=0, padx=(0,8), pady=4)
+    clear_roi_btn.grid(row=1, column=1, padx=(0,8), pady=4)
     btn_section.grid_columnconfigure(2, weight=1)
 
     # Status/info label
@@ -195,6 +200,8 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
     # Tooltips
     add_tooltip(capture_btn, "Freeze the current frame for annotation.")
     add_tooltip(resume_btn, "Resume the live camera feed.")
+    add_tooltip(roi_btn, "Drag a rectangle on the video around the fixture.\nOnly this region is inspected for the set.")
+    add_tooltip(clear_roi_btn, "Inspect the whole camera view again.")
     add_tooltip(save_ctrls, "Save or export the current set.")
     add_tooltip(status_label, "Status and info messages.")
     # --- Table logic and handlers ---
@@ -238,13 +245,12 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
             Dialogs.error("No Components", "Add at least one component.")
             return
         board_manager.add_set(set_name, components)
+        board_manager.set_option(set_name, 'roi', roi[0])
         if hasattr(parent, '_refresh_boards'):
             parent._refresh_boards()
         Dialogs.info("Set Saved", f"Board set '{set_name}' saved.")
         stop_event.set()
         setup_win.destroy()
-        if hasattr(app, 'video_frame') and hasattr(app.video_frame, 'start_camera'):
-            app.video_frame.start_camera()
     def export_set():
         set_name = set_name_var.get().strip()
         if not set_name:
@@ -270,33 +276,38 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
                 json.dump({set_name: components}, f, indent=2)
             Dialogs.info("Exported", f"Component set exported to {file_path}")
     # --- Camera/video feed logic ---
-    cam_idx = 0
-    if camera_name and camera_name.startswith('Camera '):
-        try:
-            cam_idx = int(camera_name.split(' ')[-1])
-        except Exception:
-            cam_idx = 0
-    elif hasattr(video_frame, 'camera_index'):
-        cam_idx = video_frame.camera_index
-    print(f"[DEBUG] (setup dialog) Using camera index: {cam_idx}")
-
-    # Stop main window camera if running (before opening dialog)
-    if hasattr(app, 'video_frame') and hasattr(app.video_frame, 'stop_camera'):
-        try:
-            app.video_frame.stop_camera()
-        except Exception as e:
-            print(f"[WARN] Could not stop main window camera: {e}")
+    source_spec = camera_name
+    if not source_spec and hasattr(video_frame, 'source_spec'):
+        source_spec = video_frame.source_spec
+    print(f"[DEBUG] (setup dialog) Using frame source: {source_spec}")
 
+    # The main window keeps its feed: both subscribe to the shared broker,
+    # which opens the device only once
     # State for preview/detection
     preview_running = [True]
     last_detection = [None]
+    # Region of interest (normalized [x1, y1, x2, y2]) saved with the set
+    roi = [inspection.board_options(board_manager, board_name).get('roi')]
+    roi_mode = [False]
+    roi_start = [None]
+    display_base = [None]  # frame shown without the ROI overlay
+
+    def show_frame(frame):
+        # Shows frame with the ROI outline; safe to call from any thread
+        img = cv2_to_tk(inspection.draw_roi(frame.copy(), roi[0]))
+        def update_video():
+            if video_label.winfo_exists():
+                video_label.config(image=img)
+                video_label.image = img
+        video_label.after(0, update_video)
 
     def run_camera():
         print("[DEBUG] run_camera thread started (setup dialog)")
+        cam = None
         try:
-            from pcb_detect.camera import Camera
-            cam = Camera(cam_idx)
-            if not cam.open():
+            from pcb_detect.camera_broker import get_broker
+            cam = get_broker().subscribe(source_spec, fps=20)
+            if cam is None:
                 print("[ERROR] Could not open camera in setup dialog")
                 error_var.set("Could not open camera. It may be in use or unavailable.")
                 return
@@ -304,41 +315,33 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
                 if not preview_running[0]:
                     time.sleep(0.05)
                     continue
-                ret, frame = cam.read()
-                if not ret:
+                packet = cam.read_latest(timeout=0.5)
+                if packet is None:
                     error_var.set("Camera read failed. Check camera connection.")
-                    time.sleep(0.5)
                     continue
+                frame = packet.frame
                 last_frame[0] = frame.copy()
-                img = cv2_to_tk(frame)
-                def update_video():
-                    if video_label.winfo_exists():
-                        video_label.config(image=img)
-                        video_label.image = img
-                video_label.after(0, update_video)
+                display_base[0] = last_frame[0]
+                show_frame(frame)
                 error_var.set("")
-                time.sleep(0.05)
         except Exception as e:
             print(f"[ERROR] Exception in run_camera: {e}")
             error_var.set(f"Camera thread error: {e}")
+        finally:
+            if cam is not None:
+                cam.close()
     cam_thread = threading.Thread(target=run_camera, daemon=True)
     cam_thread.start()
 
     def draw_bboxes_on_frame(frame, results, class_names):
         # Draw bounding boxes and labels on frame
-        if not results or not hasattr(results[0], 'boxes'):
+        if not results or results[0] is None:
             return frame, []
         boxes = []
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = [float(v) for v in box.xyxy[0]]
-            h, w, _ = frame.shape
+        h, w, _ = frame.shape
+        for (x1, y1, x2, y2), class_id in zip(results[0].xyxy.tolist(), results[0].cls.tolist()):
             nx1, ny1, nx2, ny2 = x1/w, y1/h, x2/w, y2/h
-            label = str(box.cls[0].item())
-            if class_names:
-                try:
-                    label = class_names[int(box.cls[0].item())]
-                except Exception:
-                    pass
+            label = class_names[class_id] if class_names and class_id in class_names else str(class_id)
             boxes.append((nx1, ny1, nx2, ny2, label))
             color = (0, 255, 0)
             cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
@@ -358,8 +361,7 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
             error_var.set("No frame to capture.")
             return
         try:
-            from pcb_detect.detection import Detector
-            local_detector = Detector()
+            from pcb_detect.model_cache import get_model_cache
             model_path = None
             if detector and hasattr(detector, 'model_path') and detector.model_path:
                 model_path = detector.model_path
@@ -368,40 +370,41 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
             if not model_path or not os.path.isfile(model_path):
                 error_var.set("No model loaded or model file missing. Please load a detection model.")
                 return
-            local_detector.load_model(model_path)
+            # Shared with the main window, so repeated captures do not reload
+            backend = getattr(detector, 'backend', None) or getattr(getattr(video_frame, 'detector', None), 'backend', 'torch')
+            local_detector = get_model_cache().get(model_path, backend=backend)
+        except Exception as e:
+            error_var.set(f"Detection failed: {e}")
+            print(f"[ERROR] Detection failed: {e}")
+            return
+        try:
             nonlocal class_names
             if hasattr(local_detector, 'model') and hasattr(local_detector.model, 'names'):
                 class_names = list(local_detector.model.names.values())
-            results = local_detector.detect(frame, conf=0.5)  # Fixed confidence value
+            # No class filtering here: setup is where the set's classes are found
+            options = inspection.board_options(board_manager, set_name_var.get().strip() or board_name)
+            options['roi'] = roi[0]
+            results = inspection.run_detection(local_detector, frame, conf=0.5, options=options)  # Fixed confidence value
             frame_with_boxes, boxes = draw_bboxes_on_frame(frame.copy(), results, class_names)
             detected_boxes.clear()
             detected_boxes.extend(boxes)
             last_detection[0] = results
             # Show frame with boxes
-            img = cv2_to_tk(frame_with_boxes)
-            def update_video():
-                if video_label.winfo_exists():
-                    video_label.config(image=img)
-                    video_label.image = img
-            video_label.after(0, update_video)
+            display_base[0] = frame_with_boxes
+            show_frame(frame_with_boxes)
             # Update table with detected components
             detected_components.clear()
             comp_tree.delete(*comp_tree.get_children())  # Ensure table is cleared before inserting
-            if results and hasattr(results[0], 'boxes'):
-                for box in results[0].boxes:
-                    label = str(box.cls[0].item())
-                    if class_names:
-                        try:
-                            label = class_names[int(box.cls[0].item())]
-                        except Exception:
-                            pass
-                    detected_components[label] = detected_components.get(label, 0) + 1
+            if results and results[0] is not None:
+                detected_components.update(results[0].counts())
                 for label, qty in detected_components.items():
                     comp_tree.insert('', tk.END, values=(label, label, qty))
             status_var.set("Detection complete. Edit table or save as needed.")
         except Exception as e:
             error_var.set(f"Detection failed: {e}")
             print(f"[ERROR] Detection failed: {e}")
+        finally:
+            get_model_cache().release(local_detector)
 
     def do_resume():
         preview_running[0] = True
@@ -414,25 +417,61 @@ def setup_component_dialog(parent, app, model_name, board_name, camera_name, boa
     capture_btn.config(command=do_capture)
     resume_btn.config(command=do_resume)
 
-    # Video click for crop
+    # ROI drawing: drag on the video while "Draw ROI" is active
+    def label_to_frame(event):
+        # The image is centered in the label at its native size
+        h, w = display_base[0].shape[:2]
+        return (event.x - (video_label.winfo_width() - w) / 2.0,
+                event.y - (video_label.winfo_height() - h) / 2.0, w, h)
+
+    def start_roi():
+        roi_mode[0] = True
+        roi_btn.config(relief=tk.SUNKEN)
+        status_var.set("Drag a rectangle around the fixture area.")
+
+    def clear_roi():
+        roi[0] = None
+        if display_base[0] is not None:
+            show_frame(display_base[0])
+        status_var.set("ROI cleared; the whole view is inspected.")
+
     def on_video_click(event):
-        pass  # No snapshot/crop logic
+        if roi_mode[0] and display_base[0] is not None:
+            roi_start[0] = label_to_frame(event)[:2]
+
+    def on_video_drag(event):
+        if roi_start[0] is None:
+            return
+        x, y, w, h = label_to_frame(event)
+        roi[0] = inspection.normalize_roi(roi_start[0][0], roi_start[0][1], x, y, w, h)
+        show_frame(display_base[0])
+
+    def on_video_release(event):
+        if roi_start[0] is None:
+            return
+        on_video_drag(event)
+        roi_start[0] = None
+        roi_mode[0] = False
+        roi_btn.config(relief=tk.RAISED)
+        if roi[0] and inspection.roi_pixels(roi[0], display_base[0].shape) is None:
+            roi[0] = None
+            status_var.set("ROI too small; cleared.")
+        else:
+            status_var.set("ROI set. Capture to check detection, Save & Continue to keep it.")
+
+    roi_btn.config(command=start_roi)
+    clear_roi_btn.config(command=clear_roi)
     video_label.bind('<Button-1>', on_video_click)
+    video_label.bind('<B1-Motion>', on_video_drag)
+    video_label.bind('<ButtonRelease-1>', on_video_release)
 
     # On close
     def on_close():
         stop_event.set()
         setup_win.destroy()
-        # Wait a moment to ensure camera is released before restarting main feed
-        time.sleep(0.2)
-        # Ensure main window's video_frame is reset and camera is started
-        if hasattr(app, 'video_frame'):
-            if hasattr(app.video_frame, 'paused'):
-                app.video_frame.paused = False
-            if hasattr(app.video_frame, 'running'):
-                app.video_frame.running = False
-            if hasattr(app.video_frame, 'start_camera'):
-                app.video_frame.start_camera()
+        # Make sure the main window feed is live (a no-op if it already is)
+        if hasattr(app, 'video_frame') and hasattr(app.video_frame, 'start_camera'):
+            app.video_frame.start_camera()
     setup_win.protocol("WM_DELETE_WINDOW", on_close)
 
     return setup_win
\ No newline at end of file
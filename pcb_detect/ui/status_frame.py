@@ -1,5 +1,6 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
+from pcb_detect.profiling import get_profiler
 
 class StatusFrame(ttk.Frame):
     def __init__(self, parent, app):
@@ -11,12 +12,16 @@ class StatusFrame(ttk.Frame):
         # Mode/FPS/Skipped/Board/Batch labels
         self.mode_label = ttk.Label(self, text="Mode: Idle")
         self.fps_label = ttk.Label(self, text="FPS: 0.00")
+        self.delay_label = ttk.Label(self, text="Delay: -")
         self.skipped_label = ttk.Label(self, text="Skipped Frames: 0")
+        self.reused_label = ttk.Label(self, text="Unchanged Frames (inference skipped): 0")
         self.board_label = ttk.Label(self, text="Board Number: -")
         self.batch_label = ttk.Label(self, text="Current Batch: Default")
         self.mode_label.pack(anchor='w')
         self.fps_label.pack(anchor='w')
+        self.delay_label.pack(anchor='w')
         self.skipped_label.pack(anchor='w')
+        self.reused_label.pack(anchor='w')
         self.board_label.pack(anchor='w')
         self.batch_label.pack(anchor='w')
         # Detection Results Treeview
@@ -37,6 +42,24 @@ class StatusFrame(ttk.Frame):
         self.history_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.history_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.history_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        # Stage latency panel (profiling is off unless enabled here)
+        self.profiler = get_profiler()
+        self.latency_frame = ttk.LabelFrame(self, text="Stage Latency (ms)")
+        self.latency_controls = ttk.Frame(self.latency_frame)
+        self.profile_var = tk.BooleanVar(value=self.profiler.enabled)
+        self.profile_chk = ttk.Checkbutton(self.latency_controls, text="Profile stages", variable=self.profile_var, command=self._on_profile_toggle)
+        self.latency_export_btn = ttk.Button(self.latency_controls, text="Export", command=self._export_latency)
+        self.latency_reset_btn = ttk.Button(self.latency_controls, text="Reset", command=self._reset_latency)
+        self.profile_chk.pack(side=tk.LEFT)
+        self.latency_reset_btn.pack(side=tk.RIGHT, padx=2)
+        self.latency_export_btn.pack(side=tk.RIGHT, padx=2)
+        self.latency_controls.pack(fill=tk.X)
+        self.latency_tree = ttk.Treeview(self.latency_frame, columns=("Stage", "p50", "p95", "p99", "n"), show="headings", height=6)
+        for col, width in (("Stage", 170), ("p50", 60), ("p95", 60), ("p99", 60), ("n", 50)):
+            self.latency_tree.heading(col, text=col)
+            self.latency_tree.column(col, width=width, anchor='w' if col == "Stage" else 'e')
+        self.latency_frame.pack(fill=tk.BOTH, expand=False, pady=5)
+        self._on_profile_toggle(save=False)
         # Status Console
         self.console_frame = ttk.LabelFrame(self, text="Status Console")
         self.console_text = tk.Text(self.console_frame, height=5, wrap=tk.WORD)
@@ -53,33 +76,61 @@ class StatusFrame(ttk.Frame):
         self.progress.pack(fill=tk.X, pady=2)
         self.progress.pack_forget()  # Hide by default
 
+    def show_progress(self):
+        self.progress.pack(fill=tk.X, pady=2)
+        self.progress.start(10)
+
+    def hide_progress(self):
+        self.progress.stop()
+        self.progress.pack_forget()
+
+    def _on_profile_toggle(self, save=True):
+        self.profiler.enabled = self.profile_var.get()
+        if save and hasattr(self.app, 'config_manager'):
+            self.app.config_manager.set('profiling', self.profiler.enabled)
+        if self.profiler.enabled:
+            self.latency_tree.pack(fill=tk.BOTH, expand=True)
+            self._refresh_latency()
+        else:
+            self.latency_tree.pack_forget()
+
+    def _refresh_latency(self):
+        # Polls the profiler once a second while profiling is enabled
+        if not self.profiler.enabled or not self.winfo_exists():
+            return
+        self.latency_tree.delete(*self.latency_tree.get_children())
+        for stage, row in self.profiler.summary().items():
+            self.latency_tree.insert('', 'end', values=(stage, f"{row['p50']:.1f}", f"{row['p95']:.1f}", f"{row['p99']:.1f}", row['count']))
+        self.after(1000, self._refresh_latency)
+
+    def _reset_latency(self):
+        self.profiler.reset()
+        self.latency_tree.delete(*self.latency_tree.get_children())
+
+    def _export_latency(self):
+        path = filedialog.asksaveasfilename(title="Export Stage Latency", defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if path:
+            self.profiler.export(path)
+            self.log_event(f"[INFO] Stage latency exported to {path}")
+
     def _clear_console(self):
         self.console_text.delete('1.0', tk.END)
 
-    def update_results(self, results, expected=None):
+    def update_results(self, evaluation):
+        # evaluation: inspection.BoardEvaluation of the selected board set;
+        # the counts were already taken there
         self.results_tree.delete(*self.results_tree.get_children())
-        summary = {}
-        # Try to get class_names from the detector if available
-        class_names = None
-        if hasattr(self.app, 'controls') and hasattr(self.app.controls, 'detector') and getattr(self.app.controls.detector, 'model', None):
-            class_names = self.app.controls.detector.model.names if hasattr(self.app.controls.detector.model, 'names') else None
-        if results and hasattr(results[0], 'boxes'):
-            for box in results[0].boxes:
-                class_id = int(box.cls[0].item())
-                label = class_names[class_id] if class_names and class_id in class_names else str(class_id)
-                summary[label] = summary.get(label, 0) + 1
-        # Only show summary for components in expected (current set)
-        filtered_summary = summary
-        if expected:
-            filtered_summary = {k: summary.get(k, 0) for k in expected.keys()}
-            for comp, exp_count in expected.items():
-                detected = summary.get(comp, 0)
-                status = '✔' if detected == exp_count else '✘'
-                color = 'green' if detected == exp_count else 'red'
-                self.results_tree.insert('', 'end', values=(status, comp, exp_count, detected), tags=(color,))
+        board = evaluation.board
+        for comp, exp_count, detected in zip(board.components, board.quantities.tolist(), evaluation.found.tolist()):
+            status = '✔' if detected == exp_count else '✘'
+            color = 'green' if detected == exp_count else 'red'
+            self.results_tree.insert('', 'end', values=(status, comp, exp_count, detected), tags=(color,))
+        if board.components:
             self.results_tree.tag_configure('green', foreground='green')
             self.results_tree.tag_configure('red', foreground='red')
-        self.summary_label.config(text=f"Component Summary: {', '.join([f'{k}: {v}' for k, v in filtered_summary.items()])}")
+        summary = evaluation.summary()
+        self.summary_label.config(text=f"Component Summary: {', '.join([f'{k}: {v}' for k, v in summary.items()])}")
 
     def log_event(self, message):
         self.console_text.insert(tk.END, message + '\n')
@@ -93,8 +144,16 @@ class StatusFrame(ttk.Frame):
         if len(lines) > 5:
             self.history_text.delete('1.0', f'{len(lines)-5}.0')
     
-    def update_fps(self, fps):
-        self.fps_label.config(text=f"FPS: {fps:.2f}")
+    def update_fps(self, fps, shown=None, dropped=None):
+        # fps: frames processed; shown/dropped: display rate (frames/s) and
+        # frames superseded before Tk could show them
+        text = f"FPS: {fps:.2f}"
+        if shown is not None:
+            text += f" (shown {shown:.1f}/s, dropped {dropped or 0:.1f}/s)"
+        self.fps_label.config(text=text)
+
+    def update_delay(self, delay, adaptive=False):
+        self.delay_label.config(text=f"Delay: {delay:.2f} s ({'adaptive' if adaptive else 'manual'})")
 
     def update_mode(self, mode):
         self.mode_label.config(text=f"Mode: {mode}")
@@ -102,6 +161,9 @@ class StatusFrame(ttk.Frame):
     def update_skipped(self, skipped):
         self.skipped_label.config(text=f"Skipped Frames: {skipped}")
 
+    def update_reused(self, reused):
+        self.reused_label.config(text=f"Unchanged Frames (inference skipped): {reused}")
+
     def update_batch(self, batch_name=None):
         if batch_name:
             self.batch_label.config(text=f"Current Batch: {batch_name}")
@@ -2,10 +2,15 @@ import tkinter as tk
 from tkinter import ttk
 import cv2
 from PIL import Image, ImageTk, ImageDraw
-from pcb_detect.camera import Camera
+from pcb_detect.camera_broker import get_broker
 from pcb_detect.detection import Detector
 from pcb_detect.results_manager import ResultsManager
-from pcb_detect.utils import cv2_to_tk
+from pcb_detect.motion import ChangeDetector
+from pcb_detect.tracking import BoxTracker
+from pcb_detect.scheduler import AdaptivePacer
+from pcb_detect import inspection
+from pcb_detect.profiling import get_profiler
+from pcb_detect.ui.presenter import FramePresenter
 import threading
 import time
 import numpy as np
@@ -19,44 +24,104 @@ class VideoFrame(ttk.LabelFrame):
     def _build(self):
         self.video_label = tk.Label(self, bg="black", width=640, height=480)
         self.video_label.pack(fill=tk.BOTH, expand=True)
-        self.camera = Camera()
+        # Threads never touch the label: frames and status updates go through
+        # the presenter, which applies them on the Tk thread
+        display_fps = self.app.config_manager.get('display_fps') if hasattr(self.app, 'config_manager') else 60
+        self.presenter = FramePresenter(self.video_label, fps=display_fps or 60, on_error=self._on_ui_error)
+        self.presenter.start()
+        self.source_spec = self.app.config_manager.get('frame_source') if hasattr(self.app, 'config_manager') else 'Camera 0'
+        # Frames come from the shared camera broker so the setup dialog and
+        # real-time loop can use the same device without reopening it
+        self.subscription = None
+        self._preview_thread = None
         self.detector = Detector()
         self.results_manager = ResultsManager()
         self.running = False
         self.paused = False
+        self.detecting = False
+        self.frozen = False
+        # Optional SettleTrigger fed by the preview; on_trigger runs on the Tk thread
+        self.trigger = None
+        self.on_trigger = None
         self.frame = None
+        self.frame_seq = 0
+        # Per-board inference options (e.g. tiling) of the selected board set
+        self.detection_options = {}
         self.conf = 0.5  # Default confidence
         self.delay = 0.5  # Default delay
+        # Set to cut a real-time wait short (pause/resume/stop, delay slider moved)
+        self._wake = threading.Event()
         self._setup_bindings()
 
+    def show(self, frame):
+        # Displays a BGR frame from any thread (the newest one wins)
+        self.presenter.submit(frame)
+
+    def _status(self, method, *args):
+        # StatusFrame update from a worker thread, applied on the Tk thread
+        status = getattr(self.app, 'status_frame', None)
+        if status is not None and hasattr(status, method):
+            self.presenter.call(getattr(status, method), *args)
+
+    def _on_ui_error(self, error):
+        # A failed presenter call lands in the event log; Tk reports it if
+        # there is no log to write to
+        status = getattr(self.app, 'status_frame', None)
+        if status is None:
+            raise error
+        status.log_event(f"[ERROR] UI update failed: {error}")
+
     def _setup_bindings(self):
         self.video_label.bind('<Button-1>', self._on_click)
         # Add more bindings for pan/zoom if needed
 
     def start_camera(self):
-        self.stop_camera()  # Always stop previous camera and thread
-        if not self.camera.open():
-            return False
+        # Idempotent: keeps an existing subscription and preview thread
+        self.frozen = False
+        if self.subscription is None:
+            try:
+                self.subscription = get_broker().subscribe(self.source_spec)
+            except ValueError as e:
+                self._status('log_event', f"[ERROR] {e}")
+                return False
+            if self.subscription is None:
+                return False
         self.running = True
-        threading.Thread(target=self._update_frame, daemon=True).start()
+        if not (self._preview_thread and self._preview_thread.is_alive()):
+            self._preview_thread = threading.Thread(target=self._update_frame, daemon=True)
+            self._preview_thread.start()
         return True
 
     def stop_camera(self):
         self.running = False
-        time.sleep(0.1)  # Give time for thread to exit
-        self.camera.release()
+        self.detecting = False
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+        self.presenter.discard()
         self.video_label.config(image=None)
         self.video_label.image = None
 
+    def freeze_preview(self):
+        # Hold the current frame on screen without releasing the device
+        self.frozen = True
+
     def _update_frame(self):
         while self.running:
-            ret, frame = self.camera.read()
-            if not ret:
+            subscription = self.subscription
+            if self.detecting or self.frozen or subscription is None:
+                # The real-time loop owns the display while it is running
+                time.sleep(0.05)
+                continue
+            packet = subscription.read_latest(timeout=0.1)
+            if packet is None or self.frozen:
                 continue
-            self.frame = frame
-            img = cv2_to_tk(frame)
-            self.video_label.config(image=img)
-            self.video_label.image = img
+            self.frame = packet.frame
+            self.frame_seq = packet.seq
+            trigger = self.trigger
+            if trigger is not None and trigger.update(packet.frame) and self.on_trigger:
+                self.presenter.call(self.on_trigger)
+            self.show(packet.frame)
             time.sleep(0.03)
 
     def capture_image(self):
@@ -70,13 +135,13 @@ class VideoFrame(ttk.LabelFrame):
 
     def start_detection(self, conf=0.5):
         if self.frame is not None and self.detector.model:
-            results = self.detector.detect(self.frame, conf=conf)
-            frame_with_boxes = self.draw_bboxes(self.frame, results)
-            img = cv2_to_tk(frame_with_boxes)
-            self.video_label.config(image=img)
-            self.video_label.image = img
+            results = inspection.run_detection(self.detector, self.frame, conf=conf, options=self.detection_options)
+            self.show(self.draw_bboxes(self.frame, results))
             if hasattr(self, 'on_detection'):
-                self.on_detection(results)
+                board = getattr(getattr(self.app, 'controls', None), 'compiled_board', None)
+                if board is None:
+                    board = inspection.CompiledBoardSet(None, inspection.class_names_of(self.detector))
+                self.on_detection(board.evaluate(results[0] if results else None))
             return results
         return None
 
@@ -88,79 +153,122 @@ class VideoFrame(ttk.LabelFrame):
     def run_realtime_detection(self, conf=0.5, delay=0.5):
         self.conf = conf
         self.delay = delay
-        if not self.camera.open():
+        if not self.start_camera():
+            return False
+        # The loop takes its own subscription so it tracks its own frame seq
+        subscription = get_broker().subscribe(self.source_spec)
+        if subscription is None:
             return False
-        self.running = True
         self.paused = False
+        self.detecting = True
         # Disable capture button during real-time detection
         if hasattr(self.app, 'controls'):
             self.app.controls.capture_btn.config(state='disabled')
         def loop():
-            class_names = None
-            color_map = {}
-            set_components = []
             skipped_frames = 0
             last_time = time.time()
             frame_count = 0
             fps = 0.0
-            if hasattr(self.app, 'controls') and hasattr(self.app.controls, 'detector') and getattr(self.app.controls.detector, 'model', None):
-                class_names = self.app.controls.detector.model.names if hasattr(self.app.controls.detector.model, 'names') else None
-            board_name = self.app.controls.board_combo.get() if hasattr(self.app, 'controls') else None
-            if hasattr(self.app.controls, 'board_manager') and board_name in self.app.controls.board_manager.sets:
-                set_components = list(self.app.controls.board_manager.sets[board_name].keys())
-            component_colors = getattr(self.app.controls, '_component_colors', {})
-            for comp in set_components:
-                c = component_colors.get(comp)
-                if c:
-                    if isinstance(c, str) and c.startswith('#'):
-                        h = c.lstrip('#')
-                        color_map[comp] = tuple(int(h[i:i+2], 16) for i in (0,2,4))
-                    elif isinstance(c, (list, tuple)):
-                        color_map[comp] = tuple(int(x) for x in c)
-            import random
-            for comp in set_components:
-                if comp not in color_map:
-                    random.seed(comp)
-                    color_map[comp] = tuple(random.randint(0,255) for _ in range(3))
-            def get_label(class_id):
-                if class_names and class_id in class_names:
-                    return class_names[class_id]
-                return str(class_id)
-            while self.running:
+            controls = getattr(self.app, 'controls', None)
+            # The selected board set, compiled by the controls (recompiled
+            # there when the board, the model or the colors change)
+            fallback_board = inspection.CompiledBoardSet(None, inspection.class_names_of(self.detector))
+            # Change gate: skip inference and reuse the last results while the
+            # scene matches the last inferred frame
+            gate = None
+            config = getattr(self.app, 'config_manager', None)
+            if config is not None and config.get('change_gate'):
+                gate = ChangeDetector(threshold=config.get('change_threshold'))
+                self._status('log_event', f"[INFO] Change gate on: frames within {gate.threshold:g} gray levels of the last inferred one reuse its result")
+            results = None
+            inferred_conf = None
+            inferred_options = None
+            reused = 0
+            profiler = get_profiler()
+            # Tracking mode: detect on keyframes, carry boxes by optical flow in between
+            tracker = None
+            shown_interval = None
+            # Adaptive pacing: the delay follows measured frame cost instead of the slider
+            pacer = None
+            shown_delay = None
+            while self.running and self.detecting:
                 if self.paused:
-                    time.sleep(0.1)
+                    self._wait(0.5)
                     continue
                 # Always fetch latest confidence and delay values from sliders
                 if hasattr(self.app, 'controls'):
                     self.conf = self.app.controls.confidence_slider.get()
                     self.delay = self.app.controls.delay_slider.get()
                 start_time = time.time()
-                ret, frame = self.camera.read()
-                if not ret:
-                    skipped_frames += 1
-                    if hasattr(self.app, 'status_frame'):
-                        self.app.status_frame.update_skipped(skipped_frames)
+                # Always infer on the newest frame; frames grabbed while the
+                # previous inference ran are dropped rather than queued
+                with profiler.stage('realtime.read'):
+                    packet = subscription.read_latest(timeout=0.5)
+                if packet is None:
                     continue
+                if packet.dropped:
+                    skipped_frames += packet.dropped
+                    self._status('update_skipped', skipped_frames)
+                frame = packet.frame
                 self.frame = frame
-                results = self.detector.detect(frame, conf=self.conf)
-                frame_with_boxes = frame.copy()
-                if results and hasattr(results[0], 'boxes'):
-                    filtered_boxes = []
-                    for box in results[0].boxes:
-                        class_id = int(box.cls[0].item())
-                        label = get_label(class_id)
-                        if label not in set_components:
-                            continue
-                        x1, y1, x2, y2 = [int(float(v)) for v in box.xyxy[0]]
-                        color = color_map.get(label, (0,255,0))
-                        cv2.rectangle(frame_with_boxes, (x1, y1), (x2, y2), color, 2)
-                        cv2.putText(frame_with_boxes, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-                        filtered_boxes.append(box)
-                img = cv2_to_tk(frame_with_boxes)
-                self.video_label.config(image=img)
-                self.video_label.image = img
-                if hasattr(self, 'on_detection'):
-                    self.on_detection(results)
+                self.frame_seq = packet.seq
+                options = self.detection_options
+                if config is not None and config.get('tracking'):
+                    if tracker is None:
+                        tracker = BoxTracker(max_interval=config.get('tracking_max_interval'))
+                elif tracker is not None:
+                    tracker = None
+                    results = None
+                    shown_interval = None
+                    self._status('update_mode', 'Real-time')
+                inference_start = None
+                if tracker is not None:
+                    fresh = (tracker.needs_keyframe() or results is None or self.conf != inferred_conf
+                             or options is not inferred_options)
+                    if fresh:
+                        inference_start = time.time()
+                        with profiler.stage('realtime.detect'):
+                            detected = inspection.run_detection(self.detector, frame, conf=self.conf, options=options)
+                        profiler.record_speed('realtime.model', detected)
+                        tracker.update(frame, detected[0] if detected and detected[0] is not None else np.zeros((0, 6), dtype=np.float32))
+                        inferred_conf = self.conf
+                        inferred_options = options
+                    else:
+                        with profiler.stage('realtime.track'):
+                            tracker.propagate(frame)
+                    results = [tracker.result(self.detector.model.names)] if self.detector.model else []
+                    if tracker.interval != shown_interval:
+                        shown_interval = tracker.interval
+                        self._status('update_mode', f'Real-time (tracking, keyframe every {shown_interval} frames)')
+                else:
+                    with profiler.stage('realtime.change_gate'):
+                        fresh = (gate is None or results is None or self.conf != inferred_conf
+                                 or options is not inferred_options or gate.has_changed(frame))
+                    if fresh:
+                        inference_start = time.time()
+                        with profiler.stage('realtime.detect'):
+                            results = inspection.run_detection(self.detector, frame, conf=self.conf, options=options)
+                        profiler.record_speed('realtime.model', results)
+                        inferred_conf = self.conf
+                        inferred_options = options
+                        if gate is not None:
+                            gate.mark_inferred(frame)
+                    else:
+                        reused += 1
+                        self._status('update_reused', reused)
+                with profiler.stage('realtime.evaluate'):
+                    board = getattr(controls, 'compiled_board', None) or fallback_board
+                    evaluation = board.evaluate(results[0] if results else None)
+                with profiler.stage('realtime.draw'):
+                    frame_with_boxes = frame.copy()
+                    # Only the set's components; tracked boxes keep their id between keyframes
+                    board.draw(frame_with_boxes, evaluation.result)
+                    inspection.draw_roi(frame_with_boxes, options.get('roi'))
+                # Shown (or superseded) by the presenter on the Tk thread
+                self.show(frame_with_boxes)
+                if fresh and hasattr(self, 'on_detection'):
+                    self.presenter.call(self.on_detection, evaluation)
+                profiler.record('realtime.frame', (time.time() - start_time) * 1000.0)
                 # FPS calculation
                 frame_count += 1
                 now = time.time()
@@ -169,42 +277,83 @@ class VideoFrame(ttk.LabelFrame):
                     fps = frame_count / elapsed
                     frame_count = 0
                     last_time = now
-                    if hasattr(self.app, 'status_frame'):
-                        self.app.status_frame.update_fps(fps)
-                # Wait for the full delay interval before updating the frame again
-                total_wait = 0
-                while total_wait < self.delay and self.running and not self.paused:
-                    time.sleep(0.05)
-                    total_wait += 0.05
-        threading.Thread(target=loop, daemon=True).start()
+                    self._status('update_fps', fps, *self.presenter.rates())
+                # Tracking runs at camera rate and paces inference by keyframes
+                if tracker is not None:
+                    continue
+                if config is not None and config.get('pacing') == 'adaptive':
+                    if pacer is None:
+                        pacer = AdaptivePacer(target_latency_ms=config.get('target_latency_ms'),
+                                              cpu_budget=config.get('cpu_budget'))
+                    inference_ms = (time.time() - inference_start) * 1000.0 if inference_start else None
+                    pacer.record((time.time() - start_time) * 1000.0, inference_ms)
+                    delay = pacer.next_delay()
+                    self._status('update_delay', delay, True)
+                    self._wait_until(time.time() + delay)
+                else:
+                    pacer = None
+                    if self.delay != shown_delay:
+                        shown_delay = self.delay
+                        self._status('update_delay', self.delay, False)
+                    # Wait for the full delay interval before updating the frame
+                    # again; a moved slider takes effect within the current wait
+                    wait_start = time.time()
+                    self._wait_until(lambda: wait_start + self._slider_delay())
+        def run():
+            try:
+                loop()
+            finally:
+                subscription.close()
+        threading.Thread(target=run, daemon=True).start()
         # Set mode label
         if hasattr(self.app, 'status_frame'):
             self.app.status_frame.update_mode('Real-time')
         return True
 
+    def _wait(self, timeout):
+        # Event-based sleep; returns early when wake() is called
+        if self._wake.wait(timeout):
+            self._wake.clear()
+
+    def _wait_until(self, deadline):
+        # deadline: a time.time() value, or a callable re-read after every wake
+        while self.running and self.detecting and not self.paused:
+            remaining = (deadline() if callable(deadline) else deadline) - time.time()
+            if remaining <= 0:
+                break
+            self._wait(remaining)
+
+    def _slider_delay(self):
+        if hasattr(self.app, 'controls') and hasattr(self.app.controls, 'delay_slider'):
+            self.delay = self.app.controls.delay_slider.get()
+        return self.delay
+
+    def wake(self):
+        self._wake.set()
+
     def pause_detection(self):
         self.paused = True
+        self.wake()
 
     def resume_detection(self):
         self.paused = False
+        self.wake()
 
     def stop_detection(self):
-        self.running = False
-        self.camera.release()
+        self.detecting = False
+        self.wake()
         # Re-enable capture button after stopping real-time detection
         if hasattr(self.app, 'controls'):
             self.app.controls.capture_btn.config(state='normal')
 
     def draw_bboxes(self, frame, results):
         # Draw bounding boxes and labels on frame using PIL
-        if not results or not hasattr(results[0], 'boxes'):
+        if not results or results[0] is None:
             return frame
         img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
         draw = ImageDraw.Draw(img)
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            label = str(box.cls[0].item())
-            conf = box.conf[0].item()
+        result = results[0]
+        for (x1, y1, x2, y2), label, conf in zip(result.xyxy.astype(int).tolist(), result.cls.tolist(), result.conf.tolist()):
             draw.rectangle([x1, y1, x2, y2], outline='red', width=2)
             draw.text((x1, y1), f"{label} {conf:.2f}", fill='yellow')
         return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
@@ -219,10 +368,9 @@ class VideoFrame(ttk.LabelFrame):
             cv2.putText(frame, label, (x1, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         return frame
 
-    def switch_camera(self, camera_index):
-        # Stop current camera feed
+    def switch_camera(self, source_spec):
+        # Accepts a camera index or any frame source spec ("Camera 1",
+        # "file:shift.mp4", "dir:snapshots", "synthetic:1280x720@30")
         self.stop_camera()
-        # Set new camera index
-        self.camera = Camera(camera_index)
-        # Start camera feed
-        self.start_camera()
+        self.source_spec = source_spec
+        return self.start_camera()
@@ -1,6 +1,29 @@
 # Unit and integration tests for PCBDetectApp and modules
+import base64
+import glob
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+import numpy as np
+import cv2
+from pcb_detect.camera import Camera
+from pcb_detect.camera_broker import CameraBroker
+from pcb_detect import benchmark, bulk_inspection, camera_probe, inspection, quantization, server
+from pcb_detect.model_manager import ModelManager
+from pcb_detect.motion import ChangeDetector, SettleTrigger
+from pcb_detect.detection import DetectionResult, Detector, tile_grid
+from pcb_detect.model_cache import ModelCache
+from pcb_detect.profiling import Profiler
+from pcb_detect.tracking import BoxTracker
+from pcb_detect.scheduler import AdaptivePacer
+from pcb_detect.ui.presenter import FramePresenter
+from pcb_detect.inference_worker import RemoteDetector, WorkerError
 from pcb_detect.config_manager import ConfigManager
+from pcb_detect.frame_sources import ImageDirectorySource, SyntheticSource, create_frame_source, parse_source_spec
 from pcb_detect.board_manager import BoardManager
 from pcb_detect.batch_manager import BatchManager
 
@@ -20,6 +43,19 @@ class TestBoardManager(unittest.TestCase):
         bm.delete_set('TestSet')
         self.assertNotIn('TestSet', bm.sets)
 
+    def test_options_follow_rename_and_delete(self):
+        if not os.path.exists(BoardManager.SETTINGS_PATH):
+            self.addCleanup(lambda: os.path.exists(BoardManager.SETTINGS_PATH) and os.remove(BoardManager.SETTINGS_PATH))
+        bm = BoardManager()
+        bm.add_set('TestSet', {'Resistor': 1})
+        bm.set_option('TestSet', 'tiling', {'enabled': True, 'tile_size': 512})
+        bm.rename_set('TestSet', 'TestSet2')
+        self.assertNotIn('TestSet', bm.sets)
+        self.assertEqual(BoardManager().get_options('TestSet2')['tiling']['tile_size'], 512)
+        self.assertTrue(inspection.tiling_options(bm.get_options('TestSet2'))['enabled'])
+        bm.delete_set('TestSet2')
+        self.assertEqual(BoardManager().get_options('TestSet2'), {})
+
 class TestBatchManager(unittest.TestCase):
     def test_create_delete_batch(self):
         bm = BatchManager()
@@ -28,5 +64,908 @@ class TestBatchManager(unittest.TestCase):
         bm.delete_batch(name)
         self.assertNotIn(name, bm.batches)
 
+class TestCameraGrabber(unittest.TestCase):
+    def _write_video(self, path, n_frames):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (64, 48))
+        for i in range(n_frames):
+            writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+        writer.release()
+
+    def test_latest_frame_and_dropped_count(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'clip.avi')
+            self._write_video(path, 5)
+            cam = Camera(path, grabber=True, buffer_size=2)
+            self.assertTrue(cam.open())
+            try:
+                deadline = time.time() + 5
+                packet = None
+                while time.time() < deadline:
+                    packet = cam.read_latest(0, timeout=0.5)
+                    if packet is not None and packet.seq == 5:
+                        break
+                self.assertEqual(packet.seq, 5)
+                self.assertEqual(cam.read_latest(1).dropped, 3)
+                # Nothing newer than the last frame: non-blocking miss
+                self.assertIsNone(cam.read_latest(packet.seq))
+            finally:
+                cam.release()
+
+class TestFrameSources(unittest.TestCase):
+    def test_parse_source_spec(self):
+        self.assertEqual(parse_source_spec('Camera 2'), ('camera', 2))
+        self.assertEqual(parse_source_spec('1'), ('camera', 1))
+        self.assertEqual(parse_source_spec('dir:snapshots'), ('dir', 'snapshots'))
+        self.assertEqual(parse_source_spec('synthetic:320x240@15'), ('synthetic', '320x240@15'))
+
+    def test_malformed_synthetic_spec(self):
+        for spec in ('synthetic:320', 'synthetic:abcx10', 'synthetic:640x480@fast', 'synthetic:0x480'):
+            with self.assertRaises(ValueError) as ctx:
+                create_frame_source(spec, realtime=False)
+            self.assertIn(spec, str(ctx.exception))
+        with self.assertRaisesRegex(ValueError, r'synthetic:WIDTHxHEIGHT\[@FPS\]'):
+            create_frame_source('synthetic:320')
+        # The size and the rate are each optional
+        source = create_frame_source('synthetic:@15', realtime=False)
+        self.assertEqual((source.width, source.height, source.fps), (1280, 720, 15.0))
+
+    def test_synthetic_source(self):
+        src = create_frame_source('synthetic:320x240@15', realtime=False)
+        self.assertIsInstance(src, SyntheticSource)
+        self.assertTrue(src.open())
+        ret, frame = src.read()
+        self.assertTrue(ret)
+        self.assertEqual(frame.shape, (240, 320, 3))
+        src.release()
+
+    def test_image_directory_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                cv2.imwrite(os.path.join(tmp, f'{i}.png'), np.full((8, 8, 3), i, dtype=np.uint8))
+            src = ImageDirectorySource(tmp, realtime=False, loop=False)
+            self.assertTrue(src.open())
+            frames = [src.read() for _ in range(4)]
+            self.assertEqual([ret for ret, _ in frames], [True, True, True, False])
+            self.assertEqual(int(frames[2][1][0, 0, 0]), 2)
+
+class TestCameraBroker(unittest.TestCase):
+    def test_shared_device_and_refcount(self):
+        broker = CameraBroker()
+        full = broker.subscribe('synthetic:320x240@60')
+        small = broker.subscribe('synthetic:320x240@60', size=(160, 120))
+        try:
+            self.assertIs(full.source, small.source)
+            self.assertEqual(broker.subscriber_count('synthetic:320x240@60'), 2)
+            self.assertEqual(full.read_latest(timeout=1.0).frame.shape, (240, 320, 3))
+            self.assertEqual(small.read_latest(timeout=1.0).frame.shape, (120, 160, 3))
+            full.close()
+            self.assertTrue(small.source.is_opened())
+        finally:
+            small.close()
+        self.assertEqual(broker.subscriber_count('synthetic:320x240@60'), 0)
+        self.assertFalse(small.source.is_opened())
+
+class TestCameraProbe(unittest.TestCase):
+    def test_parallel_probe_with_timeout_and_cache(self):
+        def probe(idx):
+            if idx == 1:
+                time.sleep(2.0)
+            return {'index': idx, 'name': f"Camera {idx}", 'default': {}, 'modes': []} if idx != 2 else None
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, 'cache.json')
+            start = time.monotonic()
+            cameras = camera_probe.enumerate_cameras([0, 1, 2], timeout=0.5, cache_path=cache_path, probe=probe)
+            self.assertLess(time.monotonic() - start, 1.5)
+            self.assertEqual([c['index'] for c in cameras], [0])
+            # A timed-out probe leaves the cache unwritten
+            self.assertIsNone(camera_probe.cached_cameras([0, 1, 2], cache_path, is_present=lambda idx: idx == 0))
+            cameras = camera_probe.enumerate_cameras([0, 2], timeout=0.5, cache_path=cache_path, probe=probe)
+            self.assertEqual(camera_probe.cached_cameras([0, 2], cache_path, is_present=lambda idx: idx == 0), cameras)
+    def test_cache_tracks_devices_and_expires(self):
+        if glob.glob('/dev/video*'):
+            self.skipTest("device nodes are used as the signature here")
+        probe = lambda idx: {'index': idx, 'name': f"Camera {idx}", 'default': {}, 'modes': []} if idx == 0 else None
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, 'cache.json')
+            cameras = camera_probe.enumerate_cameras([0, 1], cache_path=cache_path, probe=probe)
+            self.assertEqual(camera_probe.cached_cameras([0, 1], cache_path, is_present=lambda idx: idx == 0), cameras)
+            # A camera plugged in at index 1 invalidates the cache
+            self.assertIsNone(camera_probe.cached_cameras([0, 1], cache_path, is_present=lambda idx: True))
+            # An index held open by the broker counts as present
+            self.assertEqual(camera_probe.cached_cameras([0, 1], cache_path, busy=[0], is_present=lambda idx: False), cameras)
+            # Unverified reads trust the cache until it expires
+            self.assertEqual(camera_probe.cached_cameras([0, 1], cache_path, verify=False), cameras)
+            self.assertIsNone(camera_probe.cached_cameras([0, 1], cache_path, max_age=-1, verify=False))
+
+class FakeDetector:
+    # Stub detector: every frame yields two resistors and one capacitor
+    def __init__(self):
+        self.model = type('Model', (), {'names': {0: 'resistor', 1: 'capacitor'}})()
+        self.calls = []
+
+    def detect(self, image, conf=0.5, classes=None):
+        frames = image if isinstance(image, list) else [image]
+        self.calls.append(len(frames))
+        data = [[1, 1, 5, 5, 0.9, 0], [6, 6, 9, 9, 0.9, 0], [2, 6, 4, 9, 0.9, 1]]
+        return [DetectionResult.from_array(data, self.model.names) for _ in frames]
+
+    def detect_batch(self, frames, conf=0.5, batch_size=8, classes=None):
+        return self.detect(list(frames), conf=conf, classes=classes)
+
+class TestInspection(unittest.TestCase):
+    def test_compiled_verdict(self):
+        names = {0: 'resistor', 1: 'capacitor'}
+        board = inspection.CompiledBoardSet({'resistor': 2, 'capacitor': 1}, names)
+        evaluation = board.evaluate(DetectionResult.from_array([[0, 0, 4, 4, 0.9, 0]] * 2, names))
+        self.assertEqual(evaluation.pass_fail, 'FAIL')
+        self.assertEqual(evaluation.missing, ['capacitor (expected 1, found 0)'])
+        board = inspection.CompiledBoardSet({'resistor': 2}, names)
+        self.assertEqual(board.evaluate(DetectionResult.from_array([[0, 0, 4, 4, 0.9, 0]] * 3, names)).pass_fail, 'PASS')
+        self.assertEqual(board.evaluate(None).missing, ['resistor (expected 2, found 0)'])
+
+    def test_multi_view_inspection_is_batched(self):
+        board_manager = type('Boards', (), {'sets': {'Front': {'resistor': 2}, 'Back': {'capacitor': 2}}})()
+        views = [{'source': 'synthetic:64x48@60', 'board': 'Front'}, {'source': 'synthetic:32x24@60', 'board': 'Back'}]
+        inspector = inspection.MultiViewInspector(views, board_manager, broker=CameraBroker())
+        self.assertEqual(inspector.open(), [])
+        try:
+            detector = FakeDetector()
+            combined, reports = inspector.inspect(detector, inspector.capture())
+        finally:
+            inspector.close()
+        self.assertEqual(detector.calls, [2])
+        self.assertEqual([r['result'] for r in reports], ['PASS', 'FAIL'])
+        self.assertEqual(combined, 'FAIL')
+        record = inspector.combined_record('ts', 1, None, combined, reports)
+        self.assertEqual(record['board'], 'Front + Back')
+        self.assertEqual(record['missing'], ['[Back] capacitor (expected 2, found 1)'])
+
+    def test_draw_filtered_result(self):
+        result = FakeDetector().detect(np.zeros((16, 16, 3), dtype=np.uint8))[0]
+        frame = np.zeros((16, 16, 3), dtype=np.uint8)
+        board = inspection.CompiledBoardSet({'resistor': 2}, result.names)
+        evaluation = board.evaluate(result)
+        board.draw(frame, evaluation.result)
+        self.assertEqual(evaluation.detected, {'resistor': 2})
+        self.assertEqual(evaluation.result.counts(), {'resistor': 2})
+        self.assertEqual(evaluation.result.xyxy.tolist(), [[1, 1, 5, 5], [6, 6, 9, 9]])
+        self.assertTrue(frame.any())
+
+class TestCompiledBoardSet(unittest.TestCase):
+    def test_evaluation_matches_board(self):
+        names = {0: 'resistor', 1: 'capacitor', 2: 'diode'}
+        board = inspection.CompiledBoardSet({'diode': 1, 'resistor': 1, 'fuse': 1}, names, colors={'diode': (1, 2, 3)})
+        self.assertEqual(board.allowed.tolist(), [True, False, True, False])
+        self.assertEqual(board.colors[2], (1, 2, 3))
+        # Class 7 is unknown to the compiled names and is ignored
+        result = DetectionResult.from_array([[0, 0, 4, 4, 0.9, c] for c in (0, 0, 1, 7)], names)
+        evaluation = board.evaluate(result)
+        self.assertEqual(evaluation.pass_fail, 'FAIL')
+        self.assertEqual(evaluation.missing, ['diode (expected 1, found 0)', 'fuse (expected 1, found 0)'])
+        self.assertEqual(evaluation.extra, ['resistor (expected 1, found 2)'])
+        self.assertEqual(evaluation.detected, {'resistor': 2})
+        self.assertEqual(evaluation.summary(), {'diode': 0, 'resistor': 2, 'fuse': 0})
+        self.assertEqual(evaluation.result.cls.tolist(), [0, 0])
+        unfiltered = inspection.CompiledBoardSet(None, names).evaluate(result)
+        self.assertEqual((unfiltered.pass_fail, unfiltered.summary()), ('PASS', {'resistor': 2, 'capacitor': 1}))
+
+class TestDetectionResult(unittest.TestCase):
+    def test_arrays_and_views(self):
+        names = {0: 'chip', 1: 'led'}
+        result = DetectionResult.from_array([[0, 0, 10, 10, 0.9, 1], [5, 5, 20, 20, 0.6, 0], [1, 2, 3, 4, 0.5, 1]], names)
+        self.assertEqual((result.xyxy.shape, result.cls.dtype, result.ids), ((3, 4), np.dtype(np.int64), None))
+        self.assertEqual(result.counts(), {'chip': 1, 'led': 2})
+        self.assertEqual(result.select(result.conf > 0.55).labels(), ['led', 'chip'])
+        np.testing.assert_allclose(result.shifted(100, 50).xyxy[0], [100, 50, 110, 60])
+        np.testing.assert_allclose(result.data[2], [1, 2, 3, 4, 0.5, 1], atol=1e-6)
+        tracked = DetectionResult.from_array([[0, 0, 10, 10, 7, 0.9, 1]], names)
+        self.assertEqual((tracked.ids.tolist(), tracked.labels()), ([7], ['led']))
+        self.assertEqual(len(DetectionResult.from_array(np.zeros((0, 6)))), 0)
+
+class TestInspectionServer(unittest.TestCase):
+    def setUp(self):
+        self.boards = type('Boards', (), {'sets': {'Front': {'resistor': 2}, 'Back': {'capacitor': 2}}})()
+        self.detector = FakeDetector()
+
+    def test_batching_and_backpressure(self):
+        service = server.InspectionService(self.detector, self.boards, max_queue=2)
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        jobs = [service.submit(frame, 'Front'), service.submit(frame, 'Back')]
+        with self.assertRaises(server.QueueFull):
+            service.submit(frame, 'Front')
+        with self.assertRaises(KeyError):
+            service.submit(frame, 'Unknown')
+        service.process(service._next_batch())
+        self.assertEqual(self.detector.calls, [2])
+        self.assertEqual([job.wait(0)['result'] for job in jobs], ['PASS', 'FAIL'])
+        self.assertEqual(service.metrics()['counters']['rejected'], 1)
+
+    def test_failed_tiled_job_does_not_fail_batch(self):
+        class Boards:
+            sets = {'Front': {'resistor': 2}, 'Big': {'resistor': 2}}
+            def get_options(self, name):
+                return {'tiling': {'enabled': True}} if name == 'Big' else {}
+        class BrokenTiling(FakeDetector):
+            def detect_tiled(self, image, **kwargs):
+                raise RuntimeError("tile failed")
+        service = server.InspectionService(BrokenTiling(), Boards())
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        jobs = [service.submit(frame, 'Big'), service.submit(frame, 'Front')]
+        service.process(service._next_batch())
+        with self.assertRaises(RuntimeError):
+            jobs[0].wait(0)
+        self.assertEqual(jobs[1].wait(0)['result'], 'PASS')
+        counters = service.metrics()['counters']
+        self.assertEqual((counters['errors'], counters['completed']), (1, 1))
+
+    def test_failed_job_does_not_fail_batch(self):
+        service = server.InspectionService(self.detector, self.boards)
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        jobs = [service.submit(frame, 'Front'), service.submit(frame, 'Back')]
+        evaluate = service._evaluate
+        def flaky(job, *args):
+            if job.board == 'Front':
+                raise OSError("disk full")
+            return evaluate(job, *args)
+        service._evaluate = flaky
+        service.process(service._next_batch())
+        with self.assertRaises(OSError):
+            jobs[0].wait(0)
+        self.assertEqual(jobs[1].wait(0)['result'], 'FAIL')
+        counters = service.metrics()['counters']
+        self.assertEqual((counters['errors'], counters['completed']), (1, 1))
+
+    def test_http_api(self):
+        import http.client
+        import threading
+        httpd = server.create_server(server.InspectionService(self.detector, self.boards), port=0)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        self.addCleanup(httpd.service.stop)
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        conn = http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=10)
+        def request(method, path, body=None, headers={}):
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read())
+        png = cv2.imencode('.png', np.zeros((48, 64, 3), dtype=np.uint8))[1].tobytes()
+        status, record = request('POST', '/inspect?board=Front&board_number=7', png)
+        self.assertEqual(status, 200)
+        self.assertEqual((record['board'], record['board_number'], record['result']), ('Front', 7, 'PASS'))
+        self.assertEqual(record['detected'], {'resistor': 2})
+        self.assertEqual(request('POST', '/inspect?board=Nope', png)[0], 400)
+        self.assertEqual(request('POST', '/inspect?board=Front', b'not an image')[0], 400)
+        as_json = {'Content-Type': 'application/json'}
+        payload = json.dumps({'board': 'Front', 'image': base64.b64encode(png).decode()})
+        self.assertEqual(request('POST', '/inspect', payload, as_json)[1]['result'], 'PASS')
+        for body in ('[1, 2]', '"text"', '{"board": "Front", "image": "abc"}', '{"board": "Front", "image": 5}'):
+            self.assertEqual(request('POST', '/inspect', body, as_json)[0], 400)
+        self.assertEqual(request('GET', '/health')[1]['status'], 'ok')
+        metrics = request('GET', '/metrics')[1]
+        self.assertEqual(metrics['counters']['completed'], 2)
+        self.assertIn('service.total', metrics['latency_ms'])
+
+class TestChangeDetector(unittest.TestCase):
+    def test_static_scene_is_gated(self):
+        rng = np.random.default_rng(1)
+        board = np.full((480, 640, 3), 40, dtype=np.uint8)
+        cv2.rectangle(board, (200, 150), (440, 330), (40, 160, 40), -1)
+        gate = ChangeDetector(threshold=4.0)
+        self.assertTrue(gate.has_changed(board))
+        gate.mark_inferred(board)
+        noisy = np.clip(board.astype(np.int16) + rng.integers(-3, 4, board.shape), 0, 255).astype(np.uint8)
+        self.assertFalse(gate.has_changed(noisy))
+        moved = np.roll(board, 80, axis=1)
+        self.assertTrue(gate.has_changed(moved))
+
+class TestBoxTracker(unittest.TestCase):
+    def scene(self, x, y):
+        # Textured 60x40 part on a flat background, top-left corner at (x, y)
+        frame = np.full((240, 320, 3), 30, dtype=np.uint8)
+        frame[y:y + 40, x:x + 60] = self.texture
+        return frame
+
+    def test_boxes_follow_motion_and_keep_ids(self):
+        self.texture = np.random.default_rng(0).integers(0, 255, (40, 60, 3), dtype=np.uint8)
+        tracker = BoxTracker(min_interval=2, max_interval=6)
+        self.assertTrue(tracker.needs_keyframe())
+        tracker.update(self.scene(50, 60), [[50, 60, 110, 100, 0.9, 0]])
+        for step in range(1, 3):
+            tracker.propagate(self.scene(50 + 2 * step, 60 + step))
+        np.testing.assert_allclose(tracker.data()[0, :4], [54, 62, 114, 102], atol=1.0)
+        self.assertTrue(tracker.needs_keyframe())
+        # The detector agrees with the tracked box: same id, longer interval
+        tracker.update(self.scene(54, 62), [[54, 62, 114, 102, 0.8, 0]])
+        self.assertEqual(tracker.interval, 3)
+        tracker.update(self.scene(54, 62), [[54, 62, 114, 102, 0.8, 0], [200, 150, 230, 180, 0.7, 1]])
+        data = tracker.data()
+        self.assertEqual(data[:, 4].tolist(), [1, 2])
+        # Results keep the track ids; .data is still x1, y1, x2, y2, conf, cls
+        result = tracker.result({0: 'chip', 1: 'led'})
+        self.assertEqual(result.ids.tolist(), [1, 2])
+        self.assertEqual(result.labels(), ['chip', 'led'])
+        np.testing.assert_allclose(result.data[1], [200, 150, 230, 180, 0.7, 1], atol=1e-5)
+        # A part missing from one keyframe is kept once, then dropped
+        tracker.update(self.scene(54, 62), [[54, 62, 114, 102, 0.8, 0]])
+        self.assertEqual(len(tracker.data()), 2)
+        tracker.update(self.scene(54, 62), [[54, 62, 114, 102, 0.8, 0]])
+        self.assertEqual(tracker.data()[:, 4].tolist(), [1])
+        # Fast motion forces the next frame to be a keyframe
+        tracker.propagate(self.scene(64, 62))
+        self.assertGreater(tracker.last_motion, tracker.motion_threshold)
+        self.assertTrue(tracker.needs_keyframe())
+
+class TestAdaptivePacer(unittest.TestCase):
+    def run_frames(self, pacer, n, busy_ms=100.0):
+        for _ in range(n):
+            pacer.record(busy_ms, busy_ms)
+            delay = pacer.next_delay()
+        return delay
+
+    def test_backs_off_under_load_and_recovers(self):
+        load = [0.1]
+        pacer = AdaptivePacer(target_latency_ms=250, cpu_budget=0.5, load=lambda: load[0])
+        # Idle: the smallest delay the 50% CPU budget allows
+        self.assertAlmostEqual(self.run_frames(pacer, 20), 0.1, places=3)
+        # Loaded: stretched, but the result stays within the latency target
+        load[0] = 0.95
+        loaded = self.run_frames(pacer, 30)
+        self.assertGreater(loaded, 0.14)
+        self.assertLessEqual(loaded, 0.15 + 1e-6)
+        load[0] = 0.2
+        self.assertLess(self.run_frames(pacer, 40), 0.11)
+
+    def test_cpu_budget_wins_over_latency_target(self):
+        pacer = AdaptivePacer(target_latency_ms=250, cpu_budget=0.25, load=lambda: 0.99)
+        self.assertAlmostEqual(self.run_frames(pacer, 30), 0.3, places=3)
+
+    def test_slow_inference_reads_as_load(self):
+        pacer = AdaptivePacer(target_latency_ms=1000, cpu_budget=0.5, load=None)
+        self.run_frames(pacer, 15, busy_ms=50.0)
+        self.assertGreater(self.run_frames(pacer, 15, busy_ms=120.0), 0.2)
+
+class FakeLabel:
+    # Stands in for the Tk label: after() callbacks run when the test ticks
+    def __init__(self):
+        self.callbacks = []
+        self.image = None
+    def after(self, ms, fn):
+        self.callbacks.append(fn)
+        return len(self.callbacks)
+    def after_cancel(self, after_id):
+        self.callbacks = []
+    def config(self, image=None):
+        self.shown = image
+    def tick(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for fn in callbacks:
+            fn()
+
+class TestFramePresenter(unittest.TestCase):
+    def test_newest_frame_wins_and_calls_run_on_tick(self):
+        import threading
+        label = FakeLabel()
+        presenter = FramePresenter(label, fps=50, convert=lambda frame: frame)
+        self.assertEqual(presenter.interval_ms, 20)
+        presenter.start()
+        seen = []
+        def produce():
+            for i in range(5):
+                presenter.submit(i)
+            presenter.call(seen.append, 'status')
+        worker = threading.Thread(target=produce)
+        worker.start()
+        worker.join()
+        # Nothing touches the label until the Tk tick
+        self.assertIsNone(label.image)
+        label.tick()
+        self.assertEqual((label.image, presenter.shown, presenter.dropped, seen), (4, 1, 4, ['status']))
+        label.tick()
+        self.assertEqual(presenter.shown, 1)
+        shown, dropped = presenter.rates()
+        self.assertGreater(dropped, shown)
+        presenter.submit(5)
+        presenter.discard()
+        presenter.stop()
+        label.tick()
+        self.assertEqual((label.image, label.callbacks), (4, []))
+    def test_failed_call_is_reported(self):
+        label = FakeLabel()
+        errors = []
+        presenter = FramePresenter(label, convert=lambda frame: frame, on_error=errors.append)
+        seen = []
+        presenter.call(lambda: 1 / 0)
+        presenter.call(seen.append, 'after')
+        presenter.submit(1)
+        presenter.flush()
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        self.assertEqual((seen, label.image), (['after'], 1))
+        # Without a handler it reaches Tk; later calls wait for the next tick
+        presenter = FramePresenter(label, convert=lambda frame: frame)
+        presenter.call(lambda: 1 / 0)
+        presenter.call(seen.append, 'next')
+        with self.assertRaises(ZeroDivisionError):
+            presenter.flush()
+        presenter.flush()
+        self.assertEqual(seen, ['after', 'next'])
+
+class TestSettleTrigger(unittest.TestCase):
+    def test_fires_once_per_board_and_rearms(self):
+        empty = np.full((240, 320, 3), 40, dtype=np.uint8)
+        def board_at(x):
+            frame = empty.copy()
+            cv2.rectangle(frame, (x, 60), (x + 160, 180), (40, 200, 40), -1)
+            return frame
+        trigger = SettleTrigger(settle_frames=3, empty_frames=2)
+        trigger.update(empty)
+        # Board slides in, then rests
+        sequence = [board_at(x) for x in (0, 40, 80)] + [board_at(80)] * 6
+        fired = [trigger.update(f) for f in sequence]
+        self.assertEqual(fired.count(True), 1)
+        # Still there: no second capture
+        self.assertFalse(any(trigger.update(board_at(80)) for _ in range(5)))
+        # Fixture empties, next board arrives and fires again
+        for _ in range(3):
+            trigger.update(empty)
+        self.assertEqual(trigger.state, SettleTrigger.EMPTY)
+        fired = [trigger.update(board_at(100)) for _ in range(6)]
+        self.assertEqual(fired.count(True), 1)
+        # A capture that failed re-arms the trigger for the same board
+        trigger.rearm()
+        fired = [trigger.update(board_at(100)) for _ in range(6)]
+        self.assertEqual(fired.count(True), 1)
+
+class TestDetectBatch(unittest.TestCase):
+    def test_batches_in_order(self):
+        calls = []
+        class Model:
+            # One box per frame whose x1 is the frame's pixel value
+            names = {0: 'part'}
+            def __call__(self, images, conf=0.5, verbose=True, device=None, classes=None):
+                calls.append(len(images))
+                return [type('R', (), {'boxes': SquareBoxes(np.array([[img[0, 0, 0], 0, 1, 1, 0.9, 0]], dtype=np.float32))})()
+                        for img in images]
+        detector = Detector()
+        detector.model = Model()
+        frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(5)]
+        self.assertEqual([r.xyxy[0, 0] for r in detector.detect_batch(frames, batch_size=2)], [0, 1, 2, 3, 4])
+        self.assertEqual(calls, [2, 2, 1])
+        stream = detector.iter_detect(iter(frames), batch_size=4)
+        self.assertEqual(next(stream).xyxy[0, 0], 0)
+        self.assertEqual(calls[-1], 4)
+
+class FakeLoadedDetector:
+    def __init__(self):
+        self.model = None
+        self.model_path = None
+        self.unloads = 0
+    def load_model(self, path):
+        self.model = object()
+        self.model_path = path
+    def unload_model(self):
+        self.model = None
+        self.unloads += 1
+    def warmup(self, runs=2, size=640):
+        self.ready = True
+
+class SquareBoxes:
+    def __init__(self, data):
+        self.data = data
+    def __len__(self):
+        return len(self.data)
+
+class SquareModel:
+    # Stub model that "detects" the white pixels of each input as one box
+    names = {0: 'square'}
+    def __call__(self, images, conf=0.5, verbose=True, device=None, classes=None):
+        results = []
+        for img in (images if isinstance(images, list) else [images]):
+            ys, xs = np.nonzero(img[:, :, 0] > 200)
+            data = np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 0]], dtype=np.float32) if len(xs) else np.zeros((0, 6), dtype=np.float32)
+            results.append(type('R', (), {'boxes': SquareBoxes(data)})())
+        return results
+
+class SquareDetector(Detector):
+    # Runs SquareModel; a red top-left pixel kills the (worker) process
+    def load_model(self, path):
+        self.model = SquareModel()
+        self.model_path = path
+    def detect(self, image, conf=0.5, classes=None):
+        if tuple(image[0, 0]) == (0, 0, 255):
+            os._exit(1)
+        return super().detect(image, conf=conf, classes=classes)
+
+class UnloadableDetector(SquareDetector):
+    def load_model(self, path):
+        raise FileNotFoundError(path)
+
+class CountingSquareDetector(SquareDetector):
+    # Appends the batch size of every forward pass to log_path (the model
+    # runs in the worker process)
+    def __init__(self, log_path, **kwargs):
+        super().__init__(**kwargs)
+        self.log_path = log_path
+    def load_model(self, path):
+        super().load_model(path)
+        model, log_path = self.model, self.log_path
+        def counting(images, **kwargs):
+            with open(log_path, 'a') as f:
+                f.write(f"{len(images) if isinstance(images, list) else 1}\n")
+            return model(images, **kwargs)
+        self.model = counting
+        self.model.names = model.names
+
+class TestInferenceWorker(unittest.TestCase):
+    def setUp(self):
+        self.detector = RemoteDetector(factory=SquareDetector, slots=2)
+        self.detector.load_model('square.pt')
+        self.addCleanup(self.detector.unload_model)
+
+    def square(self, x, y, width=320, height=240):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        frame[y:y + 20, x:x + 30] = 255
+        return frame
+
+    def test_results_from_worker(self):
+        frame = self.square(40, 50)
+        results = self.detector.detect(frame)
+        np.testing.assert_allclose(results[0].xyxy, [[40, 50, 70, 70]])
+        self.assertEqual(results[0].names, {0: 'square'})
+        # More frames than ring slots, of different sizes, come back in order
+        frames = [self.square(10 * i, 5 * i, width=320 + 200 * i) for i in range(5)]
+        boxes = [r.xyxy[0, 0] for r in self.detector.detect_batch(frames)]
+        self.assertEqual(boxes, [0, 10, 20, 30, 40])
+
+    def test_batch_is_one_forward_pass(self):
+        import functools
+        log_path = os.path.join(tempfile.mkdtemp(), 'calls.txt')
+        self.addCleanup(shutil.rmtree, os.path.dirname(log_path))
+        detector = RemoteDetector(factory=functools.partial(CountingSquareDetector, log_path), slots=1)
+        detector.load_model('square.pt')
+        self.addCleanup(detector.unload_model)
+        frames = [self.square(10 * i, 5 * i) for i in range(4)]
+        boxes = [r.xyxy[0, 0] for r in detector.detect_batch(frames, batch_size=8)]
+        self.assertEqual(boxes, [0, 10, 20, 30])
+        with open(log_path) as f:
+            self.assertEqual(f.read().split(), ['4'])
+
+    def test_restart_after_crash(self):
+        crash = self.square(40, 50)
+        crash[0, 0] = (0, 0, 255)
+        with self.assertRaises(WorkerError):
+            self.detector.detect(crash)
+        self.assertGreaterEqual(self.detector.restarts, 1)
+        results = self.detector.detect(self.square(60, 70))
+        np.testing.assert_allclose(results[0].xyxy, [[60, 70, 90, 90]])
+        self.assertTrue(self.detector.is_alive())
+
+class TestBulkInspection(unittest.TestCase):
+    def test_resumable_process_pool_run(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        def write_image(name, squares):
+            frame = np.zeros((120, 160, 3), dtype=np.uint8)
+            if squares:
+                frame[20:40, 30:60] = 255
+            cv2.imwrite(os.path.join(tmpdir, name), frame)
+        write_image('a.png', True)
+        write_image('b.png', False)
+        with open(os.path.join(tmpdir, 'broken.png'), 'wb') as f:
+            f.write(b'not an image')
+        output = os.path.join(tmpdir, 'results.csv')
+        run = lambda: bulk_inspection.inspect_directory(benchmark.snapshot_images(tmpdir), 'Squares', {'square': 1},
+                                                        output, 'square.pt', workers=2, factory=SquareDetector)
+        summary = run()
+        self.assertEqual((summary['inspected'], summary['pass'], summary['fail'], summary['errors']), (3, 1, 1, 1))
+        self.assertGreater(summary['images_per_s'], 0)
+        write_image('c.png', True)
+        # The unreadable image is retried with the new one
+        summary = run()
+        self.assertEqual((summary['skipped'], summary['inspected'], summary['pass'], summary['errors']), (2, 2, 1, 1))
+        import csv
+        with open(output, newline='') as f:
+            rows = {os.path.basename(r['image']): r for r in csv.DictReader(f)}
+        self.assertEqual({k: r['result'] for k, r in rows.items()}, {'a.png': 'PASS', 'b.png': 'FAIL', 'broken.png': 'ERROR', 'c.png': 'PASS'})
+        self.assertEqual(rows['b.png']['missing'], 'square (expected 1, found 0)')
+
+    def test_model_load_failure_is_reported(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        cv2.imwrite(os.path.join(tmpdir, 'a.png'), np.zeros((16, 16, 3), dtype=np.uint8))
+        with self.assertRaises(bulk_inspection.ModelLoadError) as ctx:
+            bulk_inspection.inspect_directory(benchmark.snapshot_images(tmpdir), 'Squares', {'square': 1},
+                                              os.path.join(tmpdir, 'results.jsonl'), 'missing.pt',
+                                              workers=1, factory=UnloadableDetector)
+        self.assertIn("Could not load model 'missing.pt'", str(ctx.exception))
+        self.assertEqual(bulk_inspection.completed_images(os.path.join(tmpdir, 'results.jsonl')), set())
+
+    def test_resume_ignores_incomplete_records(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        output = os.path.join(tmpdir, 'results.csv')
+        with open(output, 'w', newline='') as f:
+            f.write('image,board,result,missing,detected,error\n'
+                    'a.png,S,PASS,,{},\n'
+                    'b.png,S,MAYBE,,{},\n'  # unknown result
+                    'c.png,S,FAIL\n'        # columns missing
+                    'd.png,S,PASS,,{},')     # cut off: no newline
+        self.assertEqual(bulk_inspection.completed_images(output), {'a.png'})
+        writer = bulk_inspection.ResultWriter(output)
+        writer.write({'image': 'd.png', 'board': 'S', 'result': 'PASS'})
+        writer.write({'image': 'e.png', 'board': 'S', 'result': 'ERROR', 'error': "line one\nline two"})
+        writer.write({'image': 'a.png', 'board': 'S', 'result': 'ERROR', 'error': "camera unplugged"})
+        writer.close()
+        # ERROR records are retried, and the newest record of an image counts
+        self.assertEqual(bulk_inspection.completed_images(output), {'d.png'})
+        with open(output) as f:
+            self.assertIn('e.png,S,ERROR,,{},line one line two\n', f.read())
+        output = os.path.join(tmpdir, 'results.jsonl')
+        with open(output, 'w') as f:
+            f.write('{"image": "a.png", "result": "PASS"}\n{"image": "b.png"}\n[1]\n{"image": "c.png", "result": "FAIL"}')
+        self.assertEqual(bulk_inspection.completed_images(output), {'a.png'})
+
+class TestTiledDetection(unittest.TestCase):
+    def test_tile_grid_covers_frame(self):
+        tiles = tile_grid(1920, 1080, 640, 0.2)
+        self.assertEqual(tiles[0], (0, 0, 640, 640))
+        self.assertEqual(tiles[-1], (1280, 440, 1920, 1080))
+        self.assertEqual(tile_grid(320, 240, 640), [(0, 0, 320, 240)])
+    def test_box_across_seam_is_merged(self):
+        detector = Detector()
+        detector.model = SquareModel()
+        frame = np.zeros((640, 1200, 3), dtype=np.uint8)
+        frame[100:160, 500:580] = 255  # spans the seam between the first two tiles
+        results = detector.detect_tiled(frame, tile_size=640, overlap=0.25, full_frame=False)
+        self.assertEqual(results[0].xyxy.tolist(), [[500.0, 100.0, 580.0, 160.0]])
+        self.assertEqual(results[0].cls.tolist(), [0])
+        self.assertEqual(results[0].labels(), ['square'])
+    def test_part_wider_than_overlap_is_kept(self):
+        detector = Detector()
+        detector.model = SquareModel()
+        # 600 px wide: every tile sees only a truncated piece of it
+        frame = np.zeros((640, 1200, 3), dtype=np.uint8)
+        frame[100:160, 300:900] = 255
+        results = detector.detect_tiled(frame, tile_size=640, overlap=0.25, full_frame=False)
+        self.assertEqual(results[0].xyxy.tolist(), [[300.0, 100.0, 900.0, 160.0]])
+        # Cut by the first seam but whole in the next tiles: the piece is dropped
+        frame = np.zeros((640, 1200, 3), dtype=np.uint8)
+        frame[100:160, 600:700] = 255
+        results = detector.detect_tiled(frame, tile_size=640, overlap=0.25, full_frame=False)
+        self.assertEqual(results[0].xyxy.tolist(), [[600.0, 100.0, 700.0, 160.0]])
+    def test_touching_parts_across_seams_stay_separate(self):
+        class PartsModel(SquareModel):
+            # One box per distinct gray level: parts may touch and stay apart
+            def __call__(self, images, **kwargs):
+                results = []
+                for img in images:
+                    rows = []
+                    for value in np.unique(img[:, :, 0])[1:]:
+                        ys, xs = np.nonzero(img[:, :, 0] == value)
+                        rows.append([xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 0])
+                    results.append(type('R', (), {'boxes': SquareBoxes(np.array(rows, dtype=np.float32).reshape(-1, 6))})())
+                return results
+        detector = Detector()
+        detector.model = PartsModel()
+        # Both parts are wider than the 80 px overlap and share a pixel row
+        frame = np.zeros((320, 1200, 3), dtype=np.uint8)
+        frame[50:100, 100:500] = 100
+        frame[99:150, 150:520] = 200
+        results = detector.detect_tiled(frame, tile_size=320, overlap=0.25, full_frame=False)
+        self.assertEqual(sorted(results[0].xyxy.tolist()), [[100.0, 50.0, 500.0, 100.0], [150.0, 99.0, 520.0, 150.0]])
+
+class TestClassFilter(unittest.TestCase):
+    def test_board_compiled_to_class_ids(self):
+        seen = []
+        class RecordingModel(SquareModel):
+            names = {0: 'resistor', 1: 'capacitor', 2: 'diode'}
+            def __call__(self, images, classes=None, **kwargs):
+                seen.append(classes)
+                return super().__call__(images, **kwargs)
+        detector = Detector()
+        detector.model = RecordingModel()
+        boards = type('Boards', (), {'sets': {'Front': {'diode': 1, 'resistor': 2, 'fuse': 1}, 'Other': {'fuse': 1}}})()
+        options = inspection.detection_options(detector, boards, 'Front')
+        self.assertEqual(options['classes'], [0, 2])
+        self.assertIs(detector.class_ids({'resistor', 'diode', 'fuse'}), options['classes'])
+        other = inspection.detection_options(detector, boards, 'Other')
+        self.assertEqual(other['classes'], [])
+        inspection.run_detection(detector, np.zeros((32, 32, 3), dtype=np.uint8), options=options)
+        self.assertEqual(seen, [[0, 2]])
+        # No known component: nothing is detected and the model is not run
+        frame = np.full((32, 32, 3), 255, dtype=np.uint8)
+        results = inspection.run_detection(detector, frame, options=other)
+        self.assertEqual([len(r) for r in results], [0])
+        self.assertEqual([len(r) for r in detector.detect_batch([frame, frame], classes=[])], [0, 0])
+        self.assertEqual(len(detector.detect_tiled(frame, classes=[])[0]), 0)
+        self.assertEqual(seen, [[0, 2]])
+
+class TestRegionOfInterest(unittest.TestCase):
+    def test_roi_conversion(self):
+        self.assertEqual(inspection.normalize_roi(300, 200, 100, 50, 400, 400), [0.25, 0.125, 0.75, 0.5])
+        self.assertEqual(inspection.roi_pixels([0.25, 0.125, 0.75, 0.5], (400, 400, 3)), (100, 50, 300, 200))
+        self.assertIsNone(inspection.roi_pixels([0.5, 0.5, 0.501, 0.9], (400, 400, 3)))
+        self.assertIsNone(inspection.roi_pixels(None, (400, 400, 3)))
+    def test_detection_is_cropped_and_mapped_back(self):
+        detector = Detector()
+        detector.model = SquareModel()
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame[10:30, 10:30] = 255     # outside the ROI (e.g. the operator's hand)
+        frame[200:240, 300:380] = 255  # the part on the board
+        results = inspection.run_detection(detector, frame, options={'roi': [0.25, 0.25, 0.75, 0.75]})
+        self.assertEqual(results[0].xyxy.tolist(), [[300.0, 200.0, 380.0, 240.0]])
+        self.assertEqual(results[0].counts(), {'square': 1})
+
+class TestModelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.paths = []
+        for name in ('a.pt', 'b.pt', 'c.pt'):
+            path = os.path.join(self.tmpdir, name)
+            with open(path, 'wb') as f:
+                f.write(name.encode() * (512 * 1024))  # 2 MB each
+            self.paths.append(path)
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+    def test_hit_and_lru_eviction(self):
+        cache = ModelCache(budget_mb=5, factory=FakeLoadedDetector)
+        a = cache.get(self.paths[0])
+        self.assertIs(cache.get(self.paths[0]), a)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        b = cache.get(self.paths[1])
+        cache.release(b)
+        cache.get(self.paths[0])  # a is now most recently used
+        cache.get(self.paths[2])
+        self.assertEqual(b.unloads, 1)
+        self.assertIsNotNone(a.model)
+        self.assertEqual(len(cache.cached_paths()), 2)
+    def test_leased_detector_survives_eviction(self):
+        cache = ModelCache(budget_mb=3, factory=FakeLoadedDetector)
+        a = cache.get(self.paths[0])
+        cache.get(self.paths[1])
+        # a left the cache but is still in use, so it stays loaded
+        self.assertEqual(cache.cached_paths(), [os.path.abspath(self.paths[1])])
+        self.assertEqual(a.unloads, 0)
+        self.assertEqual(cache.holders(a), 1)
+        cache.release(a)
+        self.assertEqual(a.unloads, 1)
+        self.assertEqual(cache.holders(a), 0)
+        cache.release(a)  # a second release is harmless
+        self.assertEqual(a.unloads, 1)
+    def test_changed_file_is_reloaded(self):
+        cache = ModelCache(factory=FakeLoadedDetector)
+        old = cache.get(self.paths[0])
+        with open(self.paths[0], 'ab') as f:
+            f.write(b'x')
+        new = cache.get(self.paths[0])
+        self.assertIsNot(old, new)
+        self.assertEqual(old.unloads, 0)
+        cache.release(old)
+        self.assertEqual(old.unloads, 1)
+        self.assertEqual(cache.cached_paths(), [os.path.abspath(self.paths[0])])
+    def test_load_async(self):
+        cache = ModelCache(factory=FakeLoadedDetector)
+        done = []
+        cache.load_async(self.paths[0], lambda det, err: done.append((det, err))).join(2.0)
+        self.assertTrue(done[0][0].ready)
+        self.assertIsNone(done[0][1])
+        cache.load_async(os.path.join(self.tmpdir, 'missing.pt'), lambda det, err: done.append((det, err))).join(2.0)
+        self.assertIsNone(done[1][0])
+        self.assertIsInstance(done[1][1], OSError)
+    def test_concurrent_loads(self):
+        gate = threading.Event()
+        loads = []
+        class GatedDetector(FakeLoadedDetector):
+            def load_model(self, path):
+                loads.append(path)
+                if path.endswith('a.pt'):
+                    gate.wait(5.0)
+                super().load_model(path)
+        cache = ModelCache(factory=GatedDetector)
+        got = []
+        threads = [threading.Thread(target=lambda: got.append(cache.get(self.paths[0]))) for _ in range(3)]
+        for t in threads:
+            t.start()
+        # a.pt is still loading; b.pt does not wait for it
+        b = cache.get(self.paths[1])
+        self.assertIsNotNone(b.model)
+        self.assertEqual(got, [])
+        gate.set()
+        for t in threads:
+            t.join(5.0)
+        self.assertEqual(len(got), 3)
+        self.assertTrue(all(d is got[0] for d in got))
+        self.assertEqual(sorted(loads), sorted(self.paths[:2]))
+        self.assertEqual(cache.holders(got[0]), 3)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+    def test_budget_keeps_most_recent(self):
+        cache = ModelCache(budget_mb=1, factory=FakeLoadedDetector)
+        cache.get(self.paths[0])
+        latest = cache.get(self.paths[1])
+        self.assertIsNotNone(latest.model)
+        self.assertEqual(len(cache.cached_paths()), 1)
+
+class TestBackendAgreement(unittest.TestCase):
+    def test_agreement(self):
+        ref = (np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32), np.array([0, 1]))
+        self.assertEqual(benchmark.agreement(ref, ref), 1.0)
+        shifted = (ref[0] + 1, ref[1])
+        self.assertEqual(benchmark.agreement(ref, shifted), 1.0)
+        wrong_class = (ref[0], np.array([1, 0]))
+        self.assertEqual(benchmark.agreement(ref, wrong_class), 0.0)
+        one = (ref[0][:1], ref[1][:1])
+        self.assertAlmostEqual(benchmark.agreement(ref, one), 2 / 3)
+        empty = benchmark.result_arrays(None)
+        self.assertEqual(benchmark.agreement(empty, empty), 1.0)
+
+class TestQuantization(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.old_models_dir = ModelManager.MODELS_DIR
+        ModelManager.MODELS_DIR = self.tmpdir
+    def tearDown(self):
+        ModelManager.MODELS_DIR = self.old_models_dir
+        shutil.rmtree(self.tmpdir)
+    def test_calibration_reader(self):
+        path = os.path.join(self.tmpdir, 'a.png')
+        cv2.imwrite(path, np.full((120, 200, 3), 255, dtype=np.uint8))
+        reader = quantization.SnapshotCalibrationReader([path, os.path.join(self.tmpdir, 'missing.png')], 'images', size=64)
+        batch = reader.get_next()
+        self.assertEqual(batch['images'].shape, (1, 3, 64, 64))
+        self.assertAlmostEqual(float(batch['images'].max()), 1.0)
+        self.assertIsNone(reader.get_next())
+        reader.rewind()
+        self.assertIsNotNone(reader.get_next())
+    def test_split_images(self):
+        images = [f"{i}.png" for i in range(100)]
+        calibration, evaluation = quantization.split_images(images, 64, 32)
+        self.assertEqual((len(calibration), len(evaluation)), (64, 32))
+        self.assertFalse(set(calibration) & set(evaluation))
+        # Fewer images than requested: a third is still held out
+        calibration, evaluation = quantization.split_images(images[:23], 64, 32)
+        self.assertEqual((len(calibration), len(evaluation)), (16, 7))
+        self.assertFalse(set(calibration) & set(evaluation))
+        calibration, evaluation = quantization.split_images(images[:90], 64, 32)
+        self.assertEqual((len(calibration), len(evaluation)), (60, 30))
+        # A single image can only calibrate
+        self.assertEqual(quantization.split_images(images[:1], 64, 32), (images[:1], []))
+    def test_int8_models_listed_and_deleted_with_report(self):
+        for name in ('best.pt', 'best_int8.onnx', 'best_int8.json', 'best.onnx'):
+            open(os.path.join(self.tmpdir, name), 'w').write('{"speedup": 2.0}')
+        self.assertEqual(ModelManager.list_models(), ['best.pt', 'best_int8.onnx'])
+        self.assertEqual(ModelManager.model_report('best_int8.onnx')['speedup'], 2.0)
+        self.assertTrue(ModelManager.delete_model('best_int8.onnx'))
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['best.onnx', 'best.pt'])
+
+class TestProfiler(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        profiler = Profiler(enabled=False)
+        with profiler.stage('capture.detect'):
+            pass
+        profiler.record('capture.total', 5.0)
+        self.assertEqual(profiler.summary(), {})
+
+    def test_percentiles_and_export(self):
+        profiler = Profiler(enabled=True, window=100)
+        for ms in range(1, 201):
+            profiler.record('realtime.detect', float(ms))
+        with profiler.stage('realtime.draw'):
+            pass
+        summary = profiler.summary()
+        # Only the last 100 samples (101..200) are kept
+        self.assertEqual(summary['realtime.detect']['count'], 100)
+        self.assertAlmostEqual(summary['realtime.detect']['p50'], 150.5)
+        self.assertEqual(summary['realtime.detect']['max'], 200.0)
+        self.assertIn('realtime.draw', summary)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        profiler.export(os.path.join(tmpdir, 'latency.csv'))
+        profiler.export(os.path.join(tmpdir, 'latency.json'))
+        with open(os.path.join(tmpdir, 'latency.csv')) as f:
+            self.assertEqual(f.readline().strip(), 'stage,count,mean,p50,p95,p99,max')
+        with open(os.path.join(tmpdir, 'latency.json')) as f:
+            self.assertIn('realtime.detect', json.load(f)['stages'])
+        profiler.reset()
+        self.assertEqual(profiler.summary(), {})
+
 if __name__ == '__main__':
     unittest.main()